@@ -0,0 +1,62 @@
+"""
+Compares the throughput of replaying a plain csv-file with replaying
+it compressed with every codec which open_tick_file() can read here.
+The ticks of test.csv are repeated to get a file of some megabytes.
+Run with python -m quantfxengine.benchmarks.bench_compression
+"""
+
+import os
+import bz2
+import gzip
+import time
+import shutil
+import tempfile
+
+from quantfxengine.streaming import tickfile
+from quantfxengine.streaming.streaming import read_csv_rows
+
+TICKFILE = os.path.join(os.path.dirname(__file__), '..', 'test.csv')
+
+
+def zstd_open(path, mode):
+    return tickfile.zstandard.ZstdCompressor().stream_writer(
+        open(path, mode))
+
+OPENERS = {
+    'gzip': ('.gz', gzip.open),
+    'bz2': ('.bz2', bz2.BZ2File),
+    'xz': ('.xz', lambda path, mode: tickfile.lzma.open(path, mode)),
+    'zstd': ('.zst', zstd_open),
+}
+
+
+def main(repeat=500):
+    directory = tempfile.mkdtemp()
+    try:
+        with open(TICKFILE, 'rb') as f:
+            data = f.read() * repeat
+        plain = os.path.join(directory, 'ticks.csv')
+        with open(plain, 'wb') as f:
+            f.write(data)
+        files = [('csv', plain)]
+        for codec in tickfile.available_codecs():
+            extension, opener = OPENERS[codec]
+            path = plain + extension
+            f = opener(path, 'wb')
+            f.write(data)
+            f.close()
+            files.append((codec, path))
+        for codec, path in files:
+            start = time.time()
+            ticks = 0
+            for row in read_csv_rows(path):
+                ticks += 1
+            seconds = time.time() - start
+            print "%-5s %6.1f MB on disk %8.3f s %6.1f MB/s %10.0f ticks/s" % (
+                codec, os.path.getsize(path) / 1e6, seconds,
+                len(data) / 1e6 / seconds, ticks / seconds)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Measures the construction time and the memory of the events.
+Run with python -m quantfxengine.benchmarks.bench_events
+"""
+
+import sys
+import timeit
+
+from quantfxengine.event.event import TickEvent, SignalEvent, OrderEvent, \
+    FillEvent
+
+EVENTS = [
+    ('TickEvent', TickEvent,
+        ("EUR_USD", "2015-02-14T10:30:00.649678Z", 1.24029, 1.24042)),
+    ('SignalEvent', SignalEvent, ("EUR_USD", "market", "buy")),
+    ('OrderEvent', OrderEvent, ("EUR_USD", 100, "market", "buy")),
+    ('FillEvent', FillEvent, ("EUR_USD", 100, "LONG", 1.24042)),
+]
+
+
+def event_size(event):
+    """
+    Memory of an event in bytes including its attribute dictionary
+    """
+    size = sys.getsizeof(event)
+    if hasattr(event, '__dict__'):
+        size += sys.getsizeof(event.__dict__)
+    return size
+
+
+def main(number=1000000):
+    for name, cls, args in EVENTS:
+        seconds = min(timeit.repeat(
+            lambda: cls(*args), number=number, repeat=3))
+        print "%-12s %8.1f ns/event %5d bytes/event" % (
+            name, seconds / number * 1e9, event_size(cls(*args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Measures what a fill costs the trading loop with a Journal: a fill
+in the portfolio without a journal, with a journal, and with the fill
+written to a csv-file and flushed in the trading loop instead. Also
+measures how fast the writer thread writes and read_journal reads.
+Run with python -m quantfxengine.benchmarks.bench_journal
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import timeit
+
+from quantfxengine.event.event import FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.portfolio.journal import Journal, read_journal
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import MockPriceStream
+
+
+class CsvJournal(object):
+    """
+    Writes every record as a line of a csv-file in the calling thread
+    """
+    def __init__(self, path):
+        self.f = open(path, 'w')
+
+    def order(self, *record):
+        pass
+
+    def fill(self, *record):
+        self.f.write('FILL,%s,%s,%d,%s,%r\n' % record)
+        self.f.flush()
+
+    def equity(self, *record):
+        self.f.write('EQUITY,%s,%r,%r,%r,%r\n' % record)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def time_fills(journal, number):
+    prices = MockPriceStream(LocalEventQueue(), threading.Event())
+    prices.newprice(1.1, 1.1001)
+    portfolio = Portfolio(prices, LocalEventQueue(), journal=journal)
+    portfolio.time = 1423909800000000000
+    fills = [FillEvent("EUR_USD", 100, "LONG", 1.1001),
+        FillEvent("EUR_USD", 100, "SHORT", 1.1)]
+    portfolio.logger.disabled = True
+    def run():
+        for i in xrange(number // 2):
+            for fill in fills:
+                portfolio.execute_fill_event(fill)
+    return min(timeit.repeat(run, number=1, repeat=3)) / number
+
+
+def main(number=100000):
+    directory = tempfile.mkdtemp()
+    try:
+        print "per fill, no journal      %8.2f us" % (
+            time_fills(None, number) * 1e6)
+        # the writer thread shares the GIL with the trading loop, a
+        # writer which does not wake up shows the cost of the enqueue
+        journal = Journal(os.path.join(directory, 'idle'), 3600)
+        print "per fill, Journal enqueue %8.2f us" % (
+            time_fills(journal, number) * 1e6)
+        journal.close()
+        journal = Journal(os.path.join(directory, 'run'))
+        print "per fill, Journal         %8.2f us" % (
+            time_fills(journal, number) * 1e6)
+        start = timeit.default_timer()
+        journal.close()
+        print "closing the Journal       %8.2f ms" % (
+            (timeit.default_timer() - start) * 1e3)
+        csv_journal = CsvJournal(os.path.join(directory, 'run.csv'))
+        print "per fill, csv in the loop %8.2f us" % (
+            time_fills(csv_journal, number) * 1e6)
+        csv_journal.close()
+        start = timeit.default_timer()
+        run = read_journal(os.path.join(directory, 'run'))
+        print "read_journal              %8.2f ms for %d fills" % (
+            (timeit.default_timer() - start) * 1e3, len(run.fills))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
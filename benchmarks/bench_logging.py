@@ -0,0 +1,85 @@
+"""
+Measures what logging costs trade() per tick: with debug switched
+off, with the debug log of every tick written to a file in the
+trading loop, and written through the queue of trading/logqueue.py.
+Also measures a disabled logger.debug() call, which trade() made for
+every tick before the levels were checked once at its start.
+Run with python -m quantfxengine.benchmarks.bench_logging
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import timeit
+
+from quantfxengine.event.event import TickEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import MockPriceStream
+from quantfxengine.trading.logqueue import start_queue_logging
+from quantfxengine.trading.trading import trade
+
+
+class NoStrategy(object):
+    def calculate_signals(self, event):
+        pass
+
+
+def time_trade(ticks):
+    """
+    Seconds per tick which trade() needs for ticks
+    """
+    events = LocalEventQueue()
+    prices = MockPriceStream(events, threading.Event())
+    prices.newprice(1.24029, 1.24042)
+    portfolio = Portfolio(prices, events)
+    execution = MockExecution(events, prices)
+    def run():
+        events.extend(ticks)
+        events.put(None)
+        trade(events, NoStrategy(), portfolio, execution,
+            threading.Event())
+    return min(timeit.repeat(run, number=1, repeat=3)) / len(ticks)
+
+
+def main(number=100000):
+    ticks = [TickEvent("EUR_USD", "2015-02-14T10:30:00.649678Z",
+        1.24029, 1.24042)] * number
+    logger = logging.getLogger('quantfxengine.trading.trading')
+    logger.propagate = False
+    fd, log_file = tempfile.mkstemp(suffix='.log')
+    os.close(fd)
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    try:
+        logger.setLevel(logging.INFO)
+        print "trade(), debug off          %6.2f us per tick" % (
+            time_trade(ticks) * 1e6)
+        tick = ticks[0]
+        seconds = min(timeit.repeat(
+            lambda: logger.debug("recv new tick signal: %s", tick),
+            number=number, repeat=3)) / number
+        print "disabled logger.debug()     %6.2f us per call" % (
+            seconds * 1e6)
+        logger.setLevel(logging.DEBUG)
+        print "trade(), debug to file      %6.2f us per tick" % (
+            time_trade(ticks) * 1e6)
+        listener = start_queue_logging()
+        # the listener shares the GIL with the trading loop, so we
+        # count the time until it has written all records
+        start = timeit.default_timer()
+        seconds = time_trade(ticks)
+        listener.stop()
+        print "trade(), debug via queue    %6.2f us per tick" \
+            " (%6.2f us until written)" % (seconds * 1e6,
+            (timeit.default_timer() - start) / (3 * number) * 1e6)
+    finally:
+        handler.close()
+        os.remove(log_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Replays a recorded price stream through a local stub server and
+compares the old way of reading it, iter_lines(1) and json.loads on
+every line, with StreamingForexPrices_OANDA and its TickStreamDecoder.
+The stream consists of the ticks of test.csv with a heartbeat after
+every tenth tick, sent as one chunk per message like OANDA does.
+Run with python -m quantfxengine.benchmarks.bench_oanda_stream
+"""
+
+import os
+import csv
+import json
+import time
+import Queue
+import threading
+import BaseHTTPServer
+import SocketServer
+
+import requests
+
+from quantfxengine.event.event import TickEvent
+from quantfxengine.streaming.streaming import StreamingForexPrices_OANDA
+
+TICKFILE = os.path.join(os.path.dirname(__file__), '..', 'test.csv')
+
+
+def recorded_stream(csv_file, repeat):
+    """
+    Returns the messages of a price stream built from the ticks of
+    csv_file, which are repeated repeat times
+    """
+    messages = []
+    with open(csv_file, 'rb') as f:
+        rows = list(csv.reader(f))
+    for i in range(repeat):
+        for j, (instrument, timestamp, bid, ask) in enumerate(rows):
+            messages.append(
+                '{"tick":{"instrument":"%s","time":"%s","bid":%s,'
+                '"ask":%s}}\r\n' % (instrument, timestamp, bid, ask))
+            if j % 10 == 9:
+                messages.append(
+                    '{"heartbeat":{"time":"%s"}}\r\n' % timestamp)
+    return messages
+
+
+class StreamHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = 1
+        self.wfile.write(self.server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StreamServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, messages):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+            StreamHandler)
+        self.body = ''.join(
+            '%x\r\n%s\r\n' % (len(msg), msg) for msg in messages
+        ) + '0\r\n\r\n'
+        thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+
+
+def legacy_stream_to_queue(domain, instruments, events):
+    """
+    The stream_to_queue of StreamingForexPrices_OANDA before it used
+    TickStreamDecoder
+    """
+    response = requests.get("http://" + domain + "/v1/prices",
+        params={'instruments': ','.join(instruments)}, stream=True)
+    for line in response.iter_lines(1):
+        if line:
+            msg = json.loads(line)
+            if msg.has_key("instrument") or msg.has_key("tick"):
+                instrument = msg["tick"]["instrument"]
+                time = msg["tick"]["time"]
+                bid = msg["tick"]["bid"]
+                ask = msg["tick"]["ask"]
+                events.put(TickEvent(instrument, time, bid, ask))
+
+
+def decoder_stream_to_queue(domain, instruments, events):
+    prices = StreamingForexPrices_OANDA(domain, 'token', 0, instruments,
+        events, threading.Event(), secure=False)
+    prices.stream_to_queue()
+
+
+def main(repeat=10):
+    messages = recorded_stream(TICKFILE, repeat)
+    server = StreamServer(messages)
+    domain = '127.0.0.1:%d' % server.server_address[1]
+    for name, func in [
+        ('iter_lines(1)+json', legacy_stream_to_queue),
+        ('TickStreamDecoder', decoder_stream_to_queue),
+    ]:
+        events = Queue.Queue()
+        start = time.time()
+        func(domain, ["EUR_USD", "EUR_CHF"], events)
+        seconds = time.time() - start
+        ticks = events.qsize()
+        print "%-20s %8d ticks %8.3f s %10.0f ticks/s" % (
+            name, ticks, seconds, ticks / seconds)
+    server.shutdown()
+    server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures the portfolio on many instruments: the cost of a tick for an
+instrument with a position, with the running totals, compared with
+the old eager update of profit_perc, and the cost of getting the
+unrealized P&L and the exposure by walking all positions compared
+with reading the totals.
+Run with python -m quantfxengine.benchmarks.bench_portfolio
+"""
+
+import timeit
+import threading
+
+from quantfxengine.event.event import TickEvent, FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.marketstate import MarketState
+from quantfxengine.streaming.streaming import MockPriceStream
+
+
+def legacy_execute_tick_event(portfolio, tick_event):
+    """
+    execute_tick_event and update_position_price as they were before
+    the running totals, with the eager profit_perc
+    """
+    if tick_event.instrument in portfolio.positions:
+        pos = portfolio.positions[tick_event.instrument]
+        price = tick_event.bid if pos.side == 'LONG' else tick_event.ask
+        pos.cur_price = price
+        pos.profit_base = pos.calculate_profit_base()
+        pos.__dict__['legacy_profit_perc'] = pos.calculate_profit_perc()
+
+
+def walk_totals(portfolio):
+    unrealized_pnl = 0.0
+    gross_exposure = 0.0
+    net_exposure = 0.0
+    for ps in portfolio.positions.itervalues():
+        unrealized_pnl += ps.profit_base
+        gross_exposure += ps.exposure
+        if ps.side == "SHORT":
+            net_exposure -= ps.exposure
+        else:
+            net_exposure += ps.exposure
+    return unrealized_pnl, gross_exposure, net_exposure, \
+        gross_exposure / portfolio.leverage
+
+
+def read_totals(portfolio):
+    return portfolio.unrealized_pnl, portfolio.gross_exposure, \
+        portfolio.net_exposure, portfolio.margin_used
+
+
+def make_portfolio(instruments):
+    events = LocalEventQueue()
+    prices = MockPriceStream(events, threading.Event())
+    portfolio = Portfolio(prices, events, equity=1e9)
+    for i in range(instruments):
+        instrument = "I%03d" % i
+        prices.cur_prices[instrument] = MarketState(1.0, 1.0001)
+        side = "LONG" if i % 2 else "SHORT"
+        portfolio.execute_fill_event(
+            FillEvent(instrument, 1000, side, 1.00005))
+    return portfolio
+
+
+def main(instruments=500, number=200000):
+    portfolio = make_portfolio(instruments)
+    ticks = [TickEvent("I%03d" % i, "t", 1.0 + i * 1e-6, 1.0001)
+        for i in range(instruments)]
+    def run(update):
+        def ticks_loop():
+            for tick in ticks:
+                update(tick)
+        return min(timeit.repeat(ticks_loop, repeat=3,
+            number=number // instruments)) / number * 1e6
+    print "%d instruments with a position" % instruments
+    print "tick, eager profit_perc    %8.3f us" % run(
+        lambda tick: legacy_execute_tick_event(portfolio, tick))
+    print "tick, running totals       %8.3f us" % run(
+        portfolio.execute_tick_event)
+    for name, totals in [
+        ('totals, walk positions  ', walk_totals),
+        ('totals, running         ', read_totals),
+    ]:
+        seconds = min(timeit.repeat(lambda: totals(portfolio), repeat=3,
+            number=10000)) / 10000
+        print "%s %8.3f us" % (name, seconds * 1e6)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares Queue.Queue, ConflatingEventQueue and PriorityEventQueue:
+the cost of a put and a get in one thread, and the latency of fills
+while a price thread floods the queue with ticks faster than the
+trading loop can handle them.
+Run with python -m quantfxengine.benchmarks.bench_queues
+"""
+
+import Queue
+import threading
+import time
+import timeit
+
+from quantfxengine.event.event import TickEvent, FillEvent, monotonic
+from quantfxengine.event.eventqueue import ConflatingEventQueue, \
+    PriorityEventQueue
+
+QUEUES = [
+    ('Queue.Queue', Queue.Queue),
+    ('Conflating', ConflatingEventQueue),
+    ('Priority', PriorityEventQueue),
+    ('Priority+conflate', lambda: PriorityEventQueue(conflate=True)),
+]
+
+
+def put_get(make_queue, number):
+    events = make_queue()
+    tick = TickEvent("EUR_USD", "t", 1.0, 1.1)
+    put = events.put
+    get = events.get
+    def run():
+        for i in xrange(1000):
+            put(tick)
+            get()
+    return min(timeit.repeat(run, number=number // 1000, repeat=3))
+
+
+def fill_latency(make_queue, seconds, tick_interval, handle_time):
+    """
+    A price thread puts a tick every tick_interval seconds, a broker
+    thread puts a fill every 10ms and the trading loop needs
+    handle_time seconds per tick. Returns the sorted latencies of the
+    fills from their creation until the loop takes them and the
+    number of handled ticks.
+    """
+    events = make_queue()
+    stop = threading.Event()
+    def prices():
+        while not stop.is_set():
+            events.put(TickEvent("EUR_USD", "t", 1.0, 1.1))
+            time.sleep(tick_interval)
+    def broker():
+        while not stop.wait(0.01):
+            events.put(FillEvent("EUR_USD", 100, "LONG", 1.1))
+    threads = [threading.Thread(target=prices),
+        threading.Thread(target=broker)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    ticks = 0
+    end = monotonic() + seconds
+    while monotonic() < end:
+        event = events.get()
+        if event.__class__ is FillEvent:
+            latencies.append(monotonic() - event.created)
+        else:
+            ticks += 1
+            time.sleep(handle_time)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), ticks
+
+
+def main(number=100000, seconds=2.0):
+    for name, make_queue in QUEUES:
+        print "%-18s %6.2f us per put and get" % (
+            name, put_get(make_queue, number) / number * 1e6)
+    print "fills during a tick flood (tick every 0.1ms, 0.5ms per tick):"
+    for name, make_queue in QUEUES:
+        latencies, ticks = fill_latency(make_queue, seconds, 1e-4, 5e-4)
+        print "%-18s %4d fills p50: %8.2fms max: %8.2fms %6d ticks" % (
+            name, len(latencies), latencies[len(latencies) // 2] * 1e3,
+            latencies[-1] * 1e3, ticks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+The benchmark suite of the hot paths of the engine. Every benchmark
+handles a number of items, e.g. ticks, and reports the best of
+several runs as items per second:
+    csv_parse: read_csv_rows() on a csv-file
+    tick_events: construction of TickEvents
+    trade_dispatch: trade() on a queue of ticks with a strategy which
+        does nothing
+    portfolio_tick: Portfolio.execute_tick_event with 500 positions
+    portfolio_fill: Portfolio.execute_fill_event with 500 positions
+    oanda_decode: TickStreamDecoder on a recorded OANDA price stream
+    backtest_csv: backtest() with TestRandomStrategy on a csv-file
+    synthetic_generate: generation of synthetic ticks for 20
+        instruments
+    backtest_synthetic: backtest() with TestRandomStrategy on
+        synthetic ticks without a file
+The ticks are a random walk with a fixed seed, so every run measures
+the same data. The results can be written as JSON and compared with
+the results of an earlier version, the run fails if a benchmark got
+slower than the tolerance.
+Run with python -m quantfxengine.benchmarks.suite -o results.json
+and later with -b results.json to compare.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from quantfxengine.event.event import TickEvent, FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.strategy.strategy import TestRandomStrategy
+from quantfxengine.streaming.marketstate import MarketState
+from quantfxengine.streaming.streaming import MockPriceStream, \
+    StreamingPricesFromFile, read_csv_rows
+from quantfxengine.streaming.synthetic import SyntheticTicks, \
+    StreamingSyntheticPrices
+from quantfxengine.streaming.tickdecoder import TickStreamDecoder
+from quantfxengine.trading.backtest import backtest
+from quantfxengine.trading.trading import trade
+
+INSTRUMENTS = ["EUR_USD", "EUR_CHF", "GBP_USD", "USD_JPY"]
+
+# list of (name, function), the function takes the number of items
+# and the directory for data files and returns (run, items)
+BENCHMARKS = []
+
+
+def benchmark(function):
+    BENCHMARKS.append((function.__name__, function))
+    return function
+
+
+def random_walk_rows(n, seed=1):
+    """
+    Returns n rows (instrument, timestamp, bid, ask) of a random walk
+    of the prices of INSTRUMENTS, one tick every 100ms
+    """
+    rng = random.Random(seed)
+    bids = dict((instrument, 1.2) for instrument in INSTRUMENTS)
+    start = 1423909800
+    rows = []
+    for i in xrange(n):
+        instrument = rng.choice(INSTRUMENTS)
+        bid = bids[instrument] = bids[instrument] + rng.gauss(0, 1e-4)
+        seconds, tenths = divmod(i, 10)
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S',
+            time.gmtime(start + seconds)) + '.%06dZ' % (tenths * 100000)
+        rows.append((instrument, timestamp, round(bid, 5),
+            round(bid + 2e-4, 5)))
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write('%s,%s,%r,%r\n' % row)
+    return path
+
+
+def random_walk_csv(directory, n):
+    path = os.path.join(directory, 'ticks-%d.csv' % n)
+    if not os.path.exists(path):
+        write_csv(path, random_walk_rows(n))
+    return path
+
+
+class NoStrategy(object):
+    def calculate_signals(self, event):
+        pass
+
+
+@benchmark
+def csv_parse(n, directory):
+    csv_file = random_walk_csv(directory, n)
+    def run():
+        for row in read_csv_rows(csv_file):
+            pass
+    return run, n
+
+
+@benchmark
+def tick_events(n, directory):
+    rows = random_walk_rows(1000)
+    def run():
+        for i in xrange(n // len(rows)):
+            for instrument, timestamp, bid, ask in rows:
+                TickEvent(instrument, timestamp, bid, ask)
+    return run, n // len(rows) * len(rows)
+
+
+@benchmark
+def trade_dispatch(n, directory):
+    ticks = [TickEvent(*row) for row in random_walk_rows(n)]
+    events = LocalEventQueue()
+    prices = MockPriceStream(events, threading.Event())
+    portfolio = Portfolio(prices, events)
+    execution = MockExecution(events, prices)
+    def run():
+        events.extend(ticks)
+        events.put(None)
+        trade(events, NoStrategy(), portfolio, execution,
+            threading.Event())
+    return run, n
+
+
+def many_positions(positions=500):
+    events = LocalEventQueue()
+    prices = MockPriceStream(events, threading.Event())
+    portfolio = Portfolio(prices, events, equity=1e9)
+    for i in range(positions):
+        instrument = "I%03d" % i
+        prices.cur_prices[instrument] = MarketState(1.0, 1.0001)
+        portfolio.execute_fill_event(FillEvent(instrument, 1000,
+            "LONG" if i % 2 else "SHORT", 1.00005))
+    return portfolio
+
+
+@benchmark
+def portfolio_tick(n, directory):
+    portfolio = many_positions()
+    ticks = [TickEvent("I%03d" % (i % 500), "t", 1.0 + i * 1e-7, 1.0001)
+        for i in xrange(n)]
+    execute_tick_event = portfolio.execute_tick_event
+    def run():
+        for tick in ticks:
+            execute_tick_event(tick)
+    return run, n
+
+
+@benchmark
+def portfolio_fill(n, directory):
+    portfolio = many_positions()
+    # adds to a position and takes the units away again
+    fills = [FillEvent("I%03d" % (i // 2 % 500), 10,
+        ("LONG", "SHORT")[(i // 2 % 500 + i) % 2], 1.00005)
+        for i in xrange(n // 2 * 2)]
+    execute_fill_event = portfolio.execute_fill_event
+    def run():
+        for fill in fills:
+            execute_fill_event(fill)
+    return run, len(fills)
+
+
+@benchmark
+def oanda_decode(n, directory):
+    chunks = []
+    for i, (instrument, timestamp, bid, ask) in enumerate(
+            random_walk_rows(n)):
+        chunks.append(
+            '{"tick":{"instrument":"%s","time":"%s","bid":%r,'
+            '"ask":%r}}\r\n' % (instrument, timestamp, bid, ask))
+        if i % 10 == 9:
+            chunks.append('{"heartbeat":{"time":"%s"}}\r\n' % timestamp)
+    def run():
+        feed = TickStreamDecoder().feed
+        for chunk in chunks:
+            feed(chunk)
+    return run, n
+
+
+@benchmark
+def backtest_csv(n, directory):
+    csv_file = random_walk_csv(directory, n)
+    def run():
+        events = LocalEventQueue()
+        prices = StreamingPricesFromFile(csv_file, events,
+            threading.Event())
+        portfolio = Portfolio(prices, events)
+        backtest(prices, events, TestRandomStrategy(events), portfolio,
+            MockExecution(events, prices))
+    return run, n
+
+
+@benchmark
+def synthetic_generate(n, directory):
+    def run():
+        for chunk in SyntheticTicks(20, seed=1).iter_chunks(n):
+            pass
+    return run, n
+
+
+@benchmark
+def backtest_synthetic(n, directory):
+    def run():
+        events = LocalEventQueue()
+        prices = StreamingSyntheticPrices(SyntheticTicks(4, seed=1), n,
+            events, threading.Event())
+        portfolio = Portfolio(prices, events)
+        backtest(prices, events, TestRandomStrategy(events), portfolio,
+            MockExecution(events, prices))
+    return run, n
+
+
+def measure(run, items, repeat):
+    """
+    Returns the items per second of the fastest of repeat runs
+    """
+    return items / min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names=None, n=100000, repeat=5, output=sys.stdout):
+    """
+    Runs the benchmarks given by names, all if None, with n items and
+    returns the results as a dict. Raises ValueError for an unknown
+    name.
+    """
+    unknown = set(names or []) - set(name for name, function in BENCHMARKS)
+    if unknown:
+        raise ValueError("Unknown benchmarks: %s" % ', '.join(
+            sorted(unknown)))
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'items': n,
+        'benchmarks': {},
+    }
+    directory = tempfile.mkdtemp()
+    # the trading loop logs every fill
+    logging.disable(logging.INFO)
+    try:
+        for name, function in BENCHMARKS:
+            if names and name not in names:
+                continue
+            run, items = function(n, directory)
+            per_second = measure(run, items, repeat)
+            results['benchmarks'][name] = {'per_second': per_second}
+            output.write("%-16s %12.0f per second\n" % (name, per_second))
+    finally:
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(directory)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of (name, per_second, baseline per_second) of the
+    benchmarks which are more than tolerance slower than the baseline
+    """
+    regressions = []
+    for name, result in sorted(results['benchmarks'].iteritems()):
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            continue
+        if result['per_second'] < base['per_second'] * (1.0 - tolerance):
+            regressions.append((name, result['per_second'],
+                base['per_second']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the hot paths of quantfxengine")
+    parser.add_argument('-o', '--output',
+        help="write the results as JSON to this file")
+    parser.add_argument('-b', '--baseline',
+        help="compare with the results in this JSON file")
+    parser.add_argument('-t', '--tolerance', type=float, default=0.1,
+        help="fail if a benchmark is slower than the baseline by more "
+            "than this fraction, default 0.1")
+    parser.add_argument('-n', '--items', type=int, default=100000,
+        help="number of ticks per benchmark, default 100000")
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+        help="runs per benchmark, the fastest counts, default 5")
+    parser.add_argument('names', nargs='*',
+        help="benchmarks to run, default all: %s" %
+            ', '.join(name for name, function in BENCHMARKS))
+    args = parser.parse_args(argv)
+    known = [name for name, function in BENCHMARKS]
+    unknown = [name for name in args.names if name not in known]
+    if unknown:
+        # a typo must not pass the regression check
+        parser.error("unknown benchmarks: %s" % ', '.join(unknown))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['items'] != args.items:
+            print "The baseline was measured with %d items, not %d, the " \
+                "results are not comparable" % (baseline['items'],
+                    args.items)
+            return 1
+    results = run_suite(args.names, args.items, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, per_second, base in regressions:
+            print "REGRESSION %-16s %12.0f per second, was %12.0f" % (
+                name, per_second, base)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
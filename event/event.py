@@ -1,5 +1,20 @@
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2 has no monotonic clock
+    from time import time as monotonic
+
+
 class Event(object):
-    pass
+    """
+    Base class of all events. The events use __slots__, since we
+    create one per tick, and keep their type as a class attribute.
+    Attributes:
+        created: monotonic() when the event was created
+        dispatched: monotonic() when the trading loop took the event
+            from the queue, if it is instrumented, else None
+    """
+    __slots__ = ('created', 'dispatched')
 
 
 class TickEvent(Event):
@@ -11,8 +26,12 @@ class TickEvent(Event):
         bid: Bid price
         ask: Ask price
     """
+    __slots__ = ('instrument', 'time', 'bid', 'ask')
+    type = 'TICK'
+
     def __init__(self, instrument, time, bid, ask):
-        self.type = 'TICK'
+        self.created = monotonic()
+        self.dispatched = None
         self.instrument = instrument
         self.time = time
         self.bid = bid
@@ -37,9 +56,15 @@ class SignalEvent(Event):
         instrument: e.g. EUR_USD
         order_type: 'market' or 'limit'
         side: 'LONG' or 'SHORT'
+        origin: created of the TickEvent which caused this event
     """
-    def __init__(self, instrument, order_type, side):
-        self.type = 'SIGNAL'
+    __slots__ = ('instrument', 'order_type', 'side', 'origin')
+    type = 'SIGNAL'
+
+    def __init__(self, instrument, order_type, side, origin=None):
+        self.created = monotonic()
+        self.dispatched = None
+        self.origin = origin
         self.instrument = instrument
         self.order_type = order_type
         self.side = side
@@ -62,9 +87,15 @@ class OrderEvent(Event):
         units: How much we want to buy/sell
         order_type: 'market' or 'limit'
         side: 'buy' or 'sell'
+        origin: created of the TickEvent which caused this event
     """
-    def __init__(self, instrument, units, order_type, side):
-        self.type = 'ORDER'
+    __slots__ = ('instrument', 'units', 'order_type', 'side', 'origin')
+    type = 'ORDER'
+
+    def __init__(self, instrument, units, order_type, side, origin=None):
+        self.created = monotonic()
+        self.dispatched = None
+        self.origin = origin
         self.instrument = instrument
         self.units = units
         self.order_type = order_type
@@ -89,9 +120,15 @@ class FillEvent(Event):
         units: How much we have bought/sold
         side: 'LONG' or 'SHORT'
         price: the price for which the instrument was bought/sold
+        origin: created of the TickEvent which caused this event
     """
-    def __init__(self, instrument, units, side, price):
-        self.type = 'FILL'
+    __slots__ = ('instrument', 'units', 'side', 'price', 'origin')
+    type = 'FILL'
+
+    def __init__(self, instrument, units, side, price, origin=None):
+        self.created = monotonic()
+        self.dispatched = None
+        self.origin = origin
         self.instrument = instrument
         self.units = units
         self.side = side
@@ -106,3 +143,69 @@ class FillEvent(Event):
 
     def __repr__(self):
         return str(self)
+
+
+class BarEvent(Event):
+    """
+    Events with the bid and ask prices of an instrument aggregated
+    over an interval, e.g. by a BarAggregator. bid and ask are the
+    closing prices, so that a bar can be handled like a tick.
+    Attributes:
+        instrument: e.g. EUR_USD
+        time: start of the bar in the format of the timestamps of the
+            ticks
+        interval: length of the bar in seconds
+        open_bid, high_bid, low_bid, close_bid: bid prices
+        open_ask, high_ask, low_ask, close_ask: ask prices
+        ticks: number of ticks in the bar
+        origin: created of the TickEvent which closed the bar
+    """
+    __slots__ = ('instrument', 'time', 'interval',
+        'open_bid', 'high_bid', 'low_bid', 'close_bid',
+        'open_ask', 'high_ask', 'low_ask', 'close_ask',
+        'ticks', 'origin')
+    type = 'BAR'
+
+    def __init__(
+        self, instrument, time, interval,
+        open_bid, high_bid, low_bid, close_bid,
+        open_ask, high_ask, low_ask, close_ask,
+        ticks, origin=None
+    ):
+        self.created = monotonic()
+        self.dispatched = None
+        self.origin = origin
+        self.instrument = instrument
+        self.time = time
+        self.interval = interval
+        self.open_bid = open_bid
+        self.high_bid = high_bid
+        self.low_bid = low_bid
+        self.close_bid = close_bid
+        self.open_ask = open_ask
+        self.high_ask = high_ask
+        self.low_ask = low_ask
+        self.close_ask = close_ask
+        self.ticks = ticks
+
+    @property
+    def bid(self):
+        return self.close_bid
+
+    @property
+    def ask(self):
+        return self.close_ask
+
+    def __str__(self):
+        return "type: "+ str(self.type)+ \
+            ", instrument: "+ str(self.instrument)+ \
+            ", time: "+ str(self.time)+ \
+            ", interval: "+ str(self.interval)+ \
+            ", bid: "+ str((self.open_bid, self.high_bid,
+                self.low_bid, self.close_bid))+ \
+            ", ask: "+ str((self.open_ask, self.high_ask,
+                self.low_ask, self.close_ask))+ \
+            ", ticks: "+ str(self.ticks)
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,135 @@
+import Queue
+from collections import deque
+
+from quantfxengine.event.event import TickEvent, SignalEvent, OrderEvent, \
+    FillEvent
+
+
+class LocalEventQueue(deque):
+    """
+    An event queue for components which all live in the same thread,
+    e.g. in the synchronous backtest. It offers the methods of
+    Queue.Queue which the engine uses, but without any locking.
+    """
+    put = deque.append
+    put_nowait = deque.append
+
+    def get(self, block=True, timeout=None):
+        try:
+            return self.popleft()
+        except IndexError:
+            raise Queue.Empty
+
+    def get_nowait(self):
+        return self.get(False)
+
+    def empty(self):
+        return not self
+
+    def qsize(self):
+        return len(self)
+
+
+class ConflatingEventQueue(Queue.Queue):
+    """
+    A Queue.Queue which keeps only the newest pending TickEvent of
+    every instrument. When a tick is put while an older tick of the
+    same instrument is still waiting, the newer one takes its place in
+    the queue, so a slow trading loop gets the current prices instead
+    of working through stale ones. The instrument keeps its place, so
+    a busy instrument cannot push a quieter one back. All other
+    events, and None, are never dropped and keep their order relative
+    to each other. A newer tick is handed out at the place of the
+    older one, i.e. before the events which were put between the two,
+    e.g. tick, FILL, tick gives the second tick before the FILL. Such a
+    tick also fits into a full queue.
+    The ticks sit in slots, lists with one element, so that a newer
+    tick only has to replace the element.
+    Attributes:
+        conflated: number of dropped ticks
+        conflate: if False, no ticks are dropped
+    """
+    conflate = True
+
+    def _init(self, maxsize):
+        self.queue = deque()
+        self.ticks = {}
+        self.size = 0
+        self.conflated = 0
+
+    def _qsize(self, len=len):
+        return self.size
+
+    def put(self, event, block=True, timeout=None):
+        # a tick which only replaces a waiting one fits into a full
+        # queue
+        if event.__class__ is TickEvent and self.conflate:
+            with self.mutex:
+                slot = self.ticks.get(event.instrument)
+                if slot is not None:
+                    slot[0] = event
+                    self.conflated += 1
+                    return
+        Queue.Queue.put(self, event, block, timeout)
+
+    def _put(self, event):
+        if event.__class__ is TickEvent and self.conflate:
+            slot = self.ticks.get(event.instrument)
+            if slot is not None:
+                slot[0] = event
+                self.conflated += 1
+                # the dropped tick will never be taken by get()
+                self.unfinished_tasks -= 1
+                return
+            slot = [event]
+            self.ticks[event.instrument] = slot
+            self.queue.append(slot)
+        else:
+            self.queue.append(event)
+        self.size += 1
+
+    def _get(self):
+        item = self.queue.popleft()
+        if item.__class__ is list:
+            item = item[0]
+            del self.ticks[item.instrument]
+        self.size -= 1
+        return item
+
+
+class PriorityEventQueue(ConflatingEventQueue):
+    """
+    An event queue which hands out FILL before ORDER before SIGNAL
+    events before all others, e.g. ticks, bars and None, and every
+    class in the order in which it was put. So fills and orders do
+    not wait behind a backlog of ticks and the portfolio knows its
+    positions as soon as possible. Each of the three classes has its
+    own deque, the other events are queued as in ConflatingEventQueue,
+    so stale ticks are dropped if conflate is True.
+    Attributes:
+        lanes: the deques of FILL, ORDER and SIGNAL events
+    """
+    lane_of = {FillEvent: 0, OrderEvent: 1, SignalEvent: 2}
+
+    def __init__(self, maxsize=0, conflate=False):
+        self.conflate = conflate
+        ConflatingEventQueue.__init__(self, maxsize)
+
+    def _init(self, maxsize):
+        ConflatingEventQueue._init(self, maxsize)
+        self.lanes = (deque(), deque(), deque())
+
+    def _put(self, event):
+        lane = self.lane_of.get(event.__class__)
+        if lane is None:
+            ConflatingEventQueue._put(self, event)
+        else:
+            self.lanes[lane].append(event)
+            self.size += 1
+
+    def _get(self):
+        for lane in self.lanes:
+            if lane:
+                self.size -= 1
+                return lane.popleft()
+        return ConflatingEventQueue._get(self)
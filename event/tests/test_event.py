@@ -0,0 +1,31 @@
+import unittest
+
+from quantfxengine.event.event import *
+
+class Test_Events(unittest.TestCase):
+    """
+    Unit tests for the events
+    """
+    def test_types(self):
+        self.assertEqual(TickEvent("EUR_USD", "t", 1.0, 1.1).type, 'TICK')
+        self.assertEqual(SignalEvent("EUR_USD", "market", "buy").type,
+            'SIGNAL')
+        self.assertEqual(OrderEvent("EUR_USD", 1, "market", "buy").type,
+            'ORDER')
+        self.assertEqual(FillEvent("EUR_USD", 1, "LONG", 1.1).type, 'FILL')
+
+    def test_slots(self):
+        """
+        events have no attribute dictionary
+        """
+        event = TickEvent("EUR_USD", "t", 1.0, 1.1)
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertRaises(AttributeError, setattr, event, 'foo', 1)
+
+    def test_str(self):
+        self.assertEqual(str(FillEvent("EUR_USD", 1, "LONG", 1.1)),
+            "type: FILL, instrument: EUR_USD, units: 1, side: LONG, "
+            "price: 1.1")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import Queue
+
+from quantfxengine.event.event import TickEvent, SignalEvent, OrderEvent, \
+    FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue, \
+    ConflatingEventQueue, PriorityEventQueue
+
+class Test_LocalEventQueue(unittest.TestCase):
+    """
+    Unit tests for the class LocalEventQueue
+    """
+    def test_fifo(self):
+        events = LocalEventQueue()
+        events.put(1)
+        events.put(2)
+        self.assertEqual(events.qsize(), 2)
+        self.assertEqual(events.get(), 1)
+        self.assertEqual(events.get(), 2)
+        self.assertTrue(events.empty())
+
+    def test_get_empty(self):
+        events = LocalEventQueue()
+        self.assertRaises(Queue.Empty, events.get)
+
+
+class Test_ConflatingEventQueue(unittest.TestCase):
+    """
+    Unit tests for the class ConflatingEventQueue
+    """
+    def test_conflate(self):
+        events = ConflatingEventQueue()
+        old = TickEvent("EUR_USD", "t1", 1.0, 1.1)
+        fill = FillEvent("EUR_USD", 100, "LONG", 1.1)
+        chf = TickEvent("EUR_CHF", "t1", 1.2, 1.3)
+        new = TickEvent("EUR_USD", "t2", 1.4, 1.5)
+        for event in [old, fill, chf, None, new]:
+            events.put(event)
+        self.assertEqual(events.qsize(), 4)
+        self.assertEqual(events.conflated, 1)
+        # the newest tick takes the place of the old one
+        self.assertEqual([events.get() for i in range(4)],
+            [new, fill, chf, None])
+        self.assertTrue(events.empty())
+        self.assertRaises(Queue.Empty, events.get_nowait)
+        # a tick which has been taken is not replaced
+        events.put(old)
+        events.get()
+        events.put(new)
+        self.assertEqual(events.get(), new)
+        self.assertEqual(events.conflated, 1)
+
+    def test_tick_fill_tick(self):
+        """
+        the newer tick takes the place of the older one before the fill
+        """
+        events = ConflatingEventQueue()
+        old = TickEvent("EUR_USD", "t1", 1.0, 1.1)
+        fill = FillEvent("EUR_USD", 100, "LONG", 1.1)
+        new = TickEvent("EUR_USD", "t2", 1.4, 1.5)
+        for event in [old, fill, new]:
+            events.put(event)
+        self.assertEqual([events.get() for i in range(2)], [new, fill])
+        self.assertTrue(events.empty())
+
+    def test_full(self):
+        """
+        a tick which replaces a waiting one fits into a full queue
+        """
+        events = ConflatingEventQueue(1)
+        events.put_nowait(TickEvent("EUR_USD", "t1", 1.0, 1.1))
+        new = TickEvent("EUR_USD", "t2", 1.4, 1.5)
+        events.put_nowait(new)
+        self.assertRaises(Queue.Full, events.put_nowait,
+            TickEvent("EUR_CHF", "t1", 1.2, 1.3))
+        self.assertEqual(events.conflated, 1)
+        self.assertEqual(events.get(), new)
+        self.assertTrue(events.empty())
+
+    def test_many_ticks(self):
+        events = ConflatingEventQueue()
+        for i in range(3000):
+            events.put(TickEvent("EUR_USD", i, 1.0, 1.1))
+        self.assertEqual(len(events.queue), 1)
+        self.assertEqual(events.qsize(), 1)
+        self.assertEqual(events.get().time, 2999)
+        # join() does not wait for the dropped ticks
+        events.task_done()
+        events.join()
+
+
+    def test_fair(self):
+        """
+        a busy instrument does not starve a quiet one
+        """
+        events = ConflatingEventQueue()
+        events.put(TickEvent("EUR_USD", 0, 1.0, 1.1))
+        events.put(TickEvent("EUR_CHF", 0, 1.2, 1.3))
+        got = {"EUR_USD": 0, "EUR_CHF": 0}
+        for i in range(10000):
+            got[events.get().instrument] += 1
+            events.put(TickEvent("EUR_USD", i, 1.0, 1.1))
+            events.put(TickEvent("EUR_CHF", i, 1.2, 1.3))
+        self.assertEqual(got, {"EUR_USD": 5000, "EUR_CHF": 5000})
+        self.assertEqual(events.qsize(), 2)
+
+
+class Test_PriorityEventQueue(unittest.TestCase):
+    """
+    Unit tests for the class PriorityEventQueue
+    """
+    def setUp(self):
+        self.ticks = [TickEvent("EUR_USD", i, 1.0, 1.1) for i in range(3)]
+        self.signal = SignalEvent("EUR_USD", "market", "buy")
+        self.orders = [OrderEvent("EUR_USD", i, "market", "buy")
+            for i in range(2)]
+        self.fill = FillEvent("EUR_USD", 100, "LONG", 1.1)
+        self.put_all = [self.ticks[0], self.signal, self.ticks[1],
+            self.orders[0], None, self.fill, self.orders[1], self.ticks[2]]
+
+    def get_all(self, events):
+        return [events.get_nowait() for i in range(events.qsize())]
+
+    def test_priority(self):
+        events = PriorityEventQueue()
+        for event in self.put_all:
+            events.put(event)
+        self.assertEqual(events.qsize(), 8)
+        self.assertEqual(self.get_all(events), [self.fill] + self.orders +
+            [self.signal, self.ticks[0], self.ticks[1], None, self.ticks[2]])
+        self.assertTrue(events.empty())
+
+    def test_conflate(self):
+        events = PriorityEventQueue(conflate=True)
+        for event in self.put_all:
+            events.put(event)
+        self.assertEqual(self.get_all(events), [self.fill] + self.orders +
+            [self.signal, self.ticks[2], None])
+        self.assertEqual(events.conflated, 2)
+
+    def test_conflate_fair(self):
+        """
+        both instruments get through, fills and orders first
+        """
+        events = PriorityEventQueue(conflate=True)
+        events.put(TickEvent("EUR_USD", 0, 1.0, 1.1))
+        events.put(TickEvent("EUR_CHF", 0, 1.2, 1.3))
+        got = {"EUR_USD": 0, "EUR_CHF": 0}
+        for i in range(1000):
+            event = events.get()
+            if event.__class__ is TickEvent:
+                got[event.instrument] += 1
+            events.put(TickEvent("EUR_USD", i, 1.0, 1.1))
+            events.put(TickEvent("EUR_CHF", i, 1.2, 1.3))
+            if i % 10 == 0:
+                events.put(self.orders[0])
+                events.put(self.fill)
+                self.assertIs(events.get(), self.fill)
+                self.assertIs(events.get(), self.orders[0])
+        self.assertEqual(got, {"EUR_USD": 500, "EUR_CHF": 500})
+
+if __name__ == '__main__':
+    unittest.main()
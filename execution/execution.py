@@ -1,11 +1,15 @@
 import httplib
+import socket
 import urllib
 import Queue
 import json
 import logging
+import threading
+import time
 
 from abc import ABCMeta, abstractmethod
 from quantfxengine.event.event import FillEvent
+from quantfxengine.execution.httppool import HTTPConnectionPool
 from quantfxengine.streaming.streaming import StreamingPricesFromFile
 
 class AbstractExecution(object):
@@ -14,6 +18,9 @@ class AbstractExecution(object):
     Methods:
         execute_order(order_event): takes an order_event and executes
             it
+        has_pending_order(instrument): True if an order for the
+            instrument has been taken but is not finished yet
+        wait_until_done(): blocks until all orders are finished
     Attributes:
         event_queue: An event queue where we put FillEvents for
             successfull orders
@@ -24,17 +31,46 @@ class AbstractExecution(object):
     def execute_order(self,order_event):
         raise NotImplementedError("Need to implement execute_order!")
 
+    def has_pending_order(self, instrument):
+        # execute_order is synchronous unless overridden
+        return False
+
+    def wait_until_done(self):
+        pass
+
 class ExecutionAtOANDA(AbstractExecution):
-    def __init__(self, domain, access_token, account_id, event_queue):
+    """
+    Executes orders at OANDA over a pool of keep-alive connections,
+    see HTTPConnectionPool. execute_order may be called from several
+    threads, so that up to pool_size orders are in flight at the same
+    time.
+    Attributes:
+        pool_size: number of connections
+        timeout: timeout of an order request in seconds
+        retries: how often an order is repeated if it could not be
+            sent
+        secure: use https, only switched off for testing
+    """
+    def __init__(
+        self, domain, access_token, account_id, event_queue,
+        pool_size=4, timeout=10.0, retries=2, secure=True
+    ):
         self.domain = domain
         self.access_token = access_token
         self.account_id = account_id
-        self.conn = self.obtain_connection()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.secure = secure
+        self.pool = self.obtain_connection_pool()
         self.event_queue = event_queue
         self.logger = logging.getLogger(__name__)
 
-    def obtain_connection(self):
-        return httplib.HTTPSConnection(self.domain)
+    def obtain_connection_pool(self):
+        return HTTPConnectionPool(
+            self.domain, secure=self.secure, maxsize=self.pool_size,
+            timeout=self.timeout, retries=self.retries
+        )
 
     def execute_order(self, order_event):
         headers = {
@@ -47,12 +83,18 @@ class ExecutionAtOANDA(AbstractExecution):
             "type" : order_event.order_type,
             "side" : order_event.side
         })
-        self.conn.request(
-            "POST",
-            "/v1/accounts/%s/orders" % str(self.account_id),
-            params, headers
-        )
-        response = self.conn.getresponse().read()
+        try:
+            status, response = self.pool.request(
+                "POST",
+                "/v1/accounts/%s/orders" % str(self.account_id),
+                params, headers
+            )
+        except (socket.error, httplib.HTTPException) as e:
+            self.logger.critical("Caught exception when sending order %s: %s\n", order_event, repr(e))
+            return
+        if status != 200 and status != 201:
+            self.logger.error("Order %s failed with status %d: %s", order_event, status, response)
+            return
         if response:
             try:
                 msg = json.loads(response)
@@ -67,9 +109,11 @@ class ExecutionAtOANDA(AbstractExecution):
                     units = msg["tradeOpened"]["units"]
                     side = msg["tradeOpened"]["side"]
                     if side == "buy":
-                        fevent = FillEvent(instrument, units, "LONG", price)
+                        fevent = FillEvent(instrument, units, "LONG", price,
+                            origin=order_event.origin)
                     elif side == "sell":
-                        fevent = FillEvent(instrument, units, "SHORT", price)
+                        fevent = FillEvent(instrument, units, "SHORT", price,
+                            origin=order_event.origin)
                     else:
                         raise ValueError("side should be 'buy' or 'sell' "\
                                 "but is %s", side)
@@ -79,9 +123,11 @@ class ExecutionAtOANDA(AbstractExecution):
                         units = close["units"]
                         side = close["side"]
                         if side == "buy":
-                            fevent = FillEvent(instrument, units, "LONG", price)
+                            fevent = FillEvent(instrument, units, "LONG", price,
+                                origin=order_event.origin)
                         elif side == "sell":
-                            fevent = FillEvent(instrument, units, "SHORT", price)
+                            fevent = FillEvent(instrument, units, "SHORT", price,
+                                origin=order_event.origin)
                         else:
                             raise ValueError("side should be 'buy' or 'sell' "\
                                 "but is %s", side)
@@ -104,11 +150,98 @@ class MockExecution(AbstractExecution):
         self.logger.debug("Would have executed: %s ", order_event)
         if side == "buy":
             price = self.ticker.cur_prices[instrument].ask
-            fevent = FillEvent(instrument, units, "LONG", price)
+            fevent = FillEvent(instrument, units, "LONG", price,
+                origin=order_event.origin)
         elif side == "sell":
             price = self.ticker.cur_prices[instrument].bid
-            fevent = FillEvent(instrument, units, "SHORT", price)
+            fevent = FillEvent(instrument, units, "SHORT", price,
+                origin=order_event.origin)
         else:
             raise ValueError("side should be 'buy' or 'sell' "\
                     "but is %s", side)
         self.event_queue.put(fevent)
+
+
+class AsyncExecution(AbstractExecution):
+    """
+    Executes the orders of another execution handler on worker
+    threads, so that the trading loop never waits for the broker.
+    The wrapped execution puts the FillEvents into the events queue
+    once the answer of the broker has arrived.
+    An order counts as pending until the wrapped execute_order has
+    returned, i.e. until its fills are in the queue. This gives the
+    Portfolio the same view as with a synchronous execution, where
+    the fills are in the queue as soon as the order has been handled.
+    Attributes:
+        execution: the wrapped AbstractExecution, e.g. ExecutionAtOANDA
+        workers: number of worker threads, should not be larger than
+            the number of connections of the wrapped execution
+        in_flight: a dictionary of instruments and their number of
+            pending orders
+    """
+    def __init__(self, execution, workers=4):
+        self.execution = execution
+        self.workers = workers
+        self.orders = Queue.Queue()
+        self.in_flight = {}
+        self.done = threading.Condition()
+        self.logger = logging.getLogger(__name__)
+        self.threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self.work)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def execute_order(self, order_event):
+        with self.done:
+            self.in_flight[order_event.instrument] = \
+                self.in_flight.get(order_event.instrument, 0) + 1
+        self.orders.put(order_event)
+
+    def has_pending_order(self, instrument):
+        return instrument in self.in_flight
+
+    def work(self):
+        while True:
+            order_event = self.orders.get()
+            if order_event is None:
+                break
+            try:
+                self.execution.execute_order(order_event)
+            except Exception as e:
+                self.logger.critical("Caught exception when executing order %s: %s\n", order_event, repr(e))
+            finally:
+                with self.done:
+                    instrument = order_event.instrument
+                    self.in_flight[instrument] -= 1
+                    if self.in_flight[instrument] == 0:
+                        del self.in_flight[instrument]
+                    self.done.notify_all()
+
+    def wait_until_done(self, timeout=None):
+        """
+        Blocks until no order is pending or timeout seconds have
+        passed. Returns True if no order is pending.
+        """
+        with self.done:
+            if timeout is None:
+                while self.in_flight:
+                    self.done.wait()
+            else:
+                deadline = time.time() + timeout
+                while self.in_flight:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.done.wait(remaining)
+            return not self.in_flight
+
+    def stop(self):
+        """
+        Stops the workers after the pending orders
+        """
+        for thread in self.threads:
+            self.orders.put(None)
+        for thread in self.threads:
+            thread.join()
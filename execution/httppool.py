@@ -0,0 +1,127 @@
+import httplib
+import socket
+import select
+import Queue
+import logging
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+
+def connection_dropped(conn):
+    """
+    Checks if the server has closed an idle keep-alive connection. An
+    idle connection should never be readable, so if it is, we either
+    got EOF or garbage and should not use it anymore.
+    """
+    if conn.sock is None:
+        return True
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (socket.error, select.error, ValueError):
+        return True
+
+
+class HTTPConnectionPool(object):
+    """
+    A thread-safe pool of keep-alive connections to one host.
+    At most maxsize requests are in flight at the same time, further
+    requests wait for a free connection. Connections which the server
+    has closed are replaced before they are used.
+    Attributes:
+        host: e.g. api-fxpractice.oanda.com, may contain a port
+        secure: use https if True, else http
+        maxsize: number of connections
+        timeout: default timeout of a request in seconds
+        retries: how often a failed request is repeated. Requests
+            which are not idempotent, e.g. POSTing an order, are only
+            repeated if they could not be sent at all, so that we
+            never send an order twice.
+    """
+    def __init__(
+        self, host, secure=True, maxsize=4, timeout=10.0, retries=2
+    ):
+        self.host = host
+        self.secure = secure
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.retries = retries
+        self.pool = Queue.LifoQueue(maxsize)
+        for i in range(maxsize):
+            self.pool.put(None)
+        self.logger = logging.getLogger(__name__)
+
+    def new_connection(self, timeout):
+        if self.secure:
+            return httplib.HTTPSConnection(self.host, timeout=timeout)
+        return httplib.HTTPConnection(self.host, timeout=timeout)
+
+    def get_connection(self, timeout):
+        conn = self.pool.get()
+        if conn is not None and connection_dropped(conn):
+            self.logger.debug("Server closed idle connection to %s",
+                self.host)
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self.new_connection(timeout)
+            conn.connect()
+        elif conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def request(
+        self, method, url, body=None, headers={}, timeout=None,
+        idempotent=None
+    ):
+        """
+        Sends a request and returns the status and the body of the
+        response. Raises the last socket.error or
+        httplib.HTTPException if all retries failed.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            conn = None
+            sent = False
+            try:
+                conn = self.get_connection(timeout)
+                conn.request(method, url, body, headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+                if response.will_close:
+                    conn.close()
+                self.pool.put(conn)
+                return response.status, data
+            except (socket.error, httplib.HTTPException) as e:
+                if conn is not None:
+                    conn.close()
+                self.pool.put(None)
+                if attempt >= self.retries or (sent and not idempotent):
+                    raise
+                attempt += 1
+                self.logger.warning("Retrying %s %s after %s",
+                    method, url, repr(e))
+            except:
+                if conn is not None:
+                    conn.close()
+                self.pool.put(None)
+                raise
+
+    def close(self):
+        """
+        Closes all idle connections
+        """
+        conns = []
+        while True:
+            try:
+                conns.append(self.pool.get_nowait())
+            except Queue.Empty:
+                break
+        for conn in conns:
+            if conn is not None:
+                conn.close()
+            self.pool.put(None)
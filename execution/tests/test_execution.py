@@ -0,0 +1,228 @@
+import unittest
+import threading
+import BaseHTTPServer
+import SocketServer
+import Queue
+import httplib
+import json
+import time
+
+from quantfxengine.event.event import OrderEvent, FillEvent
+from quantfxengine.execution.execution import ExecutionAtOANDA, \
+    AsyncExecution
+from quantfxengine.execution.httppool import HTTPConnectionPool
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers every request with the next response of the server, a
+    tuple (delay, status, body). A status of None closes the
+    connection without an answer.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def handle_request(self):
+        length = int(self.headers.getheader('Content-Length') or 0)
+        self.server.requests.append(
+            (self.command, self.path, self.rfile.read(length)))
+        delay, status, body = self.server.responses.pop(0)
+        time.sleep(delay)
+        if status is None:
+            self.close_connection = 1
+            return
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, responses):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+            StubHandler)
+        self.responses = responses
+        self.requests = []
+        self.connections = 0
+        self.thread = threading.Thread(target=self.serve_forever,
+            args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def host(self):
+        return '127.0.0.1:%d' % self.server_address[1]
+
+    def handle_error(self, request, client_address):
+        # the client has given up, e.g. after a timeout
+        pass
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class Test_HTTPConnectionPool(unittest.TestCase):
+    """
+    Unit tests for the class HTTPConnectionPool against a local stub
+    server
+    """
+    def start_server(self, responses):
+        server = StubServer(responses)
+        self.addCleanup(server.stop)
+        return server
+
+    def test_keep_alive(self):
+        server = self.start_server([(0, 200, 'a'), (0, 200, 'b')])
+        pool = HTTPConnectionPool(server.host, secure=False, maxsize=1)
+        self.assertEqual(pool.request('GET', '/'), (200, 'a'))
+        self.assertEqual(pool.request('GET', '/'), (200, 'b'))
+        self.assertEqual(server.connections, 1)
+
+    def test_reconnect_after_close(self):
+        """
+        a connection closed by the server is replaced before the next
+        request, even for requests which are not idempotent
+        """
+        server = self.start_server([(0, 200, 'a'), (0, 200, 'b')])
+        pool = HTTPConnectionPool(server.host, secure=False, maxsize=1,
+            retries=0)
+        self.assertEqual(pool.request('POST', '/', 'x'), (200, 'a'))
+        # make the idle connection readable at EOF, as if the server
+        # had closed it
+        conn = pool.pool.get()
+        conn.sock.shutdown(0)
+        pool.pool.put(conn)
+        self.assertEqual(pool.request('POST', '/', 'y'), (200, 'b'))
+        self.assertEqual(server.connections, 2)
+
+    def test_retry_idempotent(self):
+        server = self.start_server([(0, None, ''), (0, 200, 'a')])
+        pool = HTTPConnectionPool(server.host, secure=False)
+        self.assertEqual(pool.request('GET', '/'), (200, 'a'))
+        self.assertEqual(len(server.requests), 2)
+
+    def test_no_retry_after_post(self):
+        """
+        an order which reached the server is never sent twice
+        """
+        server = self.start_server([(0, None, ''), (0, 200, 'a')])
+        pool = HTTPConnectionPool(server.host, secure=False)
+        self.assertRaises(httplib.HTTPException,
+            pool.request, 'POST', '/', 'x')
+        self.assertEqual(len(server.requests), 1)
+
+    def test_timeout(self):
+        server = self.start_server([(0.5, 200, 'a')])
+        pool = HTTPConnectionPool(server.host, secure=False, retries=0)
+        self.assertRaises(Exception, pool.request, 'GET', '/',
+            timeout=0.1)
+
+    def test_parallel(self):
+        """
+        two slow requests run in parallel on two connections
+        """
+        server = self.start_server([(0.3, 200, 'a'), (0.3, 200, 'a')])
+        pool = HTTPConnectionPool(server.host, secure=False, maxsize=2)
+        threads = [threading.Thread(target=pool.request, args=('GET', '/'))
+            for i in range(2)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.time() - start, 0.55)
+        self.assertEqual(server.connections, 2)
+
+
+class Test_ExecutionAtOANDA(unittest.TestCase):
+    """
+    Unit tests for the class ExecutionAtOANDA against a local stub
+    server
+    """
+    def test_execute_order(self):
+        server = StubServer([(0, 200, json.dumps({
+            "instrument": "EUR_USD",
+            "price": 1.24042,
+            "tradeOpened": {"units": 100, "side": "buy"},
+        }))])
+        self.addCleanup(server.stop)
+        events = Queue.Queue()
+        execution = ExecutionAtOANDA(server.host, "token", 1234, events,
+            secure=False)
+        execution.execute_order(OrderEvent("EUR_USD", 100, "market", "buy"))
+        method, path, body = server.requests[0]
+        self.assertEqual((method, path), ("POST", "/v1/accounts/1234/orders"))
+        self.assertIn("instrument=EUR_USD", body)
+        fill = events.get_nowait()
+        self.assertEqual((fill.instrument, fill.units, fill.side, fill.price),
+            ("EUR_USD", 100, "LONG", 1.24042))
+
+    def test_failed_order(self):
+        server = StubServer([(0, 400, '{"code": 1}')])
+        self.addCleanup(server.stop)
+        events = Queue.Queue()
+        execution = ExecutionAtOANDA(server.host, "token", 1234, events,
+            secure=False)
+        execution.execute_order(OrderEvent("EUR_USD", 100, "market", "buy"))
+        self.assertTrue(events.empty())
+
+
+class SlowExecution(object):
+    """
+    Fills every order at 1.0 after waiting for the event go
+    """
+    def __init__(self, events):
+        self.events = events
+        self.go = threading.Event()
+
+    def execute_order(self, order_event):
+        self.go.wait()
+        self.events.put(FillEvent(order_event.instrument,
+            order_event.units, "LONG", 1.0))
+
+
+class Test_AsyncExecution(unittest.TestCase):
+    """
+    Unit tests for the class AsyncExecution
+    """
+    def setUp(self):
+        self.events = Queue.Queue()
+        self.slow = SlowExecution(self.events)
+        self.execution = AsyncExecution(self.slow, workers=2)
+        self.addCleanup(self.execution.stop)
+        self.addCleanup(self.slow.go.set)
+
+    def test_does_not_block(self):
+        self.execution.execute_order(
+            OrderEvent("EUR_USD", 100, "market", "buy"))
+        self.assertTrue(self.execution.has_pending_order("EUR_USD"))
+        self.assertFalse(self.execution.has_pending_order("EUR_CHF"))
+        self.assertFalse(self.execution.wait_until_done(0.05))
+        self.assertTrue(self.events.empty())
+        self.slow.go.set()
+        self.assertTrue(self.execution.wait_until_done(1))
+        self.assertFalse(self.execution.has_pending_order("EUR_USD"))
+        self.assertEqual(self.events.get_nowait().units, 100)
+
+    def test_parallel_orders(self):
+        for instrument in ["EUR_USD", "EUR_CHF"]:
+            self.execution.execute_order(
+                OrderEvent(instrument, 100, "market", "buy"))
+        self.slow.go.set()
+        self.execution.wait_until_done()
+        self.assertEqual(self.events.qsize(), 2)
+        self.assertEqual(self.execution.in_flight, {})
+
+if __name__ == '__main__':
+    unittest.main()
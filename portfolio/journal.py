@@ -0,0 +1,231 @@
+"""
+A journal records the orders, fills and equity of a run in a
+directory with the files
+    instruments.txt: the instrument names separated by newlines, the
+        position of a name is its instrument id
+    orders.bin, fills.bin, equity.bin: fixed-size little endian
+        records as given by ORDER_DTYPE, FILL_DTYPE and EQUITY_DTYPE
+The files are only appended to. time is the time of the last tick in
+nanoseconds since the epoch, 0 if there was none. side is 1 for buy
+and LONG and -1 for sell and SHORT.
+"""
+
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+from quantfxengine.streaming.streaming import timestamp_to_epoch_ns
+
+ORDER, FILL, EQUITY = range(3)
+
+ORDER_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('instrument_id', '<i4'),
+    ('side', 'i1'),
+    ('order_type', 'i1'),
+    ('units', '<i8'),
+])
+FILL_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('instrument_id', '<i4'),
+    ('side', 'i1'),
+    ('units', '<i8'),
+    ('price', '<f8'),
+])
+EQUITY_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('balance', '<f8'),
+    ('unrealized_pnl', '<f8'),
+    ('gross_exposure', '<f8'),
+    ('net_exposure', '<f8'),
+])
+
+FILES = ['orders.bin', 'fills.bin', 'equity.bin']
+DTYPES = [ORDER_DTYPE, FILL_DTYPE, EQUITY_DTYPE]
+INSTRUMENTS_FILE = 'instruments.txt'
+
+SIDES = {'buy': 1, 'sell': -1, 'LONG': 1, 'SHORT': -1}
+ORDER_TYPES = {'market': 0, 'limit': 1}
+
+
+def to_epoch_ns(time):
+    """
+    Converts the time of a tick, a timestamp string or nanoseconds
+    since the epoch, into nanoseconds
+    """
+    if time is None:
+        return 0
+    if isinstance(time, basestring):
+        return timestamp_to_epoch_ns(time)
+    return int(time)
+
+
+def open_records(path, dtype):
+    """
+    Opens a file of records of dtype for appending. A record which
+    was cut off, e.g. by a crash during a write, is cut away, else
+    every record appended after it would be misaligned.
+    """
+    f = open(path, 'ab')
+    size = os.path.getsize(path)
+    if size % dtype.itemsize:
+        f.truncate(size - size % dtype.itemsize)
+    return f
+
+
+class Journal(object):
+    """
+    Appends orders, fills and equity snapshots to a journal directory.
+    The methods order(), fill() and equity() only append a tuple to a
+    deque, which is thread-safe without a lock. A writer thread takes
+    the records every flush_interval seconds, converts them into
+    numpy records and appends them to the files in one write per file,
+    so the trading loop never waits for the disk.
+    Call close() at the end to write the remaining records.
+    Attributes:
+        directory: the journal directory, created if it does not exist
+        flush_interval: seconds between two writes
+        pending: deque of records which are not written yet
+        instruments: list of instrument names, the position in the
+            list is the id of the instrument
+    """
+    def __init__(self, directory, flush_interval=0.5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.instruments = read_instruments(directory)
+        self.ids = dict((name, i) for i, name in enumerate(self.instruments))
+        self.instruments_file = open(
+            os.path.join(directory, INSTRUMENTS_FILE), 'a')
+        self.files = [open_records(os.path.join(directory, name), dtype)
+            for name, dtype in zip(FILES, DTYPES)]
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self.run)
+        self.writer.daemon = True
+        self.writer.start()
+
+    def order(self, time, instrument, units, order_type, side):
+        self.pending.append((ORDER, time, instrument, units, order_type,
+            side))
+
+    def fill(self, time, instrument, units, side, price):
+        self.pending.append((FILL, time, instrument, units, side, price))
+
+    def equity(self, time, balance, unrealized_pnl, gross_exposure,
+            net_exposure):
+        self.pending.append((EQUITY, time, balance, unrealized_pnl,
+            gross_exposure, net_exposure))
+
+    def instrument_id(self, instrument):
+        instrument_id = self.ids.get(instrument)
+        if instrument_id is None:
+            instrument_id = len(self.instruments)
+            self.ids[instrument] = instrument_id
+            if self.instruments:
+                self.instruments_file.write('\n')
+            self.instruments_file.write(instrument)
+            self.instruments.append(instrument)
+        return instrument_id
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all pending records, called by the writer thread and
+        before a snapshot
+        """
+        with self.lock:
+            popleft = self.pending.popleft
+            records = ([], [], [])
+            try:
+                while True:
+                    record = popleft()
+                    records[record[0]].append(record)
+            except IndexError:
+                pass
+            if not any(records):
+                return
+            rows = (
+                [(to_epoch_ns(time), self.instrument_id(instrument),
+                    SIDES[side], ORDER_TYPES.get(order_type, -1), units)
+                    for kind, time, instrument, units, order_type, side
+                    in records[ORDER]],
+                [(to_epoch_ns(time), self.instrument_id(instrument),
+                    SIDES[side], units, price)
+                    for kind, time, instrument, units, side, price
+                    in records[FILL]],
+                [(to_epoch_ns(record[1]),) + record[2:]
+                    for record in records[EQUITY]],
+            )
+            # the instruments have to be known before their records
+            self.instruments_file.flush()
+            for f, dtype, kind_rows in zip(self.files, DTYPES, rows):
+                if kind_rows:
+                    np.array(kind_rows, dtype=dtype).tofile(f)
+                    f.flush()
+
+    def close(self):
+        """
+        Stops the writer thread and writes the remaining records
+        """
+        self.stopped.set()
+        self.writer.join()
+        self.flush()
+        for f in self.files:
+            f.close()
+        self.instruments_file.close()
+
+
+class JournalArrays(object):
+    """
+    A journal loaded into numpy record arrays, e.g.
+    journal.fills['price'] is a float64 array of all fill prices.
+    Attributes:
+        instruments: list of instrument names, the position in the
+            list is the id of the instrument
+        orders: array of ORDER_DTYPE
+        fills: array of FILL_DTYPE
+        equity: array of EQUITY_DTYPE
+    """
+    def __init__(self, instruments, orders, fills, equity):
+        self.instruments = instruments
+        self.orders = orders
+        self.fills = fills
+        self.equity = equity
+
+    def instrument_id(self, instrument):
+        return self.instruments.index(instrument)
+
+
+def read_instruments(directory):
+    path = os.path.join(directory, INSTRUMENTS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        table = f.read()
+    return table.split('\n') if table else []
+
+
+def read_journal(directory):
+    """
+    Reads a journal directory into JournalArrays. A record which was
+    cut off, e.g. by a crash during a write, is ignored.
+    """
+    arrays = []
+    for name, dtype in zip(FILES, DTYPES):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            arrays.append(np.zeros(0, dtype=dtype))
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        n = len(data) // dtype.itemsize
+        arrays.append(np.frombuffer(data, dtype=dtype, count=n))
+    return JournalArrays(read_instruments(directory), *arrays)
@@ -48,10 +48,26 @@ class Portfolio(AbstractPortfolio):
         risk_per_trade: risk we want to have per trade
         trade_units: how much units we trade
         positions: a dictionary of positions
+        pending_orders: None or an object with a method
+            has_pending_order(instrument), e.g. an AsyncExecution.
+            Signals for instruments with pending orders are ignored,
+            so that we do not order twice while waiting for a fill.
+        unrealized_pnl: sum of profit_base of all positions
+        gross_exposure: sum of the exposure of all positions
+        net_exposure: exposure of the long minus the short positions
+        margin_used: gross_exposure / leverage
+        journal: None or a Journal which records the orders, fills
+            and the equity after every fill
+        time: time of the last tick, used for the journal
+        fills: number of handled FillEvents, the same as the number
+            of fills in the journal
+    The totals are kept up to date on every change of a position, so
+    reading them does not walk the positions.
     """
     def __init__(
         self, ticker, events, base="EUR", leverage=20,
-        equity=100000.0, risk_per_trade=0.02
+        equity=100000.0, risk_per_trade=0.02, pending_orders=None,
+        journal=None
     ):
         self.ticker = ticker
         self.events = events
@@ -62,11 +78,41 @@ class Portfolio(AbstractPortfolio):
         self.risk_per_trade = risk_per_trade
         self.trade_units = self.calc_risk_position_size()
         self.positions = {}
+        self.pending_orders = pending_orders
+        self.unrealized_pnl = 0.0
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.journal = journal
+        self.time = None
+        self.fills = 0
         self.logger = logging.getLogger(__name__)
 
     def calc_risk_position_size(self):
         return self.equity * self.risk_per_trade / self.leverage
 
+    @property
+    def margin_used(self):
+        return self.gross_exposure / self.leverage
+
+    def track_position(self, ps, sign=1.0):
+        """
+        Adds a position to the totals, or removes it with sign -1.0
+        """
+        self.unrealized_pnl += sign * ps.profit_base
+        self.gross_exposure += sign * ps.exposure
+        if ps.side == "SHORT":
+            self.net_exposure -= sign * ps.exposure
+        else:
+            self.net_exposure += sign * ps.exposure
+
+    def untrack_position(self, ps):
+        self.track_position(ps, -1.0)
+        if len(self.positions) <= 1:
+            # the last position, avoid rounding errors piling up
+            self.unrealized_pnl = 0.0
+            self.gross_exposure = 0.0
+            self.net_exposure = 0.0
+
     def add_new_position(
         self, side, market, units, exposure,
         add_price, remove_price
@@ -76,6 +122,7 @@ class Portfolio(AbstractPortfolio):
             add_price, remove_price
         )
         self.positions[market] = ps
+        self.track_position(ps)
 
     def add_position_units(
         self, market, units, exposure, 
@@ -85,12 +132,14 @@ class Portfolio(AbstractPortfolio):
             return False
         else:
             ps = self.positions[market]
+            self.untrack_position(ps)
             new_total_units = ps.units + units
             new_total_cost = ps.avg_price*ps.units + add_price*units
             ps.exposure += exposure
             ps.avg_price = new_total_cost/new_total_units
             ps.units = new_total_units
             ps.update_position_price(remove_price)
+            self.track_position(ps)
             return True
 
     def remove_position_units(
@@ -100,12 +149,14 @@ class Portfolio(AbstractPortfolio):
             return False
         else:
             ps = self.positions[market]
+            self.untrack_position(ps)
             ps.units -= units
             exposure = float(units)
             ps.exposure -= exposure
             ps.update_position_price(remove_price)
             pnl = ps.calculate_pips() * exposure / remove_price 
             self.balance += pnl
+            self.track_position(ps)
             return True
 
     def close_position(
@@ -115,12 +166,19 @@ class Portfolio(AbstractPortfolio):
             return False
         else:
             ps = self.positions[market]
+            self.untrack_position(ps)
             ps.update_position_price(remove_price)
             pnl = ps.calculate_pips() * ps.exposure / remove_price 
             self.balance += pnl
             del[self.positions[market]]
             return True
 
+    def put_order(self, order):
+        if self.journal is not None:
+            self.journal.order(self.time, order.instrument, order.units,
+                order.order_type, order.side)
+        self.events.put(order)
+
     def execute_close_all_positions(self):
         """
         This function sends OrderEvents to close all open positions
@@ -133,23 +191,33 @@ class Portfolio(AbstractPortfolio):
                 order = OrderEvent(pos.market, units, "market", "buy")
             else:
                 order = OrderEvent(pos.market, units, "market", "sell")
-            self.events.put(order)
+            self.put_order(order)
 
     def execute_signal_event(self, signal_event):
         side = signal_event.side
         market = signal_event.instrument
         units = int(self.trade_units)
+        if self.pending_orders is not None and \
+                self.pending_orders.has_pending_order(market):
+            self.logger.info("Ignoring signal, order for %s is pending", market)
+            return
 
-        order = OrderEvent(market, units, "market", side)
-        self.events.put(order)
+        order = OrderEvent(market, units, "market", side,
+            origin=signal_event.origin)
+        self.put_order(order)
 
     def execute_tick_event(self,tick_event):
-        if tick_event.instrument in self.positions:
-            pos=self.positions[tick_event.instrument]
+        self.time = tick_event.time
+        pos = self.positions.get(tick_event.instrument)
+        if pos is not None:
+            profit_base = pos.profit_base
+            # a position is valued at the price at which it can be
+            # closed, cur_price is the price of one unit
             if pos.side == 'LONG':
-                pos.update_position_price(pos.units*tick_event.bid)
+                pos.update_position_price(tick_event.bid)
             else:
-                pos.update_position_price(pos.units*tick_event.ask)
+                pos.update_position_price(tick_event.ask)
+            self.unrealized_pnl += pos.profit_base - profit_base
 
     def execute_fill_event(self,fill_event):
         side = fill_event.side
@@ -220,4 +288,9 @@ class Portfolio(AbstractPortfolio):
                             new_side, market, new_units, 
                             new_exposure, price, remove_price
                         )
-        self.logger.info("Balance: %0.2f" % self.balance)
+        self.fills += 1
+        if self.journal is not None:
+            self.journal.fill(self.time, market, units, side, price)
+            self.journal.equity(self.time, self.balance,
+                self.unrealized_pnl, self.gross_exposure, self.net_exposure)
+        self.logger.info("Balance: %0.2f", self.balance)
@@ -9,7 +9,8 @@ class Position(object):
         avg_price: average price for multiple purchases
         cur_price: current price of the whole position
         profit_base: current profit or loss
-        profit_perc: current profit or loss in percent
+        profit_perc: current profit or loss in percent, computed when
+            it is read, since it is rarely needed
     """
     def __init__(
         self, side, market, units, 
@@ -22,7 +23,6 @@ class Position(object):
         self.avg_price = avg_price
         self.cur_price = cur_price
         self.profit_base = self.calculate_profit_base()
-        self.profit_perc = self.calculate_profit_perc()
 
     def calculate_pips(self):
         mult = 1.0
@@ -43,10 +43,16 @@ class Position(object):
         """
         return self.profit_base / self.exposure * 100.0
 
+    profit_perc = property(calculate_profit_perc)
+
     def update_position_price(self, cur_price):
         """
-        updates the profit attributes of the position
+        updates the profit attributes of the position. This is
+        called on every tick, so calculate_profit_base is inlined.
         """
         self.cur_price = cur_price
-        self.profit_base = self.calculate_profit_base()
-        self.profit_perc = self.calculate_profit_perc()
+        if self.side == "SHORT":
+            pips = self.avg_price - cur_price
+        else:
+            pips = cur_price - self.avg_price
+        self.profit_base = pips * self.exposure / cur_price
@@ -0,0 +1,258 @@
+"""
+Snapshots of the state of a run, so that a backtest can be resumed
+part-way through and a crashed live run gets its positions back.
+A snapshot is a JSON file with
+    offset: number of ticks which were handled before the snapshot
+    source: the data which a backtest replays, e.g. its csv-file
+    portfolio: balance, equity, trade_units, time, number of fills
+        and the positions of the portfolio
+    prices: bid and ask of every instrument of the price stream
+    strategy: the result of strategy.get_state(), if it has one
+    strategy_id: the class of the strategy and the result of
+        strategy.get_params(), if it has one
+A backtest is resumed by restoring the snapshot and skipping the first
+offset ticks. A backtest which runs to its end removes the snapshot,
+so the next run starts afresh. A live run is restored from the snapshot and the fills
+which the journal recorded after it, see replay_journal_fills().
+"""
+
+import json
+import os
+import time
+import logging
+
+from quantfxengine.event.event import FillEvent
+from quantfxengine.portfolio.journal import read_journal
+from quantfxengine.portfolio.position import Position
+from quantfxengine.streaming.marketstate import MarketState
+
+POSITION_FIELDS = ('side', 'market', 'units', 'exposure', 'avg_price',
+    'cur_price')
+
+
+def strategy_identity(strategy):
+    """
+    Returns the class of strategy and its parameters, as given by
+    strategy.get_params() if it has one, as a list which can be written
+    as JSON. A snapshot only fits a strategy with the same identity.
+    """
+    cls = strategy.__class__
+    params = None
+    if hasattr(strategy, 'get_params'):
+        params = strategy.get_params()
+    return ['%s.%s' % (cls.__module__, cls.__name__), params]
+
+
+def take_snapshot(
+    portfolio, prices=None, strategy=None, offset=0, source=None
+):
+    """
+    Returns the state of portfolio, prices and strategy as a dict
+    which can be written as JSON
+    """
+    snapshot = {
+        'offset': offset,
+        'source': source,
+        'portfolio': {
+            'balance': portfolio.balance,
+            'equity': portfolio.equity,
+            'trade_units': portfolio.trade_units,
+            'time': portfolio.time,
+            'fills': portfolio.fills,
+            'positions': [
+                [getattr(ps, name) for name in POSITION_FIELDS]
+                for ps in portfolio.positions.itervalues()
+            ],
+        },
+    }
+    if prices is not None:
+        snapshot['prices'] = dict(
+            (instrument, [state.bid, state.ask])
+            for instrument, state in prices.cur_prices.iteritems())
+    if strategy is not None:
+        snapshot['strategy_id'] = strategy_identity(strategy)
+        if hasattr(strategy, 'get_state'):
+            snapshot['strategy'] = strategy.get_state()
+    return snapshot
+
+
+def save_snapshot(path, snapshot):
+    """
+    Writes snapshot to path. The snapshot is written to a temporary
+    file which then replaces path, so a crash never leaves a broken
+    snapshot behind.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+
+def load_snapshot(path):
+    """
+    Reads a snapshot, returns None if there is none
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return json.load(f)
+
+
+def restore_snapshot(snapshot, portfolio, prices=None, strategy=None):
+    """
+    Puts the state of snapshot into portfolio, prices and strategy
+    and returns the offset of the snapshot
+    """
+    state = snapshot['portfolio']
+    portfolio.balance = state['balance']
+    portfolio.equity = state['equity']
+    portfolio.trade_units = state['trade_units']
+    portfolio.time = state['time']
+    if isinstance(portfolio.time, unicode):
+        portfolio.time = str(portfolio.time)
+    portfolio.fills = state['fills']
+    portfolio.positions = {}
+    portfolio.unrealized_pnl = 0.0
+    portfolio.gross_exposure = 0.0
+    portfolio.net_exposure = 0.0
+    for fields in state['positions']:
+        # JSON gives unicode strings
+        ps = Position(str(fields[0]), str(fields[1]), *fields[2:])
+        portfolio.positions[ps.market] = ps
+        portfolio.track_position(ps)
+    if prices is not None:
+        for instrument, (bid, ask) in snapshot.get('prices', {}).iteritems():
+            instrument = str(instrument)
+            if instrument in prices.cur_prices:
+                prices.cur_prices[instrument].update_bid_ask(bid, ask)
+            else:
+                prices.cur_prices[instrument] = MarketState(bid, ask)
+    if strategy is not None and 'strategy' in snapshot:
+        strategy.set_state(snapshot['strategy'])
+    return snapshot['offset']
+
+
+def replay_journal_fills(portfolio, journal_dir):
+    """
+    Hands the fills which the journal in journal_dir recorded after
+    the first portfolio.fills fills to the portfolio, e.g. after
+    restoring a snapshot which is older than the last fill. Returns
+    the number of replayed fills.
+    """
+    run = read_journal(journal_dir)
+    fills = run.fills[portfolio.fills:]
+    # the fills are in the journal already
+    journal = portfolio.journal
+    portfolio.journal = None
+    try:
+        for instrument_id, units, side, price in zip(
+                fills['instrument_id'].tolist(), fills['units'].tolist(),
+                fills['side'].tolist(), fills['price'].tolist()):
+            portfolio.execute_fill_event(FillEvent(
+                run.instruments[instrument_id], units,
+                "LONG" if side == 1 else "SHORT", price))
+    finally:
+        portfolio.journal = journal
+    return len(fills)
+
+
+class Snapshotter(object):
+    """
+    Writes snapshots of a run to path from time to time. In a backtest
+    iter_ticks() writes one every every_ticks ticks, in a live run
+    on_fill() writes one after a fill if the last one is older than
+    interval seconds. The open bars of a BarAggregator and the price
+    history are not part of the snapshot.
+    Attributes:
+        path: the snapshot file
+        portfolio: the Portfolio
+        prices: the price stream whose cur_prices are saved
+        strategy: the strategy, its state is saved if it has the
+            methods get_state() and set_state(state)
+        every_ticks: ticks between two snapshots of a backtest
+        interval: minimal seconds between two snapshots of a live run
+        source: the data which a backtest replays, e.g. the name of
+            its csv-file, None for a live run. The offset of a
+            snapshot only fits the same data, so restore() refuses a
+            snapshot of another source, and also one of another
+            strategy, see strategy_identity().
+    """
+    def __init__(
+        self, path, portfolio, prices=None, strategy=None,
+        every_ticks=1000000, interval=60.0, source=None
+    ):
+        self.path = path
+        self.source = source
+        self.portfolio = portfolio
+        self.prices = prices
+        self.strategy = strategy
+        self.every_ticks = every_ticks
+        self.interval = interval
+        self.last_save = time.time()
+        self.logger = logging.getLogger(__name__)
+
+    def save(self, offset=0):
+        # the fills up to the snapshot have to be in the journal, so
+        # that replay_journal_fills() finds the later ones
+        if self.portfolio.journal is not None:
+            self.portfolio.journal.flush()
+        save_snapshot(self.path, take_snapshot(self.portfolio,
+            self.prices, self.strategy, offset, self.source))
+        self.last_save = time.time()
+
+    def restore(self):
+        """
+        Restores the last snapshot and returns its offset, 0 if there
+        is none. Raises ValueError if the snapshot was taken of another
+        source or with another strategy.
+        """
+        snapshot = load_snapshot(self.path)
+        if snapshot is None:
+            return 0
+        # compare as JSON, which turns tuples into lists
+        source = json.loads(json.dumps(self.source))
+        if snapshot.get('source') != source:
+            raise ValueError("Snapshot %s was taken of %r, not of %r" % (
+                self.path, snapshot.get('source'), source))
+        if self.strategy is not None:
+            strategy_id = json.loads(json.dumps(
+                strategy_identity(self.strategy)))
+            if snapshot.get('strategy_id') != strategy_id:
+                raise ValueError("Snapshot %s was taken with the strategy "
+                    "%r, not with %r" % (self.path,
+                        snapshot.get('strategy_id'), strategy_id))
+        offset = restore_snapshot(snapshot, self.portfolio, self.prices,
+            self.strategy)
+        self.logger.info("Restored snapshot %s at tick %d", self.path,
+            offset)
+        return offset
+
+    def finish(self):
+        """
+        Removes the snapshot at the end of a backtest, which has
+        nothing left to resume
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def iter_ticks(self, ticks, start=0):
+        """
+        Generator which passes ticks through and writes a snapshot
+        every every_ticks ticks. start is the number of ticks which
+        were skipped. backtest() handles a tick with all its events
+        before it asks for the next one, so the snapshot is taken
+        between two ticks.
+        """
+        offset = start
+        every_ticks = self.every_ticks
+        for tick in ticks:
+            if offset % every_ticks == 0 and offset != start:
+                self.save(offset)
+            yield tick
+            offset += 1
+
+    def on_fill(self):
+        if time.time() - self.last_save >= self.interval:
+            self.save()
@@ -0,0 +1,95 @@
+import unittest
+import Queue
+import threading
+import shutil
+import tempfile
+
+from quantfxengine.portfolio.journal import Journal, read_journal
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import MockPriceStream, \
+    timestamp_to_epoch_ns
+from quantfxengine.event.event import SignalEvent, FillEvent, TickEvent
+
+class Test_Journal(unittest.TestCase):
+    """
+    Unit tests for the class Journal and read_journal
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_write_read(self):
+        journal = Journal(self.directory, flush_interval=60)
+        journal.order(None, "EUR_USD", 100, "market", "buy")
+        journal.fill(5, "EUR_USD", 100, "LONG", 1.5)
+        journal.order(6, "EUR_CHF", 50, "market", "sell")
+        journal.fill(7, "EUR_CHF", 50, "SHORT", 1.25)
+        journal.equity(7, 10000.0, -1.0, 3000.0, 1000.0)
+        journal.close()
+        run = read_journal(self.directory)
+        self.assertEqual(run.instruments, ["EUR_USD", "EUR_CHF"])
+        self.assertEqual(list(run.orders['time']), [0, 6])
+        self.assertEqual(list(run.orders['instrument_id']), [0, 1])
+        self.assertEqual(list(run.orders['side']), [1, -1])
+        self.assertEqual(list(run.orders['units']), [100, 50])
+        self.assertEqual(list(run.fills['price']), [1.5, 1.25])
+        self.assertEqual(list(run.fills['side']), [1, -1])
+        self.assertEqual(run.equity.tolist(),
+            [(7, 10000.0, -1.0, 3000.0, 1000.0)])
+
+    def test_append(self):
+        # records of a second journal on the same directory and a
+        # record cut off at the end
+        journal = Journal(self.directory)
+        journal.fill(1, "EUR_CHF", 10, "LONG", 1.2)
+        journal.close()
+        journal = Journal(self.directory)
+        journal.fill(2, "EUR_USD", 20, "LONG", 1.1)
+        journal.fill(3, "EUR_CHF", 30, "SHORT", 1.3)
+        journal.close()
+        with open(journal.files[1].name, 'ab') as f:
+            f.write('\0' * 5)
+        run = read_journal(self.directory)
+        self.assertEqual(run.instruments, ["EUR_CHF", "EUR_USD"])
+        self.assertEqual(list(run.fills['instrument_id']), [0, 1, 0])
+        self.assertEqual(list(run.fills['units']), [10, 20, 30])
+        self.assertEqual(len(run.orders), 0)
+
+    def test_append_after_cut_off(self):
+        """
+        a record cut off at the end is cut away before the next run
+        appends, so the later records stay aligned
+        """
+        journal = Journal(self.directory)
+        journal.fill(1, "EUR_USD", 100, "LONG", 1.1)
+        journal.close()
+        with open(journal.files[1].name, 'ab') as f:
+            f.write('\xff' * 7)
+        journal = Journal(self.directory)
+        journal.fill(None, "EUR_USD", 200, "sell", 1.2)
+        journal.close()
+        run = read_journal(self.directory)
+        self.assertEqual(list(run.fills['units']), [100, 200])
+        self.assertEqual(list(run.fills['price']), [1.1, 1.2])
+        self.assertEqual(list(run.fills['side']), [1, -1])
+
+    def test_portfolio(self):
+        journal = Journal(self.directory)
+        ticker = MockPriceStream(Queue.Queue(), threading.Event())
+        ticker.newprice(3, 4)
+        pf = Portfolio(ticker, Queue.Queue(), "EUR", 1, 10000, 0.02,
+            journal=journal)
+        timestamp = "2015-02-14T10:30:00.000000Z"
+        pf.execute_tick_event(TickEvent("EUR_USD", timestamp, 3, 4))
+        pf.execute_signal_event(SignalEvent("EUR_USD", "market", "buy"))
+        pf.execute_fill_event(FillEvent("EUR_USD", 200, "LONG", 4))
+        journal.close()
+        run = read_journal(self.directory)
+        ns = timestamp_to_epoch_ns(timestamp)
+        self.assertEqual(run.orders.tolist(), [(ns, 0, 1, 0, 200)])
+        self.assertEqual(run.fills.tolist(), [(ns, 0, 1, 200, 4.0)])
+        self.assertEqual(run.equity.tolist(),
+            [(ns, 10000.0, pf.unrealized_pnl, 200.0, 200.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import threading
 
 from quantfxengine.portfolio.portfolio import Portfolio
 from quantfxengine.streaming.streaming import MockPriceStream
-from quantfxengine.event.event import SignalEvent, FillEvent
+from quantfxengine.event.event import SignalEvent, FillEvent, TickEvent
 
 class Test_Portfolio(unittest.TestCase):
     """
@@ -140,6 +140,73 @@ class Test_Portfolio(unittest.TestCase):
         self.assertEqual(self.pf.positions["EUR_USD"].exposure, 200)
         self.assertEqual(self.pf.balance, 9800)
 
+    def test_execute_signal_event(self):
+        self.pf.execute_signal_event(SignalEvent("EUR_USD", "market", "buy"))
+        order = self.order_events.get_nowait()
+        self.assertEqual(order.instrument, "EUR_USD")
+        self.assertEqual(order.units, 200)
+        self.assertEqual(order.side, "buy")
+
+    def test_ignore_signal_while_order_pending(self):
+        class Pending(object):
+            def has_pending_order(self, instrument):
+                return instrument == "EUR_USD"
+        pf = Portfolio(self.ticker, self.order_events, "EUR", 1, 10000,
+            0.02, pending_orders=Pending())
+        pf.execute_signal_event(SignalEvent("EUR_USD", "market", "buy"))
+        self.assertTrue(self.order_events.empty())
+        pf.execute_signal_event(SignalEvent("EUR_CHF", "market", "buy"))
+        self.assertEqual(self.order_events.get_nowait().instrument,
+            "EUR_CHF")
+
+    def assertTotals(self, pf):
+        """
+        the running totals are the sums over the positions
+        """
+        positions = pf.positions.values()
+        self.assertAlmostEqual(pf.unrealized_pnl,
+            sum(ps.profit_base for ps in positions))
+        self.assertAlmostEqual(pf.gross_exposure,
+            sum(ps.exposure for ps in positions))
+        self.assertAlmostEqual(pf.net_exposure,
+            sum(ps.exposure if ps.side == "LONG" else -ps.exposure
+                for ps in positions))
+        self.assertAlmostEqual(pf.margin_used,
+            pf.gross_exposure / pf.leverage)
+
+    def test_totals(self):
+        pf = self.leverage_pf
+        pf.execute_fill_event(FillEvent("EUR_USD", 200, 'LONG', 4))
+        self.assertTotals(pf)
+        self.ticker.cur_prices["EUR_CHF"] = self.ticker.cur_prices["EUR_USD"]
+        pf.execute_fill_event(FillEvent("EUR_CHF", 100, 'SHORT', 3))
+        self.assertTotals(pf)
+        self.assertEqual(pf.gross_exposure, 6000)
+        self.assertEqual(pf.net_exposure, 2000)
+        self.assertEqual(pf.margin_used, 300)
+        pf.execute_tick_event(TickEvent("EUR_USD", "t", 5.0, 5.5))
+        pf.execute_tick_event(TickEvent("EUR_CHF", "t", 2.0, 2.5))
+        self.assertTotals(pf)
+        pf.execute_fill_event(FillEvent("EUR_USD", 100, 'LONG', 5))
+        pf.execute_fill_event(FillEvent("EUR_CHF", 50, 'LONG', 2.5))
+        self.assertTotals(pf)
+        pf.execute_fill_event(FillEvent("EUR_USD", 300, 'SHORT', 5))
+        pf.execute_fill_event(FillEvent("EUR_CHF", 50, 'LONG', 2.5))
+        self.assertEqual(pf.positions, {})
+        self.assertEqual(pf.unrealized_pnl, 0.0)
+        self.assertEqual(pf.gross_exposure, 0.0)
+
+    def test_tick_updates_price(self):
+        """
+        positions are valued at the bid or ask of one unit
+        """
+        self.pf.execute_fill_event(FillEvent("EUR_USD", 200, 'LONG', 4))
+        self.pf.execute_tick_event(TickEvent("EUR_USD", "t", 5.0, 5.5))
+        ps = self.pf.positions["EUR_USD"]
+        self.assertEqual(ps.cur_price, 5.0)
+        self.assertEqual(ps.profit_base, 1.0 * 200 / 5.0)
+        self.assertEqual(self.pf.unrealized_pnl, ps.profit_base)
+
 
 if __name__ == 'main':
     unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import Queue
+import threading
+import random
+import shutil
+import tempfile
+import os
+
+from quantfxengine.event.event import FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.journal import Journal, read_journal
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.portfolio.snapshot import *
+from quantfxengine.strategy.strategy import TestRandomStrategy
+from quantfxengine.streaming.streaming import MockPriceStream, \
+    StreamingPricesFromFile
+from quantfxengine.trading.backtest import backtest
+
+class Test_Snapshot(unittest.TestCase):
+    """
+    Unit tests for snapshots of the portfolio
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'snapshot.json')
+
+    def make_portfolio(self, journal=None):
+        ticker = MockPriceStream(Queue.Queue(), threading.Event())
+        ticker.newprice(3, 4)
+        return Portfolio(ticker, Queue.Queue(), "EUR", 1, 10000, 0.02,
+            journal=journal)
+
+    def test_roundtrip(self):
+        pf = self.make_portfolio()
+        pf.execute_fill_event(FillEvent("EUR_USD", 200, "LONG", 4))
+        pf.execute_fill_event(FillEvent("EUR_USD", 100, "SHORT", 3.5))
+        pf.ticker.newprice(3.25, 3.5)
+        save_snapshot(self.path, take_snapshot(pf, pf.ticker, offset=7))
+        restored = self.make_portfolio()
+        offset = restore_snapshot(load_snapshot(self.path), restored,
+            restored.ticker)
+        self.assertEqual(offset, 7)
+        self.assertEqual(restored.balance, pf.balance)
+        self.assertEqual(restored.fills, 2)
+        ps = restored.positions["EUR_USD"]
+        self.assertEqual((ps.side, ps.units, ps.avg_price, ps.cur_price),
+            ("LONG", 100, 4, 3.5))
+        self.assertEqual(restored.gross_exposure, pf.gross_exposure)
+        self.assertEqual(restored.unrealized_pnl, pf.unrealized_pnl)
+        self.assertEqual(restored.ticker.cur_prices["EUR_USD"].ask, 3.5)
+        self.assertIsNone(load_snapshot(self.path + '.missing'))
+
+    def test_replay_journal_fills(self):
+        journal = Journal(os.path.join(self.directory, 'journal'))
+        pf = self.make_portfolio(journal)
+        pf.execute_fill_event(FillEvent("EUR_USD", 200, "LONG", 4))
+        snapshot = take_snapshot(pf)
+        pf.execute_fill_event(FillEvent("EUR_USD", 50, "SHORT", 5))
+        journal.close()
+        restored = self.make_portfolio()
+        restore_snapshot(snapshot, restored)
+        self.assertEqual(replay_journal_fills(restored, journal.directory),
+            1)
+        self.assertEqual(restored.balance, pf.balance)
+        self.assertEqual(restored.positions["EUR_USD"].units, 150)
+        self.assertEqual(restored.fills, 2)
+
+    def test_save_flushes_journal(self):
+        journal = Journal(os.path.join(self.directory, 'journal'),
+            flush_interval=3600)
+        self.addCleanup(journal.close)
+        pf = self.make_portfolio(journal)
+        pf.execute_fill_event(FillEvent("EUR_USD", 200, "LONG", 4))
+        Snapshotter(self.path, pf).save()
+        self.assertEqual(len(journal.pending), 0)
+        self.assertEqual(len(read_journal(journal.directory).fills), 1)
+
+    def test_source_mismatch(self):
+        pf = self.make_portfolio()
+        Snapshotter(self.path, pf, source=['a.csv', 'b.csv']).save(5)
+        self.assertEqual(Snapshotter(self.path, pf,
+            source=('a.csv', 'b.csv')).restore(), 5)
+        self.assertRaises(ValueError,
+            Snapshotter(self.path, pf, source='c.csv').restore)
+
+    def test_resume_backtest(self):
+        """
+        a backtest resumed from a snapshot ends with the same balance
+        as a backtest which ran through
+        """
+        rng = random.Random(3)
+        rows = []
+        bid = 1.2
+        for i in range(1000):
+            bid += rng.gauss(0, 1e-4)
+            rows.append('EUR_USD,2015-02-14T10:30:%02d.%06dZ,%r,%r' % (
+                i // 100, i % 100, bid, bid + 2e-4))
+        csv_file = os.path.join(self.directory, 'ticks.csv')
+        with open(csv_file, 'w') as f:
+            f.write('\n'.join(rows))
+
+        def run(crash_at=None):
+            events = LocalEventQueue()
+            prices = StreamingPricesFromFile(csv_file, events,
+                threading.Event())
+            strategy = TestRandomStrategy(events)
+            portfolio = Portfolio(prices, events, equity=10000)
+            execution = MockExecution(events, prices)
+            snapshots = Snapshotter(self.path, portfolio, prices, strategy,
+                every_ticks=300, source=csv_file)
+            start = snapshots.restore()
+            if crash_at is not None:
+                calculate_signals = strategy.calculate_signals
+                def crash(event):
+                    if strategy.ticks == crash_at:
+                        raise KeyboardInterrupt
+                    calculate_signals(event)
+                strategy.calculate_signals = crash
+            backtest(prices, events, strategy, portfolio, execution,
+                snapshots=snapshots, start=start)
+            return portfolio, start
+
+        # a complete run leaves no snapshot behind
+        portfolio, start = run()
+        self.assertEqual(start, 0)
+        self.assertIsNone(load_snapshot(self.path))
+        self.assertRaises(KeyboardInterrupt, run, 950)
+        resumed, start = run()
+        self.assertEqual(start, 900)
+        self.assertEqual(resumed.balance, portfolio.balance)
+        self.assertEqual(resumed.fills, portfolio.fills)
+        self.assertIsNone(load_snapshot(self.path))
+
+    def test_strategy_mismatch(self):
+        class ParamStrategy(object):
+            def __init__(self, n):
+                self.n = n
+            def get_params(self):
+                return {'n': self.n}
+        pf = self.make_portfolio()
+        Snapshotter(self.path, pf, strategy=ParamStrategy(3)).save(5)
+        self.assertEqual(Snapshotter(self.path, pf,
+            strategy=ParamStrategy(3)).restore(), 5)
+        self.assertRaises(ValueError,
+            Snapshotter(self.path, pf, strategy=ParamStrategy(4)).restore)
+        self.assertRaises(ValueError,
+            Snapshotter(self.path, pf, strategy=TestRandomStrategy(None)
+                ).restore)
+
+if __name__ == '__main__':
+    unittest.main()
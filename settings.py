@@ -21,7 +21,67 @@ ACCOUNT_ID = os.environ.get('OANDA_API_ACCOUNT_ID', None)
 
 #Backtesting on a file
 BACKTEST = True
+#A csv-file or a binary tick store ending with .qfx, which can be
+#created with python -m quantfxengine.streaming.tickstore in.csv out.qfx
+#A directory or a list of csv-files is replayed merged by time.
 BACKTESTFILE = 'test.csv'
+#Run the backtest in a single thread without a streaming thread.
+#This is much faster, but ignores REPLAY_SPEED and MAX_PENDING_EVENTS
+SYNCHRONOUS_BACKTEST = True
+#Replay speed of the backtesting file: None is as fast as possible,
+#1.0 is real time as given by the timestamps, N is N times faster.
+#Only used if SYNCHRONOUS_BACKTEST is False.
+REPLAY_SPEED = None
+#Maximal number of events in the queue before the replay waits.
+#Only used if SYNCHRONOUS_BACKTEST is False.
+MAX_PENDING_EVENTS = 1000
+#If not None, the price stream keeps the last PRICE_HISTORY ticks of
+#every instrument in numpy arrays, see streaming/pricehistory.py
+PRICE_HISTORY = None
+#If not None, the strategy gets bars of BAR_INTERVAL seconds instead
+#of ticks
+BAR_INTERVAL = None
+#A bar file to backtest on instead of BACKTESTFILE, which can be
+#created with python -m quantfxengine.streaming.bars in.csv out.csv 60
+BARFILE = None
+
+#Keep only the newest waiting tick of every instrument in the events
+#queue when trading live, so that a slow strategy or order does not
+#make the trading loop lag behind the market. The strategy and the
+#portfolio then miss ticks, so this is off by default, and it is
+#ignored if BAR_INTERVAL is set, since the bars need every tick.
+CONFLATE_TICKS = False
+#Take FILL, ORDER and SIGNAL events from the queue before ticks when
+#trading live
+PRIORITY_EVENTS = True
+
+#Send orders to OANDA on EXECUTION_WORKERS threads without blocking
+#the trading loop
+ASYNC_EXECUTION = True
+EXECUTION_WORKERS = 4
+
+#Write the log in a thread of its own, so that the trading loop does
+#not wait for the console, see trading/logqueue.py
+ASYNC_LOGGING = False
+
+#Log the latencies of the trading loop every LATENCY_STATS_INTERVAL
+#seconds, None switches the measurement off
+LATENCY_STATS_INTERVAL = 60
+
+#If not None, the orders, fills and the equity after every fill are
+#recorded in this directory, see portfolio/journal.py
+JOURNAL_DIR = None
+
+#If not None, snapshots of the portfolio, the prices and the strategy
+#are written to this file and a run starts from the last snapshot, see
+#portfolio/snapshot.py. A synchronous backtest writes one every
+#SNAPSHOT_EVERY_TICKS ticks and skips the ticks before the snapshot
+#when it is resumed, a live run writes one after a fill at most every
+#SNAPSHOT_INTERVAL seconds and replays the later fills of JOURNAL_DIR.
+#A backtest which runs to its end removes the snapshot.
+SNAPSHOT_FILE = None
+SNAPSHOT_EVERY_TICKS = 1000000
+SNAPSHOT_INTERVAL = 60
 
 #Instruments
 INSTRUMENTS = ["EUR_USD","EUR_CHF"]
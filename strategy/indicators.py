@@ -0,0 +1,423 @@
+"""
+Streaming indicators for strategies. Every indicator has a fixed-size
+state and an update() which takes the next price in O(1) and returns
+the current value, or None while the indicator has seen too few
+prices. They are meant to be updated in calculate_signals, e.g.
+
+    def calculate_signals(self, event):
+        fast = self.fast.update(event.bid)
+        slow = self.slow.update(event.bid)
+
+For vectorized backtests every indicator has a batch function which
+takes a numpy array and gives exactly the same values, NaN where the
+streaming indicator gives None. The moving sums are added up in the
+same order in both, so they agree to the last bit. EMA, RSI and ATR
+are recursive, so their batch functions loop over the prices.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+# RollingSums computes its sums afresh at least every RECOMPUTE_EVERY
+# updates
+RECOMPUTE_EVERY = 1024
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+class RollingSums(object):
+    """
+    Sums of the last period prices and of their squares. They are
+    updated by adding the new price and subtracting the one which
+    leaves the window, with the prices taken relative to ref, which
+    keeps the sums small. Every every updates the sums are computed
+    afresh from the window and ref becomes its first price, so the
+    rounding errors do not pile up however long the stream is.
+    Attributes:
+        ref: the first price of the window of the last recomputation
+        sum, sum_sq: the sums of the window relative to ref, or None
+        every: number of updates between two recomputations
+    """
+    def __init__(self, period):
+        self.period = period
+        self.every = max(period, RECOMPUTE_EVERY)
+        self.window = deque(maxlen=period)
+        self.since = 0
+        self.ref = None
+        self.sum = None
+        self.sum_sq = None
+
+    def update(self, price):
+        window = self.window
+        old = window[0] if len(window) == self.period else None
+        window.append(price)
+        if len(window) < self.period:
+            return
+        if old is not None and self.since < self.every:
+            ref = self.ref
+            a = price - ref
+            b = old - ref
+            self.sum += a - b
+            self.sum_sq += a * a - b * b
+            self.since += 1
+        else:
+            ref = window[0]
+            total = 0.0
+            total_sq = 0.0
+            for p in window:
+                d = p - ref
+                total += d
+                total_sq += d * d
+            self.ref = ref
+            self.sum = total
+            self.sum_sq = total_sq
+            self.since = 1
+
+
+def _rolling_sums(values, period):
+    """
+    Returns the arrays ref, sum and sum_sq of every full window as
+    computed by RollingSums, block by block of every windows
+    """
+    n = len(values) - period + 1
+    every = max(period, RECOMPUTE_EVERY)
+    refs = np.empty(n)
+    sums = np.empty(n)
+    sums_sq = np.empty(n)
+    for start in xrange(0, n, every):
+        end = min(start + every, n)
+        ref = values[start]
+        d = values[start:start + period] - ref
+        # the prices which enter and leave the following windows
+        a = values[start + period:end + period - 1] - ref
+        b = values[start:end - 1] - ref
+        refs[start:end] = ref
+        sums[start:end] = np.cumsum(
+            np.concatenate(([np.cumsum(d)[-1]], a - b)))
+        sums_sq[start:end] = np.cumsum(
+            np.concatenate(([np.cumsum(d * d)[-1]], a * a - b * b)))
+    return refs, sums, sums_sq
+
+
+def _padded(values, n):
+    """
+    Returns values with NaN in front, so that it has length n
+    """
+    return np.concatenate((np.full(n - len(values), np.nan), values))
+
+
+class SMA(object):
+    """
+    Simple moving average of the last period prices
+    Attributes:
+        value: current average or None
+    """
+    def __init__(self, period):
+        self.period = period
+        self.sums = RollingSums(period)
+        self.value = None
+
+    def update(self, price):
+        sums = self.sums
+        sums.update(price)
+        if sums.sum is not None:
+            self.value = sums.ref + sums.sum / self.period
+        return self.value
+
+
+def sma(values, period):
+    values = _as_array(values)
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    ref, s, s_sq = _rolling_sums(values, period)
+    return _padded(ref + s / period, len(values))
+
+
+class RollingStd(object):
+    """
+    Standard deviation (ddof=0) of the last period prices
+    Attributes:
+        value: current standard deviation or None
+    """
+    def __init__(self, period):
+        self.period = period
+        self.sums = RollingSums(period)
+        self.value = None
+
+    def update(self, price):
+        sums = self.sums
+        sums.update(price)
+        if sums.sum is not None:
+            mean = sums.sum / self.period
+            var = sums.sum_sq / self.period - mean * mean
+            self.value = math.sqrt(var) if var > 0.0 else 0.0
+        return self.value
+
+
+def rolling_std(values, period):
+    values = _as_array(values)
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    ref, s, s_sq = _rolling_sums(values, period)
+    mean = s / period
+    var = s_sq / period - mean * mean
+    return _padded(np.sqrt(np.maximum(var, 0.0)), len(values))
+
+
+class Bollinger(object):
+    """
+    Bollinger bands, the simple moving average and k standard
+    deviations above and below it
+    Attributes:
+        value: tuple (lower, middle, upper) or None
+    """
+    def __init__(self, period, k=2.0):
+        self.period = period
+        self.k = k
+        self.sums = RollingSums(period)
+        self.value = None
+
+    def update(self, price):
+        sums = self.sums
+        sums.update(price)
+        if sums.sum is not None:
+            mean = sums.sum / self.period
+            var = sums.sum_sq / self.period - mean * mean
+            width = self.k * (math.sqrt(var) if var > 0.0 else 0.0)
+            middle = sums.ref + mean
+            self.value = (middle - width, middle, middle + width)
+        return self.value
+
+
+def bollinger(values, period, k=2.0):
+    """
+    Returns the arrays lower, middle and upper
+    """
+    values = _as_array(values)
+    if len(values) < period:
+        nans = np.full(len(values), np.nan)
+        return nans, nans.copy(), nans.copy()
+    ref, s, s_sq = _rolling_sums(values, period)
+    mean = s / period
+    var = s_sq / period - mean * mean
+    width = k * np.sqrt(np.maximum(var, 0.0))
+    middle = ref + mean
+    n = len(values)
+    return (_padded(middle - width, n), _padded(middle, n),
+        _padded(middle + width, n))
+
+
+class EMA(object):
+    """
+    Exponential moving average with alpha = 2 / (period + 1), which
+    starts at the first price
+    Attributes:
+        value: current average or None before the first price
+    """
+    def __init__(self, period):
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, price):
+        if self.value is None:
+            self.value = price
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+def ema(values, period):
+    values = _as_array(values)
+    alpha = 2.0 / (period + 1)
+    result = np.empty(len(values))
+    value = None
+    for i, price in enumerate(values.tolist()):
+        if value is None:
+            value = price
+        else:
+            value += alpha * (price - value)
+        result[i] = value
+    return result
+
+
+class Wilder(object):
+    """
+    Wilder's smoothing as used by RSI and ATR: the mean of the first
+    period values, then value = (value * (period - 1) + x) / period
+    Attributes:
+        value: current value or None
+    """
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def update(self, x):
+        if self.value is not None:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+        else:
+            self.count += 1
+            self.total += x
+            if self.count == self.period:
+                self.value = self.total / self.period
+        return self.value
+
+
+def _wilder(values, period):
+    result = np.full(len(values), np.nan)
+    wilder = Wilder(period)
+    for i, x in enumerate(values.tolist()):
+        value = wilder.update(x)
+        if value is not None:
+            result[i] = value
+    return result
+
+
+class RSI(object):
+    """
+    Relative strength index with Wilder's smoothing of the gains and
+    losses of the last period price changes. It needs period + 1
+    prices.
+    Attributes:
+        value: current RSI between 0 and 100 or None
+    """
+    def __init__(self, period=14):
+        self.gains = Wilder(period)
+        self.losses = Wilder(period)
+        self.last = None
+        self.value = None
+
+    def update(self, price):
+        if self.last is not None:
+            change = price - self.last
+            gain = self.gains.update(change if change > 0.0 else 0.0)
+            loss = self.losses.update(-change if change < 0.0 else 0.0)
+            if gain is not None:
+                if loss == 0.0:
+                    self.value = 100.0
+                else:
+                    self.value = 100.0 - 100.0 / (1.0 + gain / loss)
+        self.last = price
+        return self.value
+
+
+def rsi(values, period=14):
+    values = _as_array(values)
+    result = np.full(len(values), np.nan)
+    if len(values) < 2:
+        return result
+    change = values[1:] - values[:-1]
+    gain = _wilder(np.where(change > 0.0, change, 0.0), period)
+    loss = _wilder(np.where(change < 0.0, -change, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100.0 - 100.0 / (1.0 + gain / loss)
+    result[1:] = np.where(loss == 0.0, 100.0, value)
+    result[1:][np.isnan(gain)] = np.nan
+    return result
+
+
+class ATR(object):
+    """
+    Average true range of bars with Wilder's smoothing. The true range
+    of the first bar is high - low.
+    Attributes:
+        value: current ATR or None
+    """
+    def __init__(self, period=14):
+        self.wilder = Wilder(period)
+        self.close = None
+        self.value = None
+
+    def update(self, high, low, close):
+        true_range = high - low
+        if self.close is not None:
+            true_range = max(true_range, abs(high - self.close),
+                abs(low - self.close))
+        self.close = close
+        self.value = self.wilder.update(true_range)
+        return self.value
+
+    def update_bar(self, bar):
+        """
+        Takes the bid prices of a BarEvent
+        """
+        return self.update(bar.high_bid, bar.low_bid, bar.close_bid)
+
+
+def atr(high, low, close, period=14):
+    high = _as_array(high)
+    low = _as_array(low)
+    close = _as_array(close)
+    true_range = high - low
+    if len(close) > 1:
+        true_range[1:] = np.maximum(true_range[1:], np.maximum(
+            np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])))
+    return _wilder(true_range, period)
+
+
+class RollingMax(object):
+    """
+    Maximum of the last period prices. A deque holds the prices which
+    can still become the maximum in decreasing order, so an update
+    takes amortized O(1).
+    Attributes:
+        value: current maximum or None
+    """
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.window = deque()
+        self.value = None
+
+    def keep(self, old, new):
+        return old > new
+
+    def update(self, price):
+        window = self.window
+        keep = self.keep
+        while window and not keep(window[-1][1], price):
+            window.pop()
+        window.append((self.count, price))
+        if window[0][0] <= self.count - self.period:
+            window.popleft()
+        self.count += 1
+        if self.count >= self.period:
+            self.value = window[0][1]
+        return self.value
+
+
+class RollingMin(RollingMax):
+    """
+    Minimum of the last period prices, see RollingMax
+    """
+    def keep(self, old, new):
+        return old < new
+
+
+def _windows(values, period):
+    """
+    Returns a read-only view with the windows of length period as rows
+    """
+    stride = values.strides[0]
+    return np.lib.stride_tricks.as_strided(values,
+        shape=(len(values) - period + 1, period), strides=(stride, stride),
+        writeable=False)
+
+
+def rolling_max(values, period):
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    return _padded(_windows(values, period).max(axis=1), len(values))
+
+
+def rolling_min(values, period):
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    return _padded(_windows(values, period).min(axis=1), len(values))
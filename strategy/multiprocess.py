@@ -0,0 +1,207 @@
+import logging
+import threading
+import multiprocessing
+import Queue
+
+from quantfxengine.event.event import TickEvent, BarEvent, SignalEvent
+from quantfxengine.event.eventqueue import LocalEventQueue, \
+    ConflatingEventQueue
+
+# the attributes of a BarEvent in the order of its constructor
+BAR_FIELDS = ('instrument', 'time', 'interval',
+    'open_bid', 'high_bid', 'low_bid', 'close_bid',
+    'open_ask', 'high_ask', 'low_ask', 'close_ask', 'ticks')
+
+
+def encode_event(event):
+    """
+    Returns a tuple of the class and the attributes of a TickEvent or
+    BarEvent, which is much cheaper to pickle than the event
+    """
+    cls = event.__class__
+    if isinstance(event, TickEvent):
+        return (cls, event.created, event.instrument, event.time,
+            event.bid, event.ask)
+    return (cls, event.created) + tuple(
+        getattr(event, name) for name in BAR_FIELDS)
+
+
+def decode_event(message):
+    event = message[0](*message[2:])
+    # keep the creation time of the original event, so that the
+    # signals carry it as their origin
+    event.created = message[1]
+    return event
+
+
+def run_strategies(conn, group, synchronous):
+    """
+    The main function of a worker process. Creates the strategies of
+    group, feeds them the events which arrive on conn and sends their
+    signals back as a list of tuples (instrument, order_type, side,
+    origin), after every event if synchronous, else only if there
+    are any. Returns when it receives None.
+    """
+    events = LocalEventQueue()
+    strategies = [cls(events, **kwargs) for cls, kwargs in group]
+    recv = conn.recv
+    send = conn.send
+    while True:
+        message = recv()
+        if message is None:
+            break
+        event = decode_event(message)
+        for strategy in strategies:
+            strategy.calculate_signals(event)
+        if events or synchronous:
+            send([
+                (signal.instrument, signal.order_type, signal.side,
+                    signal.origin)
+                for signal in events
+            ])
+            events.clear()
+    conn.close()
+
+
+class StrategyProcesses(object):
+    """
+    Runs many strategies on the same ticks, each group of strategies
+    in its own process. It has the calculate_signals of a strategy, so
+    it can be given to trade() or backtest() instead of a single
+    strategy. calculate_signals sends the tick over a pipe to every
+    process, where the strategies of the group are created with their
+    own events queue. Their signals are sent back and put into the
+    events queue of the portfolio.
+    Strategies are given as tuples (class, kwargs) and are created as
+    cls(events, **kwargs), so that CPU-heavy strategies run on their
+    own cores instead of on the thread of the trading loop.
+    Attributes:
+        events: the events queue of the portfolio
+        groups: list of groups, every group is a list of
+            (class, kwargs) which run in one process
+        synchronous: if True, calculate_signals waits until all
+            processes have handled the tick and puts their signals
+            into events in the order of the groups, so that backtests
+            give the same results on every run. Else a thread per
+            process puts the signals into events when they arrive,
+            which needs a thread-safe events queue.
+        outboxes: if not synchronous, a ConflatingEventQueue of at
+            most max_pending events per process. calculate_signals
+            only puts the event into the outboxes and a sender thread
+            per process sends them, so a busy process never holds up
+            the trading loop. An event which finds the outbox full is
+            dropped.
+        conflate: if True, a newer tick replaces a waiting tick of the
+            same instrument in the outboxes, see the attribute
+            conflated of the queues. Off by default, since strategies
+            with indicators over the ticks then get other values than
+            in a synchronous backtest.
+        dropped: number of events dropped because an outbox was full
+    Call stop() at the end to terminate the processes.
+    """
+    def __init__(
+        self, events, groups, synchronous=False, max_pending=1000,
+        conflate=False
+    ):
+        self.events = events
+        self.groups = groups
+        self.synchronous = synchronous
+        self.conflate = conflate
+        self.processes = []
+        self.conns = []
+        self.receivers = []
+        self.outboxes = []
+        self.senders = []
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+        for group in groups:
+            conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_strategies,
+                args=(child_conn, group, synchronous))
+            process.daemon = True
+            process.start()
+            child_conn.close()
+            self.processes.append(process)
+            self.conns.append(conn)
+            if not synchronous:
+                receiver = threading.Thread(target=self.receive,
+                    args=(conn,))
+                receiver.daemon = True
+                receiver.start()
+                self.receivers.append(receiver)
+                outbox = ConflatingEventQueue(max_pending)
+                outbox.conflate = conflate
+                sender = threading.Thread(target=self.send,
+                    args=(conn, outbox))
+                sender.daemon = True
+                sender.start()
+                self.outboxes.append(outbox)
+                self.senders.append(sender)
+
+    def put_signals(self, signals):
+        for instrument, order_type, side, origin in signals:
+            self.events.put(SignalEvent(instrument, order_type, side,
+                origin=origin))
+
+    def receive(self, conn):
+        try:
+            while True:
+                self.put_signals(conn.recv())
+        except EOFError:
+            pass
+
+    def send(self, conn, outbox):
+        """
+        Sends the events of outbox to a process until it gets None
+        """
+        while True:
+            event = outbox.get()
+            try:
+                conn.send(None if event is None else encode_event(event))
+            except (IOError, OSError) as e:
+                self.logger.error("Strategy process is gone: %s", str(e))
+                return
+            if event is None:
+                return
+
+    def calculate_signals(self, event):
+        if not isinstance(event, (TickEvent, BarEvent)):
+            return
+        if not self.synchronous:
+            for outbox in self.outboxes:
+                try:
+                    outbox.put_nowait(event)
+                except Queue.Full:
+                    self.dropped += 1
+            return
+        message = encode_event(event)
+        for conn in self.conns:
+            conn.send(message)
+        for conn in self.conns:
+            self.put_signals(conn.recv())
+
+    def stop(self):
+        """
+        Terminates the processes after they have handled all ticks and
+        waits until all their signals are in events
+        """
+        if self.synchronous:
+            for conn in self.conns:
+                try:
+                    conn.send(None)
+                except (IOError, OSError) as e:
+                    self.logger.error("Strategy process is gone: %s",
+                        str(e))
+        for outbox in self.outboxes:
+            outbox.put(None)
+        for sender in self.senders:
+            sender.join()
+        if self.dropped:
+            self.logger.warning("Dropped %d events for the strategy "
+                "processes", self.dropped)
+        for process in self.processes:
+            process.join()
+        for receiver in self.receivers:
+            receiver.join()
+        for conn in self.conns:
+            conn.close()
@@ -10,11 +10,24 @@ class TestRandomStrategy(object):
         random.seed(5)
 
     def calculate_signals(self, event):
-        if event.type == 'TICK':
+        if event.type == 'TICK' or event.type == 'BAR':
             self.ticks += 1
             if self.ticks % 5 == 0:
                 side = random.choice(["buy", "sell"])
                 order = SignalEvent(
-                    event.instrument, "market", side
+                    event.instrument, "market", side,
+                    origin=event.created
                 )
                 self.events.put(order)
+
+    def get_state(self):
+        """
+        Returns the state of the strategy for a snapshot
+        """
+        return {'ticks': self.ticks, 'random': random.getstate()}
+
+    def set_state(self, state):
+        self.ticks = state['ticks']
+        # JSON turns the tuples of the random state into lists
+        version, internal, gauss_next = state['random']
+        random.setstate((version, tuple(internal), gauss_next))
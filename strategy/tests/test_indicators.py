@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from quantfxengine.strategy.indicators import *
+
+def stream(indicator, values):
+    """
+    Feeds values to a streaming indicator and returns its values as an
+    array with NaN for None
+    """
+    result = []
+    for value in values:
+        value = indicator.update(value)
+        result.append(np.nan if value is None else value)
+    return np.array(result)
+
+class Test_Indicators(unittest.TestCase):
+    """
+    Unit tests for the streaming indicators and their batch functions
+    """
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.prices = 1.24 + np.cumsum(random.normal(0, 1e-4, 2000))
+
+    def assertSame(self, streamed, batch):
+        # exactly equal, not only close
+        np.testing.assert_array_equal(streamed, batch)
+
+    def test_sma(self):
+        self.assertSame(stream(SMA(2), [1, 2, 3, 4]),
+            [np.nan, 1.5, 2.5, 3.5])
+        self.assertSame(stream(SMA(20), self.prices), sma(self.prices, 20))
+        np.testing.assert_allclose(sma(self.prices, 20)[19:],
+            np.convolve(self.prices, np.ones(20) / 20, 'valid'))
+
+    def test_rolling_std(self):
+        self.assertSame(stream(RollingStd(20), self.prices),
+            rolling_std(self.prices, 20))
+        self.assertAlmostEqual(rolling_std(self.prices, 20)[-1],
+            np.std(self.prices[-20:]), 12)
+
+    def test_rolling_std_long_stream(self):
+        """
+        the rounding errors do not grow with the length of the stream,
+        also when the prices move far away from the first one
+        """
+        random = np.random.RandomState(1)
+        prices = 1.24 + np.cumsum(random.normal(1e-4, 1e-4, 1000000))
+        indicator = RollingStd(20)
+        for price in prices:
+            indicator.update(price)
+        batch = rolling_std(prices, 20)
+        self.assertEqual(indicator.value, batch[-1])
+        ends = np.arange(19, len(prices), 997)
+        windows = prices[ends[:, np.newaxis] + np.arange(-19, 1)]
+        np.testing.assert_allclose(batch[ends], windows.std(axis=1),
+            rtol=1e-6)
+
+    def test_bollinger(self):
+        streamed = [value or (np.nan,) * 3
+            for value in map(Bollinger(20).update, self.prices)]
+        for band, batch in zip(zip(*streamed), bollinger(self.prices, 20)):
+            self.assertSame(np.array(band), batch)
+
+    def test_ema(self):
+        self.assertSame(stream(EMA(3), [1.0, 2.0, 2.0]), [1.0, 1.5, 1.75])
+        self.assertSame(stream(EMA(10), self.prices), ema(self.prices, 10))
+
+    def test_rsi(self):
+        self.assertSame(stream(RSI(2), [1.0, 2.0, 3.0, 2.0]),
+            [np.nan, np.nan, 100.0, 50.0])
+        self.assertSame(stream(RSI(14), self.prices), rsi(self.prices, 14))
+
+    def test_atr(self):
+        high = self.prices + 2e-4
+        low = self.prices - 1e-4
+        indicator = ATR(14)
+        streamed = [indicator.update(*bar) for bar in zip(high, low,
+            self.prices)]
+        streamed = np.array([np.nan if v is None else v for v in streamed])
+        self.assertSame(streamed, atr(high, low, self.prices, 14))
+
+    def test_rolling_min_max(self):
+        values = [3.0, 1.0, 2.0, 5.0, 4.0, 0.0]
+        self.assertSame(stream(RollingMax(3), values),
+            [np.nan, np.nan, 3.0, 5.0, 5.0, 5.0])
+        self.assertSame(stream(RollingMin(3), values),
+            [np.nan, np.nan, 1.0, 1.0, 2.0, 0.0])
+        self.assertSame(stream(RollingMax(50), self.prices),
+            rolling_max(self.prices, 50))
+        self.assertSame(stream(RollingMin(50), self.prices),
+            rolling_min(self.prices, 50))
+
+    def test_short_input(self):
+        self.assertEqual(len(sma([1.0], 5)), 1)
+        self.assertTrue(np.isnan(rolling_max([1.0], 5)[0]))
+
+if __name__ == '__main__':
+    unittest.main()
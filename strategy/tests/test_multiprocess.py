@@ -0,0 +1,101 @@
+import unittest
+import Queue
+
+from quantfxengine.event.event import TickEvent, BarEvent, SignalEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.strategy.multiprocess import StrategyProcesses
+
+class EveryNthStrategy(object):
+    """
+    Buys on every n-th tick or bar
+    """
+    def __init__(self, events, n, side="buy"):
+        self.events = events
+        self.n = n
+        self.side = side
+        self.ticks = 0
+
+    def calculate_signals(self, event):
+        self.ticks += 1
+        if self.ticks % self.n == 0:
+            self.events.put(SignalEvent(event.instrument, "market",
+                self.side, origin=event.created))
+
+class TaggedTickEvent(TickEvent):
+    pass
+
+class Test_StrategyProcesses(unittest.TestCase):
+    """
+    Unit tests for the class StrategyProcesses
+    """
+    def ticks(self, n):
+        return [TickEvent("EUR_USD", str(i), 1.0, 1.1) for i in range(n)]
+
+    def test_synchronous(self):
+        events = LocalEventQueue()
+        strategies = StrategyProcesses(events, [
+            [(EveryNthStrategy, {'n': 2}), (EveryNthStrategy, {'n': 3})],
+            [(EveryNthStrategy, {'n': 1, 'side': 'sell'})],
+        ], synchronous=True)
+        self.addCleanup(strategies.stop)
+        ticks = self.ticks(4)
+        signals = []
+        for tick in ticks:
+            strategies.calculate_signals(tick)
+            signals.append([(s.side, s.origin) for s in events])
+            events.clear()
+        self.assertEqual(signals, [
+            [('sell', ticks[0].created)],
+            [('buy', ticks[1].created), ('sell', ticks[1].created)],
+            [('buy', ticks[2].created), ('sell', ticks[2].created)],
+            [('buy', ticks[3].created), ('sell', ticks[3].created)],
+        ])
+
+    def test_bar(self):
+        events = LocalEventQueue()
+        strategies = StrategyProcesses(events,
+            [[(EveryNthStrategy, {'n': 1})]], synchronous=True)
+        self.addCleanup(strategies.stop)
+        strategies.calculate_signals(BarEvent("EUR_CHF", "t", 60,
+            1, 2, 0.5, 1.5, 1.1, 2.1, 0.6, 1.6, 7))
+        self.assertEqual(events.get().instrument, "EUR_CHF")
+
+    def test_asynchronous(self):
+        events = Queue.Queue()
+        strategies = StrategyProcesses(events, [
+            [(EveryNthStrategy, {'n': 2})],
+            [(EveryNthStrategy, {'n': 5})],
+        ])
+        for tick in self.ticks(10):
+            strategies.calculate_signals(tick)
+        strategies.stop()
+        self.assertEqual(events.qsize(), 7)
+        self.assertEqual(strategies.outboxes[0].conflated, 0)
+
+    def test_conflate(self):
+        """
+        every tick reaches the process or is counted as conflated or
+        dropped
+        """
+        events = Queue.Queue()
+        strategies = StrategyProcesses(events,
+            [[(EveryNthStrategy, {'n': 1})]], max_pending=1, conflate=True)
+        for tick in self.ticks(1000):
+            strategies.calculate_signals(tick)
+        strategies.stop()
+        self.assertEqual(events.qsize() + strategies.outboxes[0].conflated +
+            strategies.dropped, 1000)
+        # a tick which replaces a waiting one fits into a full outbox
+        self.assertEqual(strategies.dropped, 0)
+
+    def test_tick_subclass(self):
+        events = LocalEventQueue()
+        strategies = StrategyProcesses(events,
+            [[(EveryNthStrategy, {'n': 1})]], synchronous=True)
+        self.addCleanup(strategies.stop)
+        strategies.calculate_signals(
+            TaggedTickEvent("EUR_CHF", "t", 1.0, 1.1))
+        self.assertEqual(events.get().instrument, "EUR_CHF")
+
+if __name__ == '__main__':
+    unittest.main()
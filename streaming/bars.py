@@ -0,0 +1,204 @@
+"""
+Aggregation of ticks into OHLC bars. A BarAggregator sits between the
+price stream and the strategy and puts a BarEvent into the events
+queue whenever a bar closes. aggregate_ticks_to_bars() does the same
+offline for a whole tick file and writes the bars to a csv-file, which
+StreamingBarsFromFile replays without any ticks.
+"""
+
+import csv
+import sys
+import itertools
+import logging
+from collections import deque
+
+from quantfxengine.event.event import BarEvent
+from quantfxengine.streaming.marketstate import MarketState
+from quantfxengine.streaming.streaming import AbstractPriceStream, \
+    timestamp_to_epoch_ns, epoch_ns_to_timestamp, read_csv_rows
+from quantfxengine.streaming.tickfile import open_tick_file
+
+# columns of a bar file
+BAR_COLUMNS = [
+    'instrument', 'time', 'interval',
+    'open_bid', 'high_bid', 'low_bid', 'close_bid',
+    'open_ask', 'high_ask', 'low_ask', 'close_ask',
+    'ticks',
+]
+
+
+class BarAggregator(object):
+    """
+    Aggregates ticks into bars of interval seconds per instrument.
+    Bars start at multiples of interval since the epoch. A bar closes
+    with the first tick of the instrument after its end, so intervals
+    without ticks give no bars and the last bar stays open until
+    flush() is called.
+    Attributes:
+        events: queue into which the closed bars are put
+        interval: length of a bar in seconds
+        bars: dictionary of instrument and a ring buffer, a deque of
+            at most history BarEvents, with its last closed bars
+        current: dictionary of instrument and its open bar as a list
+            [start, open_bid, high_bid, low_bid, close_bid, open_ask,
+            high_ask, low_ask, close_ask, ticks, time format]
+    """
+    def __init__(self, events, interval, history=100):
+        self.events = events
+        self.interval = interval
+        self.interval_ns = int(round(interval * 1e9))
+        self.history = history
+        self.bars = {}
+        self.current = {}
+        self.logger = logging.getLogger(__name__)
+
+    def on_tick(self, tick_event):
+        """
+        Adds a TickEvent to the bar of its instrument
+        """
+        self.update(tick_event.instrument, tick_event.time,
+            tick_event.bid, tick_event.ask, tick_event.created)
+
+    def update(self, instrument, timestamp, bid, ask, origin=None):
+        """
+        Adds a tick to the bar of instrument. timestamp is a string as
+        in our csv-files or nanoseconds since the epoch as in a tick
+        store.
+        """
+        if isinstance(timestamp, basestring):
+            tick_ns = timestamp_to_epoch_ns(timestamp)
+            ns_format = False
+        else:
+            tick_ns = timestamp
+            ns_format = True
+        start = tick_ns - tick_ns % self.interval_ns
+        bar = self.current.get(instrument)
+        if bar is not None and bar[0] == start:
+            if bid > bar[2]:
+                bar[2] = bid
+            elif bid < bar[3]:
+                bar[3] = bid
+            bar[4] = bid
+            if ask > bar[6]:
+                bar[6] = ask
+            elif ask < bar[7]:
+                bar[7] = ask
+            bar[8] = ask
+            bar[9] += 1
+            return
+        if bar is not None:
+            self.close_bar(instrument, bar, origin)
+        self.current[instrument] = [
+            start, bid, bid, bid, bid, ask, ask, ask, ask, 1, ns_format
+        ]
+
+    def close_bar(self, instrument, bar, origin):
+        start = bar[0] if bar[10] else epoch_ns_to_timestamp(bar[0])
+        event = BarEvent(instrument, start, self.interval,
+            bar[1], bar[2], bar[3], bar[4],
+            bar[5], bar[6], bar[7], bar[8],
+            bar[9], origin=origin)
+        if instrument not in self.bars:
+            self.bars[instrument] = deque(maxlen=self.history)
+        self.bars[instrument].append(event)
+        self.events.put(event)
+
+    def flush(self):
+        """
+        Closes the open bars of all instruments
+        """
+        for instrument in sorted(self.current):
+            self.close_bar(instrument, self.current[instrument], None)
+        self.current = {}
+
+
+class BarWriter(object):
+    """
+    Writes the bars which are put into it to a csv-file with the
+    columns BAR_COLUMNS, so it can stand in for the events queue of a
+    BarAggregator
+    """
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.count = 0
+
+    def put(self, bar):
+        self.writer.writerow([getattr(bar, name) for name in BAR_COLUMNS])
+        self.count += 1
+
+
+def aggregate_ticks_to_bars(csv_file, bar_file, interval):
+    """
+    Aggregates the ticks of a csv-file, which may be compressed, into
+    bars of interval seconds and writes them to bar_file. The last
+    bar of every instrument is written, too.
+    Returns the number of bars.
+    """
+    with open(bar_file, 'wb') as f:
+        writer = BarWriter(f)
+        aggregator = BarAggregator(writer, interval, history=1)
+        update = aggregator.update
+        for instrument, timestamp, bid, ask in read_csv_rows(csv_file):
+            update(instrument, timestamp, bid, ask)
+        aggregator.flush()
+    return writer.count
+
+
+class StreamingBarsFromFile(AbstractPriceStream):
+    """
+    Replays a bar file written by aggregate_ticks_to_bars(), e.g. for
+    backtests of strategies which only need bars. The bars are
+    replayed as BarEvents instead of TickEvents and cur_prices holds
+    the closing prices of the last bar of every instrument.
+    """
+    def __init__(self, bar_file, events_queue, stoprequest):
+        self.bar_file = bar_file
+        self.events_queue = events_queue
+        self.cur_prices = {}
+        self.stoprequest = stoprequest
+        self.logger = logging.getLogger(__name__)
+
+    def iter_bars(self):
+        """
+        Generator which yields the bars of the file as BarEvents
+        """
+        f = open_tick_file(self.bar_file)
+        try:
+            for row in csv.reader(f):
+                prices = [float(price) for price in row[3:11]]
+                yield BarEvent(row[0], row[1], float(row[2]),
+                    *(prices + [int(row[11])]))
+        finally:
+            f.close()
+
+    def iter_ticks(self, start=0):
+        """
+        Generator which updates cur_prices and yields the BarEvents,
+        so that the bar file can be used in backtest() like a tick
+        file. The first start bars are skipped.
+        """
+        for bar in itertools.islice(self.iter_bars(), start, None):
+            if bar.instrument in self.cur_prices:
+                self.cur_prices[bar.instrument].update_bid_ask(
+                    bar.close_bid, bar.close_ask)
+            else:
+                self.cur_prices[bar.instrument] = MarketState(
+                    bar.close_bid, bar.close_ask)
+            yield bar
+
+    def stream_to_queue(self):
+        try:
+            for bar in self.iter_ticks():
+                if self.stoprequest.isSet():
+                    break
+                self.events_queue.put(bar)
+        except Exception as e:
+            self.logger.critical("Caught exception while reading from bar file %s\n", str(e))
+
+
+if __name__ == "__main__":
+    # python -m quantfxengine.streaming.bars ticks.csv bars.csv 60
+    if len(sys.argv) != 4:
+        sys.exit("usage: bars.py csv_file bar_file interval")
+    print aggregate_ticks_to_bars(
+        sys.argv[1], sys.argv[2], float(sys.argv[3])), "bars"
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class PriceHistory(object):
+    """
+    The last size ticks of one instrument in preallocated numpy
+    arrays. Every array has room for 2 * size values and each tick is
+    written to position i and i + size, so the last n ticks are always
+    one contiguous slice. timestamps(), bids() and asks() return them
+    as read-only views without copying. A view shows the ticks at the
+    time it was taken only until the next size - n ticks have been
+    appended, so components should take new views on every tick
+    instead of keeping them.
+    Attributes:
+        size: maximal number of ticks
+        count: number of ticks appended so far
+    """
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.pos = 0
+        self.timestamp_buffer = np.zeros(2 * size, dtype=np.int64)
+        self.bid_buffer = np.zeros(2 * size, dtype=np.float64)
+        self.ask_buffer = np.zeros(2 * size, dtype=np.float64)
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, timestamp, bid, ask):
+        """
+        Adds a tick, timestamp is in nanoseconds since the epoch
+        """
+        pos = self.pos
+        mirror = pos + self.size
+        self.timestamp_buffer[pos] = self.timestamp_buffer[mirror] = timestamp
+        self.bid_buffer[pos] = self.bid_buffer[mirror] = bid
+        self.ask_buffer[pos] = self.ask_buffer[mirror] = ask
+        pos += 1
+        self.pos = 0 if pos == self.size else pos
+        self.count += 1
+
+    def view(self, buffer, n=None):
+        length = len(self)
+        if n is None or n > length:
+            n = length
+        end = self.pos + self.size
+        view = buffer[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self, n=None):
+        """
+        Returns the timestamps of the last n ticks, of all if n is None,
+        the oldest first
+        """
+        return self.view(self.timestamp_buffer, n)
+
+    def bids(self, n=None):
+        return self.view(self.bid_buffer, n)
+
+    def asks(self, n=None):
+        return self.view(self.ask_buffer, n)
+
+
+class PriceHistories(dict):
+    """
+    A dictionary of instrument and PriceHistory, which creates the
+    history of an instrument with its first tick
+    Attributes:
+        size: number of ticks per instrument
+    """
+    def __init__(self, size):
+        dict.__init__(self)
+        self.size = size
+
+    def __missing__(self, instrument):
+        history = self[instrument] = PriceHistory(self.size)
+        return history
+
+    def append(self, instrument, timestamp, bid, ask):
+        self[instrument].append(timestamp, bid, ask)
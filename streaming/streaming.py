@@ -1,14 +1,77 @@
 import requests
-import json
+import os
 import csv
 import time
+import heapq
+import itertools
+import calendar
 import logging
 
 from abc import ABCMeta, abstractmethod #abstract base classes
 
 from quantfxengine.streaming.marketstate import MarketState
+from quantfxengine.streaming.tickdecoder import TickStreamDecoder
+from quantfxengine.streaming.tickfile import open_tick_file
 from quantfxengine.event.event import TickEvent
 
+
+# seconds since the epoch of the hours seen by timestamp_to_epoch_ns,
+# since calendar.timegm is slow
+_hours = {}
+
+def timestamp_to_epoch_ns(timestamp):
+    """
+    Converts a timestamp in the form 2015-02-14T10:30:00.649678Z, as
+    sent by OANDA and stored in our csv-files, into nanoseconds since
+    the epoch
+    """
+    hour = timestamp[0:13]
+    start = _hours.get(hour)
+    if start is None:
+        start = calendar.timegm((
+            int(hour[0:4]), int(hour[5:7]), int(hour[8:10]),
+            int(hour[11:13]), 0, 0
+        ))
+        if len(_hours) >= 4096:
+            _hours.clear()
+        _hours[hour] = start
+    seconds = start + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+    if len(timestamp) == 27:
+        # microseconds as sent by OANDA
+        return seconds * 1000000000 + int(timestamp[20:26]) * 1000
+    fraction = timestamp[20:].rstrip('Z')
+    nanos = int(fraction.ljust(9, '0')[:9]) if fraction else 0
+    return seconds * 1000000000 + nanos
+
+
+def epoch_ns_to_timestamp(epoch_ns):
+    """
+    Converts nanoseconds since the epoch into a timestamp in the form
+    2015-02-14T10:30:00.649678Z, the inverse of timestamp_to_epoch_ns
+    up to microseconds
+    """
+    seconds, nanos = divmod(epoch_ns, 1000000000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + \
+        '.%06dZ' % (nanos // 1000)
+
+
+def read_csv_rows(csv_file, start=0):
+    """
+    Generator which yields the rows of a csv-file in the form
+    instrument,timestamp,bid,ask as tuples with float prices. The file
+    may be compressed, see open_tick_file(). It is closed when the
+    generator is exhausted or closed. The first start lines are
+    skipped without parsing them.
+    """
+    file=open_tick_file(csv_file)
+    try:
+        lines = itertools.islice(file, start, None) if start else file
+        for row in csv.reader(lines ,delimiter=','):
+            instrument, timestamp, bid, ask = row
+            yield instrument, timestamp, float(bid), float(ask)
+    finally:
+        file.close()
+
 class AbstractPriceStream(object):
     """
     This is an abstract class to provide an interface for Streaming
@@ -21,8 +84,11 @@ class AbstractPriceStream(object):
             one)
         stream_to_queue(): which throws price events into the queue
             of events
+        history: None or PriceHistories with the last ticks of every
+            instrument, see keep_history()
     """
     __metaclass__ = ABCMeta
+    history = None
 
     @abstractmethod
     def __init__(
@@ -36,15 +102,37 @@ class AbstractPriceStream(object):
     def stream_to_queue(self):
         raise NotImplementedError()
 
+    def disconnect(self):
+        """
+        Called after the stoprequest has been set, to stop a
+        stream_to_queue which is blocked waiting for prices
+        """
+        pass
+
+    def keep_history(self, size):
+        """
+        Keeps the last size ticks of every instrument in history, so
+        that strategies, the portfolio and other components can share
+        them instead of keeping their own copies. Call this before
+        streaming.
+        """
+        from quantfxengine.streaming.pricehistory import PriceHistories
+        self.history = PriceHistories(size)
+
 
 class StreamingForexPrices_OANDA(AbstractPriceStream):
     """
     A class to connect to the broker and stream prices
+    Attributes:
+        chunk_size: maximal number of bytes we read at once. We get
+            every chunk as soon as the broker has sent it, so this
+            does not delay ticks.
+        secure: use https, only switched off for testing
     """
     def __init__(
         self, domain, access_token,
         account_id, instruments, events_queue,
-        stoprequest
+        stoprequest, chunk_size=65536, secure=True
     ):
         self.domain = domain
         self.access_token = access_token
@@ -52,16 +140,20 @@ class StreamingForexPrices_OANDA(AbstractPriceStream):
         self.instruments = instruments
         self.events_queue = events_queue
         self.stoprequest = stoprequest
+        self.chunk_size = chunk_size
+        self.secure = secure
         #set up current market state per instrument
         self.cur_prices = {}
         for instr in instruments:
             self.cur_prices[instr]=MarketState(None,None)
+        self.response = None
         self.logger = logging.getLogger(__name__)
 
     def connect_to_stream(self):
         try:
             s = requests.Session()
-            url = "https://" + self.domain + "/v1/prices"
+            scheme = "https://" if self.secure else "http://"
+            url = scheme + self.domain + "/v1/prices"
             headers = {'Authorization' : 'Bearer ' + str(self.access_token)}
             params = {'instruments' : ','.join(self.instruments), 'accountId' : self.account_id}
             req = requests.Request('GET', url, headers=headers, params=params)
@@ -72,79 +164,246 @@ class StreamingForexPrices_OANDA(AbstractPriceStream):
             s.close()
             self.logger.critical("Caught exception when connecting to stream %s\n", str(e))
 
+    def disconnect(self):
+        # closing the response makes iter_content return at once
+        # instead of after the next message
+        response = self.response
+        if response is not None:
+            self.logger.debug("Closing Session")
+            response.close()
+
     def stream_to_queue(self):
         response = self.connect_to_stream()
-        if response.status_code != 200:
+        if response is None or response.status_code != 200:
             return
-        for line in response.iter_lines(1):
-            # check if we have received a stoprequest
-            if self.stoprequest.isSet():
-                self.logger.debug("Closing Session")
-                response.close()
-                break
-            if line:
+        self.response = response
+        decoder = TickStreamDecoder()
+        try:
+            for chunk in response.iter_content(self.chunk_size):
+                # check if we have received a stoprequest
+                if self.stoprequest.isSet():
+                    self.logger.debug("Closing Session")
+                    response.close()
+                    break
                 try:
-                    msg = json.loads(line)
-                except Exception as e:
+                    ticks = decoder.feed(chunk)
+                except ValueError as e:
                     self.logger.error("Caught exception when converting message into json %s\n", str(e))
                     return
-                if msg.has_key("instrument") or msg.has_key("tick"):
-                    self.logger.debug(msg)
-                    instrument = msg["tick"]["instrument"]
-                    time = msg["tick"]["time"]
-                    bid = msg["tick"]["bid"]
-                    ask = msg["tick"]["ask"]
+                for instrument, time, bid, ask in ticks:
                     self.cur_prices[instrument].update_bid_ask(bid,ask)
+                    if self.history is not None:
+                        self.history.append(instrument,
+                            timestamp_to_epoch_ns(time), bid, ask)
                     tev = TickEvent(instrument, time, bid, ask)
                     self.events_queue.put(tev)
+        except Exception as e:
+            # disconnect() closes the response under our feet
+            if not self.stoprequest.isSet():
+                self.logger.critical("Caught exception while streaming prices %s\n", str(e))
+
+
+class ReplayPriceStream(AbstractPriceStream):
+    """
+    A base class for price streams which replay recorded ticks, e.g.
+    for backtesting. Subclasses implement iter_rows().
+    Attributes:
+        speed: None replays the ticks as fast as possible, 1.0 replays
+            them in real time paced by the timestamps of the ticks and
+            N replays them with an N times accelerated clock
+        max_pending: if not None, we wait until fewer than max_pending
+            events are in the queue before we put the next tick, so
+            that we do not overrun the trading loop
+    """
+    @abstractmethod
+    def iter_rows(self):
+        """
+        Generator which yields the recorded ticks as tuples
+        (instrument, timestamp, bid, ask) with float prices
+        """
+        raise NotImplementedError()
+
+    def timestamp_ns(self, timestamp):
+        """
+        Converts a timestamp from iter_rows() into nanoseconds since
+        the epoch
+        """
+        return timestamp_to_epoch_ns(timestamp)
+
+    def wait_for_queue(self):
+        """
+        Blocks while the queue holds max_pending events or more.
+        We do not use a bounded Queue.Queue for this, since the
+        trading loop puts its own events into the same queue and
+        would deadlock on a full queue.
+        """
+        while self.events_queue.qsize() >= self.max_pending:
+            if self.stoprequest.isSet():
+                return
+            time.sleep(.001)
+
+    def update_cur_prices(self, instrument, timestamp, bid, ask):
+        #update cur_prices if it exists for this instrument, else create it
+        if instrument in self.cur_prices:
+            self.cur_prices[instrument].update_bid_ask(bid,ask)
+        else:
+            self.cur_prices[instrument] = MarketState(bid,ask)
+        if self.history is not None:
+            self.history.append(instrument, self.timestamp_ns(timestamp),
+                bid, ask)
+
+    def iter_rows_from(self, start):
+        """
+        Like iter_rows(), but skips the first start rows, e.g. to
+        resume a backtest from a snapshot. Subclasses override it if
+        they can skip rows faster than by reading them.
+        """
+        return itertools.islice(self.iter_rows(), start, None)
 
+    def iter_ticks(self, start=0):
+        """
+        Generator which updates cur_prices and yields a TickEvent per
+        row without any pacing. This is used by the synchronous
+        backtest. The first start rows are skipped.
+        """
+        rows = self.iter_rows_from(start) if start else self.iter_rows()
+        for instrument, timestamp, bid, ask in rows:
+            self.update_cur_prices(instrument, timestamp, bid, ask)
+            yield TickEvent(instrument, timestamp, bid, ask)
 
-class StreamingPricesFromFile(AbstractPriceStream):
+    def stream_to_queue(self):
+        start_ns = None
+        try:
+            for instrument, timestamp, bid, ask in self.iter_rows():
+                # check if we have received a stoprequest
+                if self.stoprequest.isSet():
+                    break
+                if self.speed:
+                    #sleep until the tick is due on the replay clock
+                    tick_ns = self.timestamp_ns(timestamp)
+                    if start_ns is None:
+                        start_ns = tick_ns
+                        start_wall = time.time()
+                    delay = start_wall - time.time() + \
+                        (tick_ns - start_ns) / (1e9 * self.speed)
+                    if delay > 0:
+                        self.stoprequest.wait(delay)
+                if self.max_pending is not None:
+                    self.wait_for_queue()
+                self.update_cur_prices(instrument, timestamp, bid, ask)
+                tev = TickEvent(instrument, timestamp, bid, ask)
+                self.events_queue.put(tev)
+        except Exception as e:
+            self.logger.critical("Caught exception while reading from backtesting file %s\n", str(e))
+            return
+
+
+class StreamingPricesFromFile(ReplayPriceStream):
     """
     A class for reading in csv-files and backtesting.
     The csv-file has to be in the form
     instrument,timestamp,bid,ask
+    and may be compressed, see open_tick_file().
+    See ReplayPriceStream for speed and max_pending.
     """
-    def __init__(self, csv_file, events_queue, stoprequest):
+    def __init__(
+        self, csv_file, events_queue, stoprequest,
+        speed=None, max_pending=None
+    ):
         self.csv_file=csv_file
         self.events_queue = events_queue
         self.cur_prices = {}
         self.stoprequest = stoprequest
+        self.speed = speed
+        self.max_pending = max_pending
         self.logger = logging.getLogger(__name__)
 
+    def iter_rows(self):
+        return read_csv_rows(self.csv_file)
+
+    def iter_rows_from(self, start):
+        return read_csv_rows(self.csv_file, start)
+
     def stream_to_queue(self):
         #check if file exists
         try:
-            f=open(self.csv_file, 'rb')
+            f=open_tick_file(self.csv_file)
             f.close()
         except Exception as e:
             self.logger.critical("Caught exception while opening backtesting file %s\n", str(e))
             return
+        ReplayPriceStream.stream_to_queue(self)
+
+
+class StreamingPricesFromFiles(ReplayPriceStream):
+    """
+    Replays many csv-files, e.g. one per instrument and day, merged by
+    the timestamps of their ticks. Every file has to be in the form
+    instrument,timestamp,bid,ask and sorted by time and may be
+    compressed, see open_tick_file(). Ticks with equal
+    timestamps are replayed in the order of the files.
+    We only read the first tick of every file in advance and open a
+    file when the replay reaches its first tick, so only the files
+    which overlap in time are open at once and no file is loaded into
+    memory.
+    See ReplayPriceStream for speed and max_pending.
+    Attributes:
+        csv_files: list of csv-files. A directory stands for all files
+            in it, sorted by name.
+    """
+    def __init__(
+        self, csv_files, events_queue, stoprequest,
+        speed=None, max_pending=None
+    ):
+        if isinstance(csv_files, basestring):
+            csv_files = [csv_files]
+        self.csv_files = []
+        for path in csv_files:
+            if os.path.isdir(path):
+                self.csv_files.extend(sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if not name.startswith('.')
+                ))
+            else:
+                self.csv_files.append(path)
+        self.events_queue = events_queue
+        self.cur_prices = {}
+        self.stoprequest = stoprequest
+        self.speed = speed
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
 
-        #open file and read from it
-        file=open(self.csv_file, 'rb')
+    def iter_rows(self):
+        # files which are not open yet, by the time of their first tick
+        waiting = []
+        for index, csv_file in enumerate(self.csv_files):
+            rows = read_csv_rows(csv_file)
+            for row in rows:
+                waiting.append((self.timestamp_ns(row[1]), index, csv_file))
+                rows.close()
+                break
+        heapq.heapify(waiting)
+        # the next tick of every open file
+        heap = []
         try:
-            for row in csv.reader(file ,delimiter=','):
-                # check if we have received a stoprequest
-                if self.stoprequest.isSet():
+            while heap or waiting:
+                while waiting and (not heap or waiting[0][0] <= heap[0][0]):
+                    tick_ns, index, csv_file = heapq.heappop(waiting)
+                    rows = read_csv_rows(csv_file)
+                    for row in rows:
+                        heapq.heappush(heap, (tick_ns, index, row, rows))
+                        break
+                tick_ns, index, row, rows = heap[0]
+                yield row
+                for row in rows:
+                    heapq.heapreplace(heap,
+                        (self.timestamp_ns(row[1]), index, row, rows))
                     break
-                instrument, timestamp, bid, ask = row
-                #update cur_prices if it exists for this instrument, else create it
-                bid = float(bid)
-                ask = float(ask)
-                if instrument in self.cur_prices:
-                    self.cur_prices[instrument].update_bid_ask(bid,ask)
                 else:
-                    self.cur_prices[instrument] = MarketState(bid,ask)
-                tev = TickEvent(instrument, timestamp, bid, ask)
-                self.events_queue.put(tev)
-                time.sleep(.05)
-                #do not flood the queue
-        except Exception as e:
-            self.logger.critical("Caught exception while reading from backtesting file %s\n", str(e))
-            return
+                    heapq.heappop(heap)
         finally:
-            file.close()
+            for tick_ns, index, row, rows in heap:
+                rows.close()
 
 
 class MockPriceStream(AbstractPriceStream):
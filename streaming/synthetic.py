@@ -0,0 +1,209 @@
+"""
+Synthetic ticks for load tests. The mid price of every instrument
+follows a geometric Brownian motion, the ticks of every instrument
+arrive as a Poisson process and the spread is a minimal spread plus
+an exponentially distributed widening. The ticks are generated with
+numpy in chunks, so any number of them can be written to a csv-file,
+replayed by a price stream or loaded as TickArrays without holding
+more than a chunk in memory.
+"""
+
+import gzip
+import sys
+import logging
+
+import numpy as np
+
+from quantfxengine.streaming.streaming import ReplayPriceStream
+from quantfxengine.streaming.tickdata import TickArrays
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+# 2015-02-14T10:30:00Z
+DEFAULT_START = 1423909800 * 1000000000
+
+
+def instrument_names(count):
+    return ["S%03d_USD" % i for i in range(count)]
+
+
+class SyntheticTicks(object):
+    """
+    A generator of synthetic ticks. The parameters besides
+    instruments, start, seed and chunk_size are scalars or sequences
+    with a value per instrument.
+    Attributes:
+        instruments: list of instrument names, or the number of
+            instruments which are named S000_USD, S001_USD, ...
+        price: mid price at the start
+        volatility: annual volatility of the mid price, e.g. 0.1
+        drift: annual drift of the mid price
+        intensity: mean number of ticks per second
+        spread_pips: minimal spread in pips
+        spread_jitter_pips: mean widening of the spread in pips
+        pip: size of a pip, e.g. 0.0001 or 0.01 for JPY
+        decimals: the prices are rounded to this number of decimals
+        start: time of the start in nanoseconds since the epoch
+        seed: seed of the random numbers, None for a random seed
+        chunk_size: number of ticks generated at once
+    The state, i.e. the time and the mid prices, moves on with every
+    chunk, so successive calls continue the same streams.
+    """
+    def __init__(
+        self, instruments=1, price=1.2, volatility=0.1, drift=0.0,
+        intensity=10.0, spread_pips=1.0, spread_jitter_pips=0.5,
+        pip=0.0001, decimals=5, start=DEFAULT_START, seed=None,
+        chunk_size=1 << 20
+    ):
+        if isinstance(instruments, (int, long)):
+            instruments = instrument_names(instruments)
+        self.instruments = list(instruments)
+        k = len(self.instruments)
+        per_instrument = lambda value: np.broadcast_to(
+            np.asarray(value, dtype=np.float64), (k,)).copy()
+        self.volatility = per_instrument(volatility)
+        self.drift = per_instrument(drift)
+        self.intensity = per_instrument(intensity)
+        self.spread_pips = per_instrument(spread_pips)
+        self.spread_jitter_pips = per_instrument(spread_jitter_pips)
+        self.pip = per_instrument(pip)
+        self.decimals = np.broadcast_to(np.asarray(decimals), (k,)).copy()
+        self.chunk_size = chunk_size
+        self.random = np.random.RandomState(seed)
+        # the state of the streams
+        self.time = start
+        self.log_mid = np.log(per_instrument(price))
+        self.last_time = np.full(k, start, dtype=np.int64)
+
+    def generate(self, n):
+        """
+        Returns the next n ticks as TickArrays
+        """
+        random = self.random
+        total_intensity = self.intensity.sum()
+        # a merge of Poisson processes is a Poisson process whose ticks
+        # belong to an instrument with a probability proportional to
+        # its intensity
+        gaps = random.exponential(1e9 / total_intensity, n)
+        timestamps = self.time + np.cumsum(gaps).astype(np.int64)
+        ids = random.choice(len(self.instruments), n,
+            p=self.intensity / total_intensity).astype(np.int32)
+        if n:
+            self.time = timestamps[-1]
+
+        # the mid prices, per instrument in a stable sort by id
+        order = np.argsort(ids, kind='mergesort')
+        sorted_ids = ids[order]
+        sorted_times = timestamps[order]
+        first = np.ones(n, dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        previous = np.empty(n, dtype=np.int64)
+        previous[1:] = sorted_times[:-1]
+        previous[first] = self.last_time[sorted_ids[first]]
+        dt = (sorted_times - previous) / (1e9 * SECONDS_PER_YEAR)
+        sigma = self.volatility[sorted_ids]
+        steps = (self.drift[sorted_ids] - 0.5 * sigma * sigma) * dt + \
+            sigma * np.sqrt(dt) * random.standard_normal(n)
+        sums = np.cumsum(steps)
+        starts = np.flatnonzero(first)
+        before = (sums[starts] - steps[starts])[np.cumsum(first) - 1]
+        log_mids = self.log_mid[sorted_ids] + sums - before
+        lasts = np.append(starts[1:] - 1, n - 1) if n else starts
+        self.log_mid[sorted_ids[lasts]] = log_mids[lasts]
+        self.last_time[sorted_ids[lasts]] = sorted_times[lasts]
+        mids = np.empty(n)
+        mids[order] = np.exp(log_mids)
+
+        half_spread = 0.5 * self.pip[ids] * (self.spread_pips[ids] +
+            random.exponential(1.0, n) * self.spread_jitter_pips[ids])
+        bids = mids - half_spread
+        asks = mids + half_spread
+        for decimals in np.unique(self.decimals):
+            rounded = self.decimals[ids] == decimals
+            bids[rounded] = np.round(bids[rounded], decimals)
+            asks[rounded] = np.round(asks[rounded], decimals)
+        return TickArrays(self.instruments, ids, timestamps, bids, asks)
+
+    def iter_chunks(self, n):
+        """
+        Generator which yields n ticks as TickArrays of chunk_size ticks
+        """
+        while n > 0:
+            size = min(n, self.chunk_size)
+            yield self.generate(size)
+            n -= size
+
+    def write_csv(self, csv_file, n):
+        """
+        Writes n ticks into a csv-file in the form
+        instrument,timestamp,bid,ask, compressed with gzip if the name
+        ends with .gz. Returns the number of ticks.
+        """
+        opener = gzip.open if csv_file.endswith('.gz') else open
+        with opener(csv_file, 'wb') as f:
+            for ticks in self.iter_chunks(n):
+                names = np.array(ticks.instruments)[ticks.instrument_ids]
+                timestamps = np.datetime_as_string(
+                    ticks.timestamps.astype('datetime64[ns]'), unit='us',
+                    timezone='UTC')
+                f.write(''.join([
+                    '%s,%s,%r,%r\n' % row for row in zip(names.tolist(),
+                        timestamps.tolist(), ticks.bids.tolist(),
+                        ticks.asks.tolist())
+                ]))
+        return n
+
+
+def synthetic_tick_arrays(n, **kwargs):
+    """
+    Returns n ticks of SyntheticTicks(**kwargs) as TickArrays in
+    memory, e.g. for vectorized backtests
+    """
+    ticks = SyntheticTicks(**kwargs)
+    chunks = list(ticks.iter_chunks(n))
+    if not chunks:
+        return ticks.generate(0)
+    return TickArrays(ticks.instruments,
+        *[np.concatenate([getattr(chunk, name) for chunk in chunks])
+            for name in ['instrument_ids', 'timestamps', 'bids', 'asks']])
+
+
+class StreamingSyntheticPrices(ReplayPriceStream):
+    """
+    A price stream which replays n ticks of a SyntheticTicks without
+    any file. The time of the TickEvents is given in nanoseconds since
+    the epoch. See ReplayPriceStream for speed and max_pending.
+    """
+    def __init__(
+        self, ticks, n, events_queue, stoprequest,
+        speed=None, max_pending=None
+    ):
+        self.ticks = ticks
+        self.n = n
+        self.events_queue = events_queue
+        self.cur_prices = {}
+        self.stoprequest = stoprequest
+        self.speed = speed
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+
+    def timestamp_ns(self, timestamp):
+        return timestamp
+
+    def iter_rows(self):
+        for chunk in self.ticks.iter_chunks(self.n):
+            names = chunk.instruments
+            ids = chunk.instrument_ids.tolist()
+            timestamps = chunk.timestamps.tolist()
+            bids = chunk.bids.tolist()
+            asks = chunk.asks.tolist()
+            for i in xrange(len(ids)):
+                yield names[ids[i]], timestamps[i], bids[i], asks[i]
+
+
+if __name__ == "__main__":
+    # python -m quantfxengine.streaming.synthetic ticks.csv 10000000 20
+    if len(sys.argv) not in (3, 4):
+        sys.exit("usage: synthetic.py csv_file ticks [instruments]")
+    instruments = int(sys.argv[3]) if len(sys.argv) == 4 else 1
+    print SyntheticTicks(instruments, seed=1).write_csv(
+        sys.argv[1], int(sys.argv[2])), "ticks"
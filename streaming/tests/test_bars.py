@@ -0,0 +1,91 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+
+from quantfxengine.event.event import TickEvent, BarEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.streaming.bars import BarAggregator, \
+    aggregate_ticks_to_bars, StreamingBarsFromFile
+
+TICKS = [
+    ('EUR_USD', '2015-02-14T10:30:00.500000Z', 1.2, 1.3),
+    ('EUR_USD', '2015-02-14T10:30:20.000000Z', 1.4, 1.5),
+    ('EUR_CHF', '2015-02-14T10:30:30.000000Z', 1.0, 1.1),
+    ('EUR_USD', '2015-02-14T10:30:40.000000Z', 1.1, 1.2),
+    ('EUR_USD', '2015-02-14T10:30:59.999999Z', 1.3, 1.4),
+    ('EUR_USD', '2015-02-14T10:31:00.000000Z', 1.5, 1.6),
+]
+
+class Test_BarAggregator(unittest.TestCase):
+    """
+    Unit tests for the class BarAggregator
+    """
+    def setUp(self):
+        self.events = LocalEventQueue()
+        self.aggregator = BarAggregator(self.events, 60, history=2)
+
+    def test_ohlc(self):
+        for tick in TICKS:
+            self.aggregator.on_tick(TickEvent(*tick))
+        self.assertEqual(len(self.events), 1)
+        bar = self.events.get()
+        self.assertIsInstance(bar, BarEvent)
+        self.assertEqual(bar.instrument, 'EUR_USD')
+        self.assertEqual(bar.time, '2015-02-14T10:30:00.000000Z')
+        self.assertEqual(
+            (bar.open_bid, bar.high_bid, bar.low_bid, bar.close_bid),
+            (1.2, 1.4, 1.1, 1.3))
+        self.assertEqual(
+            (bar.open_ask, bar.high_ask, bar.low_ask, bar.close_ask),
+            (1.3, 1.5, 1.2, 1.4))
+        self.assertEqual((bar.bid, bar.ask), (1.3, 1.4))
+        self.assertEqual(bar.ticks, 4)
+        self.aggregator.flush()
+        self.assertEqual([bar.instrument for bar in self.events],
+            ['EUR_CHF', 'EUR_USD'])
+        self.assertEqual(self.aggregator.current, {})
+
+    def test_ring_buffer(self):
+        for minute in range(5):
+            self.aggregator.update('EUR_USD',
+                '2015-02-14T10:3%d:00.000000Z' % minute, 1.0 + minute, 1.1)
+        bars = self.aggregator.bars['EUR_USD']
+        self.assertEqual([bar.time[11:16] for bar in bars],
+            ['10:32', '10:33'])
+
+    def test_epoch_ns(self):
+        """
+        bars of ticks from a tick store start at nanoseconds
+        """
+        self.aggregator.update('EUR_USD', 61 * 10**9 + 1, 1.0, 1.1)
+        self.aggregator.update('EUR_USD', 120 * 10**9, 1.0, 1.1)
+        self.assertEqual(self.events.get().time, 60 * 10**9)
+
+
+class Test_StreamingBarsFromFile(unittest.TestCase):
+    """
+    Unit tests for aggregate_ticks_to_bars and StreamingBarsFromFile
+    """
+    def test_roundtrip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        csv_file = os.path.join(directory, 'ticks.csv')
+        bar_file = os.path.join(directory, 'bars.csv')
+        with open(csv_file, 'wb') as f:
+            for tick in TICKS:
+                f.write('%s,%s,%r,%r\n' % tick)
+        self.assertEqual(aggregate_ticks_to_bars(csv_file, bar_file, 60), 3)
+        events = LocalEventQueue()
+        prices = StreamingBarsFromFile(bar_file, events, threading.Event())
+        prices.stream_to_queue()
+        bars = list(events)
+        self.assertEqual([(bar.instrument, bar.ticks) for bar in bars],
+            [('EUR_USD', 4), ('EUR_CHF', 1), ('EUR_USD', 1)])
+        self.assertEqual(bars[0].low_bid, 1.1)
+        self.assertEqual(bars[0].interval, 60)
+        self.assertEqual(prices.cur_prices['EUR_USD'].bid, 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import os
+import Queue
+import threading
+
+import numpy as np
+
+from quantfxengine.streaming.pricehistory import PriceHistory
+from quantfxengine.streaming.streaming import StreamingPricesFromFile
+
+class Test_PriceHistory(unittest.TestCase):
+    """
+    Unit tests for the class PriceHistory
+    """
+    def test_wrap_around(self):
+        history = PriceHistory(3)
+        self.assertEqual(len(history.bids()), 0)
+        for i in range(7):
+            history.append(i, 1.0 + i, 2.0 + i)
+            self.assertEqual(history.timestamps().tolist(),
+                range(max(0, i - 2), i + 1))
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.count, 7)
+        self.assertEqual(history.bids(2).tolist(), [6.0, 7.0])
+        self.assertEqual(history.asks(10).tolist(), [6.0, 7.0, 8.0])
+
+    def test_views(self):
+        """
+        the views share the memory of the buffers and are read-only
+        """
+        history = PriceHistory(3)
+        for i in range(4):
+            history.append(i, 1.0, 2.0)
+        bids = history.bids()
+        self.assertTrue(np.may_share_memory(bids, history.bid_buffer))
+        self.assertRaises(ValueError, bids.__setitem__, 0, 5.0)
+
+
+class Test_KeepHistory(unittest.TestCase):
+    """
+    Unit tests for the history of a price stream
+    """
+    def test_stream(self):
+        filename = os.path.join(os.path.dirname(__file__), 'test.csv')
+        stream = StreamingPricesFromFile(filename, Queue.Queue(),
+            threading.Event())
+        stream.keep_history(100)
+        stream.stream_to_queue()
+        history = stream.history["EUR_USD"]
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history.bids()[-1],
+            stream.cur_prices["EUR_USD"].bid)
+        self.assertEqual(history.timestamps()[-1], 1423909800649678000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,67 @@
 import unittest
 import threading
+import BaseHTTPServer
 import Queue
 import os
+import shutil
+import tempfile
+import time
 
 from quantfxengine.streaming.streaming import *
 
+class ChunkedStreamHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Sends the lines of the server as a chunked price stream, one chunk
+    per line as OANDA does
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = 1
+        for line in self.server.lines:
+            self.wfile.write('%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.write('0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+
 class Test_StreamingForexPrices_OANDA(unittest.TestCase):
     """
-    Unit tests for the class StreamingForexPrices
+    Unit tests for the class StreamingForexPrices against a local stub
+    server
     """
-    pass
+    def test_stream_to_queue(self):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+            ChunkedStreamHandler)
+        server.paths = []
+        server.lines = [
+            '{"tick":{"instrument":"EUR_USD","time":"2015-02-14T10:30:00.649678Z","bid":1.24029,"ask":1.24042}}\r\n',
+            '{"heartbeat":{"time":"2015-02-14T10:30:01.000000Z"}}\r\n',
+            '{"tick":{"instrument":"EUR_CHF","time":"2015-02-14T10:30:02.000000Z","bid":1.20418,"ask":1.20443}}\r\n',
+        ]
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        self.addCleanup(server.server_close)
+        events = Queue.Queue()
+        stream = StreamingForexPrices_OANDA(
+            '127.0.0.1:%d' % server.server_address[1], 'token', 1234,
+            ["EUR_USD", "EUR_CHF"], events, threading.Event(),
+            secure=False)
+        stream.stream_to_queue()
+        thread.join()
+        self.assertIn("instruments=EUR_USD%2CEUR_CHF", server.paths[0])
+        self.assertEqual(events.qsize(), 2)
+        event = events.get()
+        self.assertEqual(event.instrument, "EUR_USD")
+        self.assertEqual(event.time, "2015-02-14T10:30:00.649678Z")
+        self.assertEqual(stream.cur_prices["EUR_USD"].bid, 1.24029)
+        self.assertEqual(stream.cur_prices["EUR_CHF"].ask, 1.20443)
 
 
 class Test_StreamingPricesFromFile(unittest.TestCase):
@@ -38,5 +90,132 @@ class Test_StreamingPricesFromFile(unittest.TestCase):
         self.assertEqual(event.ask, 1.24042)
         stoprequest.set()
 
+    def write_csv(self, rows):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, '\n'.join(rows))
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_paced_replay(self):
+        """
+        test if an accelerated replay waits for the timestamps
+        """
+        filename = self.write_csv([
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.24029,1.24042',
+            'EUR_USD,2015-02-14T10:30:01.000000Z,1.24030,1.24043',
+        ])
+        events=Queue.Queue()
+        stoprequest=threading.Event()
+        Stream=StreamingPricesFromFile(filename,events,stoprequest,
+            speed=10)
+        start = time.time()
+        Stream.stream_to_queue()
+        elapsed = time.time() - start
+        self.assertEqual(events.qsize(), 2)
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+    def test_iter_ticks_start(self):
+        filename = self.write_csv([
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.24029,1.24042',
+            'EUR_USD,2015-02-14T10:30:01.000000Z,1.24030,1.24043',
+            'EUR_CHF,2015-02-14T10:30:02.000000Z,1.20418,1.20443',
+        ])
+        Stream=StreamingPricesFromFile(filename,Queue.Queue(),
+            threading.Event())
+        ticks = list(Stream.iter_ticks(1))
+        self.assertEqual([tick.bid for tick in ticks], [1.24030, 1.20418])
+        self.assertEqual(Stream.cur_prices["EUR_USD"].bid, 1.24030)
+
+    def test_max_pending(self):
+        """
+        test if the replay waits for the queue to be consumed
+        """
+        filename = self.write_csv([
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.24029,1.24042',
+            'EUR_USD,2015-02-14T10:30:01.000000Z,1.24030,1.24043',
+            'EUR_USD,2015-02-14T10:30:02.000000Z,1.24031,1.24044',
+        ])
+        events=Queue.Queue()
+        stoprequest=threading.Event()
+        Stream=StreamingPricesFromFile(filename,events,stoprequest,
+            max_pending=2)
+        thread = threading.Thread(target=Stream.stream_to_queue)
+        thread.start()
+        time.sleep(.1)
+        self.assertEqual(events.qsize(), 2)
+        self.assertTrue(thread.is_alive())
+        events.get()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(events.qsize(), 2)
+        self.assertEqual(Stream.cur_prices["EUR_USD"].bid, 1.24031)
+
+
+class Test_StreamingPricesFromFiles(unittest.TestCase):
+    """
+    Unit tests for the class StreamingPricesFromFiles
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.write_csv('EUR_USD-20150214.csv', [
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.24029,1.24042',
+            'EUR_USD,2015-02-14T10:30:02.000000Z,1.24030,1.24043',
+            'EUR_USD,2015-02-14T10:30:03.500000Z,1.24031,1.24044',
+        ])
+        self.write_csv('EUR_CHF-20150214.csv', [
+            'EUR_CHF,2015-02-14T10:30:01.000000Z,1.20418,1.20443',
+            'EUR_CHF,2015-02-14T10:30:02.000000Z,1.20419,1.20444',
+        ])
+        self.write_csv('EUR_USD-20150215.csv', [
+            'EUR_USD,2015-02-15T10:30:00.000000Z,1.24032,1.24045',
+        ])
+
+    def write_csv(self, name, rows):
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write('\n'.join(rows))
+
+    def test_merge(self):
+        events=Queue.Queue()
+        Stream=StreamingPricesFromFiles(self.directory,events,
+            threading.Event())
+        Stream.stream_to_queue()
+        ticks = []
+        while not events.empty():
+            event = events.get()
+            ticks.append((event.instrument, event.time[11:21]))
+        self.assertEqual(ticks, [
+            ('EUR_USD', '10:30:00.0'),
+            ('EUR_CHF', '10:30:01.0'),
+            # equal timestamps in the order of the sorted file names
+            ('EUR_CHF', '10:30:02.0'),
+            ('EUR_USD', '10:30:02.0'),
+            ('EUR_USD', '10:30:03.5'),
+            ('EUR_USD', '10:30:00.0'),
+        ])
+        self.assertEqual(Stream.cur_prices["EUR_USD"].bid, 1.24032)
+        self.assertEqual(Stream.cur_prices["EUR_CHF"].ask, 1.20444)
+
+
+class Test_TimestampToEpochNs(unittest.TestCase):
+    """
+    Unit tests for the function timestamp_to_epoch_ns
+    """
+    def test_fraction(self):
+        self.assertEqual(
+            timestamp_to_epoch_ns('2015-02-14T10:30:00.649678Z'),
+            1423909800649678000)
+
+    def test_no_fraction(self):
+        self.assertEqual(
+            timestamp_to_epoch_ns('1970-01-01T00:00:01Z'),
+            1000000000)
+
+    def test_inverse(self):
+        self.assertEqual(epoch_ns_to_timestamp(1423909800649678000),
+            '2015-02-14T10:30:00.649678Z')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import threading
+import shutil
+import tempfile
+import Queue
+import os
+
+import numpy as np
+
+from quantfxengine.streaming.streaming import read_csv_rows, \
+    timestamp_to_epoch_ns
+from quantfxengine.streaming.synthetic import *
+
+class Test_SyntheticTicks(unittest.TestCase):
+    """
+    Unit tests for the class SyntheticTicks and its price stream
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_ticks(self):
+        ticks = synthetic_tick_arrays(10000, instruments=["EUR_USD",
+            "USD_JPY"], price=[1.2, 120.0], pip=[0.0001, 0.01],
+            decimals=[5, 3], intensity=[30.0, 10.0], seed=1,
+            chunk_size=999)
+        self.assertEqual(len(ticks), 10000)
+        self.assertTrue((np.diff(ticks.timestamps) >= 0).all())
+        self.assertTrue((ticks.asks > ticks.bids).all())
+        jpy = ticks.instrument_ids == 1
+        self.assertAlmostEqual(jpy.mean(), 0.25, delta=0.02)
+        self.assertTrue((abs(ticks.bids[jpy] - 120.0) < 10).all())
+        self.assertEqual(np.round(ticks.bids[jpy], 3).tolist(),
+            ticks.bids[jpy].tolist())
+        # the same seed gives the same ticks
+        again = synthetic_tick_arrays(10000, instruments=["EUR_USD",
+            "USD_JPY"], price=[1.2, 120.0], pip=[0.0001, 0.01],
+            decimals=[5, 3], intensity=[30.0, 10.0], seed=1,
+            chunk_size=999)
+        self.assertEqual(again.bids.tolist(), ticks.bids.tolist())
+
+    def test_volatility(self):
+        """
+        the mid prices have the given volatility across chunks
+        """
+        ticks = synthetic_tick_arrays(50000, instruments=2,
+            volatility=[0.1, 0.4], intensity=100.0, decimals=12, seed=3,
+            chunk_size=1000)
+        years = (ticks.timestamps[-1] - ticks.timestamps[0]) / \
+            (1e9 * SECONDS_PER_YEAR)
+        for instrument_id, volatility in enumerate([0.1, 0.4]):
+            mine = ticks.instrument_ids == instrument_id
+            mids = (ticks.bids[mine] + ticks.asks[mine]) / 2
+            returns = np.diff(np.log(mids))
+            self.assertAlmostEqual(
+                returns.std() * np.sqrt(len(returns) / years), volatility,
+                delta=volatility * 0.05)
+
+    def test_write_csv(self):
+        csv_file = os.path.join(self.directory, 'ticks.csv.gz')
+        SyntheticTicks(3, seed=1, chunk_size=100).write_csv(csv_file, 250)
+        rows = list(read_csv_rows(csv_file))
+        self.assertEqual(len(rows), 250)
+        expected = synthetic_tick_arrays(250, instruments=3, seed=1,
+            chunk_size=100)
+        self.assertEqual(rows[-1][0], "S%03d_USD" %
+            expected.instrument_ids[-1])
+        self.assertEqual(timestamp_to_epoch_ns(rows[-1][1]) // 1000,
+            expected.timestamps[-1] // 1000)
+        self.assertEqual([row[2] for row in rows], expected.bids.tolist())
+
+    def test_stream_to_queue(self):
+        events = Queue.Queue()
+        stream = StreamingSyntheticPrices(SyntheticTicks(2, seed=1), 50,
+            events, threading.Event())
+        stream.stream_to_queue()
+        self.assertEqual(events.qsize(), 50)
+        self.assertEqual(sorted(stream.cur_prices), ["S000_USD", "S001_USD"])
+
+if __name__ == '__main__':
+    unittest.main()
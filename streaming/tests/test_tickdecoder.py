@@ -0,0 +1,50 @@
+import unittest
+
+from quantfxengine.streaming.tickdecoder import TickStreamDecoder
+
+TICK = '{"tick":{"instrument":"EUR_USD","time":"2015-02-14T10:30:00.649678Z","bid":1.24029,"ask":1.24042}}\r\n'
+HEARTBEAT = '{"heartbeat":{"time":"2015-02-14T10:30:01.000000Z"}}\r\n'
+
+class Test_TickStreamDecoder(unittest.TestCase):
+    """
+    Unit tests for the class TickStreamDecoder
+    """
+    def setUp(self):
+        self.decoder = TickStreamDecoder()
+
+    def test_tick(self):
+        self.assertEqual(self.decoder.feed(TICK), [("EUR_USD",
+            "2015-02-14T10:30:00.649678Z", 1.24029, 1.24042)])
+
+    def test_heartbeat(self):
+        self.assertEqual(self.decoder.feed(HEARTBEAT + TICK + HEARTBEAT),
+            [("EUR_USD", "2015-02-14T10:30:00.649678Z", 1.24029, 1.24042)])
+        self.assertEqual(self.decoder.heartbeats, 2)
+
+    def test_split_chunks(self):
+        """
+        lines which are split over chunks are put together
+        """
+        data = TICK + HEARTBEAT + TICK
+        ticks = []
+        for i in range(0, len(data), 7):
+            ticks.extend(self.decoder.feed(data[i:i + 7]))
+        self.assertEqual(len(ticks), 2)
+        self.assertEqual(ticks[1][3], 1.24042)
+        self.assertEqual(self.decoder.heartbeats, 1)
+        self.assertEqual(self.decoder.buffer, '')
+
+    def test_other_layout(self):
+        """
+        ticks with another order of the fields are parsed with json
+        """
+        self.assertEqual(self.decoder.feed(
+            '{"tick": {"ask": 1.2, "bid": 1.1, "time": "t", '
+            '"instrument": "EUR_CHF"}}\n'),
+            [("EUR_CHF", "t", 1.1, 1.2)])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.decoder.feed, 'garbage\n')
+
+if __name__ == '__main__':
+    unittest.main()
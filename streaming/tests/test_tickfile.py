@@ -0,0 +1,56 @@
+import unittest
+import os
+import bz2
+import gzip
+import shutil
+import tempfile
+
+from quantfxengine.streaming import tickfile
+from quantfxengine.streaming.tickfile import open_tick_file
+from quantfxengine.streaming.streaming import read_csv_rows
+
+ROWS = (
+    'EUR_USD,2015-02-14T10:30:00.649678Z,1.24029,1.24042\n'
+    'EUR_CHF,2015-02-14T10:30:01.000000Z,1.20418,1.20443\n'
+)
+
+class Test_OpenTickFile(unittest.TestCase):
+    """
+    Unit tests for the function open_tick_file
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def check(self, name, opener):
+        path = os.path.join(self.directory, name)
+        f = opener(path, 'wb')
+        f.write(ROWS)
+        f.close()
+        with open_tick_file(path) as f:
+            self.assertEqual(f.read(), ROWS)
+        self.assertEqual([row[0] for row in read_csv_rows(path)],
+            ['EUR_USD', 'EUR_CHF'])
+
+    def test_plain(self):
+        self.check('ticks.csv', open)
+
+    def test_gzip(self):
+        self.check('ticks.csv.gz', gzip.open)
+
+    def test_bz2(self):
+        self.check('ticks.csv.bz2', bz2.BZ2File)
+
+    @unittest.skipIf(tickfile.lzma is None, "needs backports.lzma")
+    def test_xz(self):
+        self.check('ticks.csv.xz', tickfile.lzma.open)
+
+    @unittest.skipIf(tickfile.zstandard is None, "needs zstandard")
+    def test_zstd(self):
+        def opener(path, mode):
+            return tickfile.zstandard.ZstdCompressor().stream_writer(
+                open(path, mode))
+        self.check('ticks.csv.zst', opener)
+
+if __name__ == '__main__':
+    unittest.main()
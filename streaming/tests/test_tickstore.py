@@ -0,0 +1,75 @@
+import unittest
+import threading
+import tempfile
+import Queue
+import os
+
+from quantfxengine.streaming.tickdata import load_csv_arrays
+from quantfxengine.streaming.tickstore import *
+
+class Test_TickStore(unittest.TestCase):
+    """
+    Unit tests for the tick store
+    """
+    def setUp(self):
+        fd, self.csv_file = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, '\n'.join([
+            'EUR_USD,2015-02-14T10:30:00.649678Z,1.24029,1.24042',
+            'EUR_CHF,2015-02-14T10:30:01.000000Z,1.20418,1.20443',
+            'EUR_USD,2015-02-14T10:30:02.000000Z,1.24031,1.24044',
+        ]))
+        os.close(fd)
+        fd, self.store_file = tempfile.mkstemp(suffix='.qfx')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.csv_file)
+        os.remove(self.store_file)
+
+    def test_roundtrip(self):
+        """
+        the store holds the same ticks as the csv-file
+        """
+        n = convert_csv_to_tickstore(self.csv_file, self.store_file,
+            chunk_size=2)
+        self.assertEqual(n, 3)
+        ticks = open_tickstore(self.store_file)
+        expected = load_csv_arrays(self.csv_file)
+        self.assertEqual(ticks.instruments, ["EUR_USD", "EUR_CHF"])
+        for name in ['instrument_ids', 'timestamps', 'bids', 'asks']:
+            self.assertEqual(getattr(ticks, name).tolist(),
+                getattr(expected, name).tolist())
+
+    def test_stream_to_queue(self):
+        convert_csv_to_tickstore(self.csv_file, self.store_file)
+        events = Queue.Queue()
+        stream = StreamingPricesFromTickStore(self.store_file, events,
+            threading.Event())
+        stream.stream_to_queue()
+        self.assertEqual(events.qsize(), 3)
+        event = events.get()
+        self.assertEqual(event.instrument, 'EUR_USD')
+        self.assertEqual(event.time, 1423909800649678000)
+        self.assertEqual(event.bid, 1.24029)
+        self.assertEqual(stream.cur_prices["EUR_USD"].ask, 1.24044)
+        self.assertEqual(stream.cur_prices["EUR_CHF"].bid, 1.20418)
+
+    def test_iter_ticks_start(self):
+        convert_csv_to_tickstore(self.csv_file, self.store_file)
+        stream = StreamingPricesFromTickStore(self.store_file,
+            Queue.Queue(), threading.Event())
+        stream.chunk_size = 1
+        ticks = list(stream.iter_ticks(2))
+        self.assertEqual([tick.bid for tick in ticks], [1.24031])
+
+    def test_empty(self):
+        open(self.csv_file, 'wb').close()
+        self.assertEqual(
+            convert_csv_to_tickstore(self.csv_file, self.store_file), 0)
+        self.assertEqual(len(open_tickstore(self.store_file)), 0)
+
+    def test_not_a_store(self):
+        self.assertRaises(ValueError, open_tickstore, self.csv_file)
+
+if __name__ == '__main__':
+    unittest.main()
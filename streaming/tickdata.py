@@ -0,0 +1,105 @@
+import csv
+import logging
+
+import numpy as np
+
+from quantfxengine.streaming.streaming import ReplayPriceStream, \
+    timestamp_to_epoch_ns
+from quantfxengine.streaming.tickfile import open_tick_file
+
+
+class TickArrays(object):
+    """
+    Ticks stored column-wise in numpy arrays, e.g. for vectorized
+    backtests.
+    Attributes:
+        instruments: list of instrument names, the position in the
+            list is the id of the instrument
+        instrument_ids: array with the instrument id of every tick
+        timestamps: int64 array of nanoseconds since the epoch
+        bids: float64 array of bid prices
+        asks: float64 array of ask prices
+    """
+    def __init__(self, instruments, instrument_ids, timestamps, bids, asks):
+        self.instruments = instruments
+        self.instrument_ids = instrument_ids
+        self.timestamps = timestamps
+        self.bids = bids
+        self.asks = asks
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def instrument_id(self, instrument):
+        return self.instruments.index(instrument)
+
+
+def load_csv_arrays(csv_file):
+    """
+    Reads a csv-file in the form instrument,timestamp,bid,ask as read
+    by StreamingPricesFromFile into TickArrays. The file may be
+    compressed, see open_tick_file().
+    """
+    ids = {}
+    instruments = []
+    instrument_ids = []
+    timestamps = []
+    bids = []
+    asks = []
+    with open_tick_file(csv_file) as f:
+        for instrument, timestamp, bid, ask in csv.reader(f, delimiter=','):
+            if instrument not in ids:
+                ids[instrument] = len(instruments)
+                instruments.append(instrument)
+            instrument_ids.append(ids[instrument])
+            timestamps.append(timestamp_to_epoch_ns(timestamp))
+            bids.append(float(bid))
+            asks.append(float(ask))
+    return TickArrays(
+        instruments,
+        np.array(instrument_ids, dtype=np.int32),
+        np.array(timestamps, dtype=np.int64),
+        np.array(bids, dtype=np.float64),
+        np.array(asks, dtype=np.float64)
+    )
+
+
+class StreamingPricesFromArrays(ReplayPriceStream):
+    """
+    A class for backtesting on TickArrays, e.g. from a tick store.
+    The ticks are read in chunks, so memory-mapped arrays are never
+    loaded as a whole. The time of the TickEvents is given in
+    nanoseconds since the epoch.
+    See ReplayPriceStream for speed and max_pending.
+    """
+    chunk_size = 65536
+
+    def __init__(
+        self, ticks, events_queue, stoprequest,
+        speed=None, max_pending=None
+    ):
+        self.ticks = ticks
+        self.events_queue = events_queue
+        self.cur_prices = {}
+        self.stoprequest = stoprequest
+        self.speed = speed
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+
+    def timestamp_ns(self, timestamp):
+        return timestamp
+
+    def iter_rows(self):
+        return self.iter_rows_from(0)
+
+    def iter_rows_from(self, first):
+        ticks = self.ticks
+        instruments = ticks.instruments
+        for start in xrange(first, len(ticks), self.chunk_size):
+            end = start + self.chunk_size
+            ids = ticks.instrument_ids[start:end].tolist()
+            timestamps = ticks.timestamps[start:end].tolist()
+            bids = ticks.bids[start:end].tolist()
+            asks = ticks.asks[start:end].tolist()
+            for i in xrange(len(ids)):
+                yield instruments[ids[i]], timestamps[i], bids[i], asks[i]
@@ -0,0 +1,61 @@
+import re
+import json
+
+
+# A tick as sent by OANDA, e.g.
+# {"tick":{"instrument":"EUR_USD","time":"2015-02-14T10:30:00.649678Z","bid":1.24029,"ask":1.24042}}
+TICK_RE = re.compile(
+    r'\{"tick":\{"instrument":"([^"]*)","time":"([^"]*)",'
+    r'"bid":([-+.0-9eE]+),"ask":([-+.0-9eE]+)\}\}$'
+)
+
+
+class TickStreamDecoder(object):
+    """
+    An incremental decoder for the price stream of OANDA, which sends
+    one json message per line. feed() takes the data as it arrives in
+    chunks of any size and returns the ticks of all lines which the
+    chunk completes.
+    Heartbeats are recognized by a substring test and skipped, ticks
+    in the usual layout are taken apart with a regular expression.
+    Only other lines are parsed with json.
+    Attributes:
+        heartbeats: number of heartbeats received
+        buffer: the incomplete last line
+    """
+    def __init__(self):
+        self.heartbeats = 0
+        self.buffer = ''
+
+    def feed(self, chunk):
+        """
+        Returns a list of tuples (instrument, time, bid, ask). Raises
+        ValueError for lines which are not json.
+        """
+        if self.buffer:
+            chunk = self.buffer + chunk
+        lines = chunk.split('\n')
+        self.buffer = lines.pop()
+        ticks = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{"heartbeat"'):
+                self.heartbeats += 1
+                continue
+            match = TICK_RE.match(line)
+            if match is not None:
+                instrument, time, bid, ask = match.groups()
+                ticks.append((instrument, time, float(bid), float(ask)))
+                continue
+            msg = json.loads(line)
+            if "tick" in msg:
+                tick = msg["tick"]
+                ticks.append((
+                    tick["instrument"], tick["time"],
+                    tick["bid"], tick["ask"]
+                ))
+            elif "heartbeat" in msg:
+                self.heartbeats += 1
+        return ticks
@@ -0,0 +1,71 @@
+import io
+import os
+import bz2
+import gzip
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# size of the reads from the file and of the decompressed buffer
+BUFFER_SIZE = 1 << 20
+
+# extensions of compressed files, xz and zst need optional packages
+CODECS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+    '.zst': 'zstd',
+}
+
+
+def available_codecs():
+    """
+    Returns the list of codecs which can be read here
+    """
+    codecs = ['gzip', 'bz2']
+    if lzma is not None:
+        codecs.append('xz')
+    if zstandard is not None:
+        codecs.append('zstd')
+    return codecs
+
+
+def open_tick_file(path, buffer_size=BUFFER_SIZE):
+    """
+    Opens a tick file for reading in binary mode. Files ending with
+    .gz, .bz2, .xz, .lzma or .zst are decompressed while they are
+    read, so they never have to be decompressed to disk. All other
+    files are read as they are.
+    Raises ValueError if the codec of the file needs a package which
+    is not installed: backports.lzma in Python 2 for xz and zstandard
+    for zst.
+    """
+    codec = CODECS.get(os.path.splitext(path)[1].lower())
+    if codec is None:
+        return open(path, 'rb', buffer_size)
+    if codec == 'gzip':
+        # GzipFile reads lines in python, the buffer is much faster
+        return io.BufferedReader(gzip.open(path, 'rb'), buffer_size)
+    if codec == 'bz2':
+        return bz2.BZ2File(path, 'rb', buffer_size)
+    if codec == 'xz':
+        if lzma is None:
+            raise ValueError("Reading %s needs backports.lzma" % path)
+        return io.BufferedReader(lzma.open(path, 'rb'), buffer_size)
+    if zstandard is None:
+        raise ValueError("Reading %s needs zstandard" % path)
+    raw = open(path, 'rb')
+    reader = zstandard.ZstdDecompressor().stream_reader(raw,
+        read_size=buffer_size)
+    return io.BufferedReader(reader, buffer_size)
@@ -0,0 +1,148 @@
+"""
+A tick store is a binary columnar file of ticks. It consists of
+    the magic bytes MAGIC
+    the header: number of ticks and length of the instrument table
+    the instrument table: the instrument names separated by newlines,
+        the position of a name is its instrument id
+    the columns, each aligned to 8 bytes:
+        instrument ids as int32
+        timestamps as int64 nanoseconds since the epoch
+        bids as float64
+        asks as float64
+All numbers are little endian.
+"""
+
+import csv
+import struct
+import sys
+
+import numpy as np
+
+from quantfxengine.streaming.streaming import timestamp_to_epoch_ns
+from quantfxengine.streaming.tickfile import open_tick_file
+from quantfxengine.streaming.tickdata import TickArrays, \
+    StreamingPricesFromArrays
+
+MAGIC = 'QFXTICK1'
+HEADER = struct.Struct('<QQ')
+COLUMNS = [
+    ('instrument_ids', '<i4'),
+    ('timestamps', '<i8'),
+    ('bids', '<f8'),
+    ('asks', '<f8'),
+]
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _column_offsets(data_offset, n):
+    offsets = []
+    for name, dtype in COLUMNS:
+        offsets.append(data_offset)
+        data_offset = _align(data_offset + n * np.dtype(dtype).itemsize)
+    return offsets, data_offset
+
+
+def convert_csv_to_tickstore(csv_file, store_file, chunk_size=65536):
+    """
+    Converts a csv-file in the form instrument,timestamp,bid,ask into
+    a tick store. The csv-file may be compressed, see
+    open_tick_file(). We read the csv-file twice, once to count the ticks
+    and collect the instruments and once to fill the columns, so the
+    memory needed does not depend on the size of the file.
+    Returns the number of ticks.
+    """
+    ids = {}
+    instruments = []
+    n = 0
+    with open_tick_file(csv_file) as f:
+        for row in csv.reader(f, delimiter=','):
+            if row[0] not in ids:
+                ids[row[0]] = len(instruments)
+                instruments.append(row[0])
+            n += 1
+
+    table = '\n'.join(instruments)
+    data_offset = _align(len(MAGIC) + HEADER.size + len(table))
+    offsets, size = _column_offsets(data_offset, n)
+    with open(store_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(n, len(table)))
+        f.write(table)
+        f.truncate(size)
+    if n == 0:
+        return 0
+
+    columns = [
+        np.memmap(store_file, dtype=dtype, mode='r+',
+            offset=offset, shape=(n,))
+        for (name, dtype), offset in zip(COLUMNS, offsets)
+    ]
+    chunk = [[], [], [], []]
+    start = 0
+    with open_tick_file(csv_file) as f:
+        for instrument, timestamp, bid, ask in csv.reader(f, delimiter=','):
+            chunk[0].append(ids[instrument])
+            chunk[1].append(timestamp_to_epoch_ns(timestamp))
+            chunk[2].append(float(bid))
+            chunk[3].append(float(ask))
+            if len(chunk[0]) == chunk_size:
+                for column, values in zip(columns, chunk):
+                    column[start:start + chunk_size] = values
+                start += chunk_size
+                chunk = [[], [], [], []]
+    for column, values in zip(columns, chunk):
+        column[start:start + len(values)] = values
+        column.flush()
+    return n
+
+
+def open_tickstore(store_file):
+    """
+    Memory-maps a tick store and returns it as TickArrays. The arrays
+    are read-only views into the file, so nothing is read before it is
+    accessed.
+    """
+    with open(store_file, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError("%s is not a tick store" % store_file)
+        n, table_length = HEADER.unpack(f.read(HEADER.size))
+        table = f.read(table_length)
+    instruments = table.split('\n') if table else []
+    data_offset = _align(len(MAGIC) + HEADER.size + table_length)
+    offsets, size = _column_offsets(data_offset, n)
+    columns = []
+    for (name, dtype), offset in zip(COLUMNS, offsets):
+        if n:
+            columns.append(np.memmap(store_file, dtype=dtype, mode='r',
+                offset=offset, shape=(n,)))
+        else:
+            columns.append(np.zeros(0, dtype=dtype))
+    return TickArrays(instruments, *columns)
+
+
+class StreamingPricesFromTickStore(StreamingPricesFromArrays):
+    """
+    A class for backtesting on a memory-mapped tick store. The time of
+    the TickEvents is given in nanoseconds since the epoch.
+    See ReplayPriceStream for speed and max_pending.
+    """
+    def __init__(
+        self, store_file, events_queue, stoprequest,
+        speed=None, max_pending=None
+    ):
+        self.store_file = store_file
+        StreamingPricesFromArrays.__init__(
+            self, open_tickstore(store_file), events_queue,
+            stoprequest, speed, max_pending
+        )
+
+
+if __name__ == "__main__":
+    # python -m quantfxengine.streaming.tickstore ticks.csv ticks.qfx
+    if len(sys.argv) != 3:
+        sys.exit("usage: tickstore.py csv_file store_file")
+    print convert_csv_to_tickstore(sys.argv[1], sys.argv[2]), "ticks"
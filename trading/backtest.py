@@ -0,0 +1,122 @@
+import logging
+
+from quantfxengine.event.event import TickEvent, SignalEvent, OrderEvent, \
+    FillEvent, BarEvent
+
+
+def find_handler(handlers, cls, logger):
+    """
+    Returns the handler of the event class cls for a class which is
+    not a key of handlers, e.g. a subclass of TickEvent. It is the
+    handler of the nearest base class of cls, or one which ignores
+    the event if there is none. The handler is added to handlers, so
+    the search happens once per class.
+    """
+    for base in cls.__mro__:
+        handler = handlers.get(base)
+        if handler is not None:
+            break
+    else:
+        logger.warning("No handler for %s, ignoring these events",
+            cls.__name__)
+        handler = lambda event: None
+    handlers[cls] = handler
+    return handler
+
+
+def backtest(
+    prices, events, strategy, portfolio, execution, bars=None,
+    snapshots=None, start=0
+):
+    """
+    Runs a backtest in a single thread. Instead of polling a
+    Queue.Queue which is filled by a streaming thread, we pull the
+    ticks straight from prices.iter_ticks(). Every tick is dispatched
+    together with all SIGNAL, ORDER and FILL events it causes before
+    the next tick is read, in the same order as in trade().
+    events has to be the LocalEventQueue in which strategy, portfolio
+    and execution put their events.
+    If bars is a BarAggregator, the strategy gets its bars instead of
+    the ticks as in trade(). prices may also replay BarEvents, e.g. a
+    StreamingBarsFromFile.
+    If snapshots is a Snapshotter, it writes a snapshot every
+    snapshots.every_ticks ticks. To resume from a snapshot, restore it
+    and give its offset as start, the first start ticks are skipped.
+    When the backtest has run to its end, the snapshot is removed.
+    At the end, all positions are closed as in trade().
+    Returns the portfolio.
+    """
+    logger = logging.getLogger(__name__)
+    info = logger.isEnabledFor(logging.INFO)
+    calculate_signals = strategy.calculate_signals
+    execute_tick_event = portfolio.execute_tick_event
+
+    def on_tick(event):
+        calculate_signals(event)
+        execute_tick_event(event)
+
+    def on_bar(event):
+        calculate_signals(event)
+        if bars is None:
+            # bars replayed instead of ticks
+            execute_tick_event(event)
+
+    if bars is not None:
+        bar_tick = bars.on_tick
+        def on_tick(event):
+            bar_tick(event)
+            execute_tick_event(event)
+
+    def on_signal(event):
+        if info:
+            logger.info("recv new order signal: %s", event)
+        portfolio.execute_signal_event(event)
+
+    def on_order(event):
+        if info:
+            logger.info("Executing order! %s", event)
+        execution.execute_order(event)
+
+    def on_fill(event):
+        if info:
+            logger.info("recv new fill event: %s", event)
+        portfolio.execute_fill_event(event)
+
+    handlers = {
+        TickEvent: on_tick,
+        SignalEvent: on_signal,
+        OrderEvent: on_order,
+        FillEvent: on_fill,
+        BarEvent: on_bar,
+    }
+    popleft = events.popleft
+    ticks = prices.iter_ticks(start)
+    if snapshots is not None:
+        ticks = snapshots.iter_ticks(ticks, start)
+    get_handler = handlers.get
+    for tick in ticks:
+        handler = get_handler(tick.__class__)
+        if handler is None:
+            handler = find_handler(handlers, tick.__class__, logger)
+        handler(tick)
+        while events:
+            event = popleft()
+            handler = get_handler(event.__class__)
+            if handler is None:
+                handler = find_handler(handlers, event.__class__, logger)
+            handler(event)
+    #close all positions
+    logger.info("Closing all positions")
+    portfolio.execute_close_all_positions()
+    #and execute the resulting order and fill events, also of their
+    #subclasses
+    while events:
+        event = popleft()
+        handler = get_handler(event.__class__)
+        if handler is None:
+            handler = find_handler(handlers, event.__class__, logger)
+        if handler is on_order or handler is on_fill:
+            handler(event)
+    if snapshots is not None:
+        snapshots.finish()
+    return portfolio
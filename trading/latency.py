@@ -0,0 +1,174 @@
+import math
+import logging
+import threading
+
+from quantfxengine.event.event import monotonic
+
+
+class LatencyHistogram(object):
+    """
+    A histogram of latencies in seconds with logarithmic buckets. The
+    first bucket holds everything below resolution, every following
+    bucket is growth times as wide as the previous one, so percentiles
+    are exact up to a factor of growth.
+    Attributes:
+        count: number of recorded latencies
+        total: sum of the recorded latencies
+        max: largest recorded latency
+    """
+    resolution = 1e-6
+    growth = 1.05
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.log_growth = math.log(self.growth)
+
+    def record(self, seconds):
+        if seconds < self.resolution:
+            bucket = 0
+        else:
+            bucket = int(
+                math.log(seconds / self.resolution) / self.log_growth) + 1
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket which contains the p-th
+        percentile, but at most max
+        """
+        rank = p / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                upper = self.resolution * self.growth ** bucket
+                return min(upper, self.max)
+        return self.max
+
+
+class LatencyMonitor(object):
+    """
+    Collects the latencies of the trading loop in histograms, one per
+    stage:
+        queue.TICK, queue.SIGNAL, ...: time an event waits in the
+            queue from its creation until the trading loop takes it
+        handle.TICK, handle.SIGNAL, ...: time to handle an event
+        strategy: time of strategy.calculate_signals
+        execution: time of execution.execute_order
+        tick_to_fill: time from the creation of a tick until the
+            trading loop takes the fill it caused
+    It also keeps gauges of the queue depth.
+    Attributes:
+        histograms: dictionary of stage and LatencyHistogram
+        queue_depth: queue depth when the last event was taken
+        max_queue_depth: largest queue depth seen
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            self.histograms[stage].record(seconds)
+
+    def record_queue_depth(self, depth):
+        self.queue_depth = depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def timed(self, stage, func):
+        """
+        Wraps func, so that the time of every call is recorded for
+        stage
+        """
+        record = self.record
+        def timed_func(*args):
+            start = monotonic()
+            try:
+                return func(*args)
+            finally:
+                record(stage, monotonic() - start)
+        return timed_func
+
+    def wrap_handlers(self, handlers, events):
+        """
+        Takes a dictionary of event classes and handlers as used by
+        trade() and returns one with handlers which stamp the events
+        with their dispatch time and record the queue, handling and
+        tick to fill latencies and the depth of the events queue
+        """
+        record = self.record
+        def wrap(event_type, handler):
+            queue_stage = 'queue.' + event_type
+            handle_stage = 'handle.' + event_type
+            is_fill = event_type == 'FILL'
+            def instrumented(event):
+                now = monotonic()
+                event.dispatched = now
+                record(queue_stage, now - event.created)
+                if is_fill and event.origin is not None:
+                    record('tick_to_fill', now - event.origin)
+                self.record_queue_depth(events.qsize())
+                handler(event)
+                record(handle_stage, monotonic() - now)
+            return instrumented
+        return dict(
+            (cls, wrap(cls.type, handler))
+            for cls, handler in handlers.items()
+        )
+
+    def stats(self):
+        """
+        Returns a dictionary of stage and a dictionary with count,
+        mean, p50, p99 and max in seconds
+        """
+        with self.lock:
+            stats = {}
+            for stage, histogram in self.histograms.items():
+                stats[stage] = {
+                    'count': histogram.count,
+                    'mean': histogram.total / histogram.count,
+                    'p50': histogram.percentile(50),
+                    'p99': histogram.percentile(99),
+                    'max': histogram.max,
+                }
+            return stats
+
+    def dump(self):
+        """
+        Logs the latencies in microseconds and the queue depth
+        """
+        stats = self.stats()
+        for stage in sorted(stats):
+            s = stats[stage]
+            self.logger.info(
+                "%-14s count: %8d p50: %10.1fus p99: %10.1fus "
+                "max: %10.1fus", stage, s['count'], s['p50'] * 1e6,
+                s['p99'] * 1e6, s['max'] * 1e6)
+        self.logger.info("queue depth: %d max queue depth: %d",
+            self.queue_depth, self.max_queue_depth)
+
+    def start_reporter(self, interval, stoprequest):
+        """
+        Starts a daemon thread which calls dump() every interval
+        seconds until stoprequest is set
+        """
+        def report():
+            while not stoprequest.wait(interval):
+                self.dump()
+        thread = threading.Thread(target=report)
+        thread.daemon = True
+        thread.start()
+        return thread
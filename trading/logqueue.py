@@ -0,0 +1,100 @@
+"""
+Logging through a queue: the handlers of the loggers are replaced by
+QueueHandlers, which only put the records into a queue, and a
+QueueListener thread formats and writes them. So the trading loop
+does not wait for the console or a log file. Python 2 has no
+logging.handlers.QueueHandler, so we bring our own.
+"""
+
+import logging
+import Queue
+import threading
+
+_formatter = logging.Formatter()
+
+
+class QueueHandler(logging.Handler):
+    """
+    A handler which puts its records together with its target handler
+    into a queue. The message is formatted later in the thread of the
+    QueueListener, so the arguments of a log call must not be changed
+    after the call. Only a traceback is formatted at once, since it
+    does not live on.
+    Attributes:
+        queue: a Queue.Queue shared with a QueueListener
+        target: the handler which writes the records
+    """
+    def __init__(self, queue, target):
+        logging.Handler.__init__(self, target.level)
+        self.queue = queue
+        self.target = target
+
+    def handle(self, record):
+        # no lock needed, the queue has its own
+        if self.filter(record):
+            self.emit(record)
+        return record
+
+    def emit(self, record):
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        self.queue.put((self.target, record))
+
+
+class QueueListener(object):
+    """
+    A thread which takes (handler, record) from queue and hands the
+    record to the handler until stop() is called.
+    Attributes:
+        queue: a Queue.Queue shared with QueueHandlers
+    """
+    def __init__(self, queue):
+        self.queue = queue
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        get = self.queue.get
+        while True:
+            item = get()
+            if item is None:
+                break
+            handler, record = item
+            handler.handle(record)
+
+    def stop(self):
+        """
+        Writes the waiting records and stops the thread
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+
+def start_queue_logging():
+    """
+    Replaces every handler of the root logger and of all other loggers
+    by a QueueHandler with the handler as target, e.g. after
+    logging.config.fileConfig(). Returns the started QueueListener,
+    stop it before logging.shutdown().
+    """
+    queue = Queue.Queue()
+    wrappers = {}
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+    ]
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            if handler not in wrappers:
+                wrappers[handler] = QueueHandler(queue, handler)
+            logger.removeHandler(handler)
+            logger.addHandler(wrappers[handler])
+    listener = QueueListener(queue)
+    listener.start()
+    return listener
@@ -0,0 +1,142 @@
+import csv
+import itertools
+import multiprocessing
+import threading
+import time
+
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.strategy.strategy import TestRandomStrategy
+from quantfxengine.streaming.tickdata import TickArrays, \
+    StreamingPricesFromArrays, load_csv_arrays
+from quantfxengine.trading.backtest import backtest
+
+PORTFOLIO_PARAMETERS = ['base', 'leverage', 'equity', 'risk_per_trade']
+RESULT_COLUMNS = ['balance', 'trades', 'max_drawdown', 'runtime']
+
+
+class SweepPortfolio(Portfolio):
+    """
+    A Portfolio which additionally keeps the statistics of a sweep
+    Attributes:
+        trades: number of fills
+        peak_balance: highest balance so far
+        max_drawdown: largest drop of the balance from its peak
+    """
+    def __init__(self, *args, **kwargs):
+        Portfolio.__init__(self, *args, **kwargs)
+        self.trades = 0
+        self.peak_balance = self.balance
+        self.max_drawdown = 0.0
+
+    def execute_fill_event(self, fill_event):
+        Portfolio.execute_fill_event(self, fill_event)
+        self.trades += 1
+        if self.balance > self.peak_balance:
+            self.peak_balance = self.balance
+        elif self.peak_balance - self.balance > self.max_drawdown:
+            self.max_drawdown = self.peak_balance - self.balance
+
+
+def parameter_grid(grid):
+    """
+    Turns a dictionary of parameter names and lists of values into the
+    list of all combinations, e.g.
+    {'leverage': [10, 20], 'risk_per_trade': [0.01]} gives
+    [{'leverage': 10, 'risk_per_trade': 0.01},
+     {'leverage': 20, 'risk_per_trade': 0.01}]
+    """
+    names = sorted(grid.keys())
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*[grid[name] for name in names])
+    ]
+
+
+# The ticks and the strategy class of the worker processes. They are
+# set by _init_worker, which the forked workers inherit from the parent
+# together with the tick arrays, so the ticks are not copied per task.
+_ticks = None
+_strategy_class = None
+
+
+def _init_worker(ticks, strategy_class):
+    global _ticks, _strategy_class
+    if not isinstance(ticks, TickArrays):
+        # Every worker maps the tick store itself, the pages are
+        # shared through the page cache
+        from quantfxengine.streaming.tickstore import open_tickstore
+        ticks = open_tickstore(ticks)
+    _ticks = ticks
+    _strategy_class = strategy_class
+
+
+def run_backtest(config):
+    """
+    Runs a synchronous backtest on the ticks of this worker for one
+    configuration. Keys of the configuration in PORTFOLIO_PARAMETERS
+    are passed to the Portfolio, all others to the strategy.
+    Returns the configuration together with the RESULT_COLUMNS.
+    """
+    portfolio_kwargs = {}
+    strategy_kwargs = {}
+    for name, value in config.items():
+        if name in PORTFOLIO_PARAMETERS:
+            portfolio_kwargs[name] = value
+        else:
+            strategy_kwargs[name] = value
+
+    start = time.time()
+    events = LocalEventQueue()
+    prices = StreamingPricesFromArrays(_ticks, events, threading.Event())
+    portfolio = SweepPortfolio(prices, events, **portfolio_kwargs)
+    strategy = _strategy_class(events, **strategy_kwargs)
+    execution = MockExecution(events, prices)
+    backtest(prices, events, strategy, portfolio, execution)
+
+    result = dict(config)
+    result['balance'] = portfolio.balance
+    result['trades'] = portfolio.trades
+    result['max_drawdown'] = portfolio.max_drawdown
+    result['runtime'] = time.time() - start
+    return result
+
+
+def run_sweep(
+    ticks, configs, strategy_class=TestRandomStrategy, processes=None
+):
+    """
+    Runs a backtest for every configuration in configs, e.g. from
+    parameter_grid(), on a pool of processes.
+    ticks are TickArrays, a csv-file which is loaded once before the
+    workers are started, or a tick store ending with .qfx which every
+    worker maps into memory.
+    Returns a list with one result per configuration, in the order of
+    configs, see run_backtest.
+    """
+    if isinstance(ticks, basestring) and not ticks.endswith('.qfx'):
+        ticks = load_csv_arrays(ticks)
+    pool = multiprocessing.Pool(
+        processes, initializer=_init_worker,
+        initargs=(ticks, strategy_class)
+    )
+    try:
+        return pool.map(run_backtest, configs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def write_results(results, csv_file):
+    """
+    Writes the results of run_sweep as a table into a csv-file
+    """
+    parameters = sorted(
+        set(name for result in results for name in result) -
+        set(RESULT_COLUMNS)
+    )
+    with open(csv_file, 'wb') as f:
+        writer = csv.DictWriter(f, parameters + RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,124 @@
+import unittest
+import logging
+import threading
+import tempfile
+import os
+
+from quantfxengine.event.event import Event, SignalEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import StreamingPricesFromFile
+from quantfxengine.streaming.bars import BarAggregator
+from quantfxengine.trading.backtest import backtest, find_handler
+
+class ScriptedStrategy(object):
+    """
+    Sends a signal with the given side on the given tick numbers
+    """
+    def __init__(self, events, signals):
+        self.events = events
+        self.signals = signals
+        self.ticks = 0
+
+    def calculate_signals(self, event):
+        if event.type == 'TICK' or event.type == 'BAR':
+            if self.ticks in self.signals:
+                self.events.put(SignalEvent(
+                    event.instrument, "market", self.signals[self.ticks]
+                ))
+            self.ticks += 1
+
+
+class TaggedSignalEvent(SignalEvent):
+    pass
+
+
+class UnknownEvent(Event):
+    type = 'UNKNOWN'
+
+
+class Test_Backtest(unittest.TestCase):
+    """
+    Unit tests for the function backtest
+    """
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, '\n'.join([
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.0,1.1',
+            'EUR_USD,2015-02-14T10:30:01.000000Z,1.2,1.3',
+        ]))
+        os.close(fd)
+        self.events = LocalEventQueue()
+        self.prices = StreamingPricesFromFile(
+            self.filename, self.events, threading.Event())
+        self.portfolio = Portfolio(self.prices, self.events,
+            equity=10000)
+        self.execution = MockExecution(self.events, self.prices)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_close_at_end(self):
+        """
+        a long position bought at the first ask is closed at the last
+        bid
+        """
+        strategy = ScriptedStrategy(self.events, {0: "buy"})
+        backtest(self.prices, self.events, strategy, self.portfolio,
+            self.execution)
+        self.assertEqual(self.portfolio.positions, {})
+        self.assertAlmostEqual(self.portfolio.balance,
+            10000 + 0.1 * 200 / 1.2)
+        self.assertTrue(self.events.empty())
+
+    def test_no_signals(self):
+        strategy = ScriptedStrategy(self.events, {})
+        backtest(self.prices, self.events, strategy, self.portfolio,
+            self.execution)
+        self.assertEqual(self.portfolio.balance, 10000)
+        self.assertEqual(self.prices.cur_prices["EUR_USD"].bid, 1.2)
+
+    def test_event_subclasses(self):
+        """
+        a subclass of SignalEvent is handled as a signal and an event
+        without a handler is ignored
+        """
+        class TaggingStrategy(ScriptedStrategy):
+            def calculate_signals(self, event):
+                if self.ticks == 0:
+                    self.events.put(UnknownEvent())
+                    self.events.put(TaggedSignalEvent(event.instrument,
+                        "market", "buy"))
+                self.ticks += 1
+        backtest(self.prices, self.events, TaggingStrategy(self.events, {}),
+            self.portfolio, self.execution)
+        self.assertAlmostEqual(self.portfolio.balance,
+            10000 + 0.1 * 200 / 1.2)
+
+    def test_find_handler(self):
+        handlers = {SignalEvent: 'signal'}
+        logger = logging.getLogger(__name__)
+        self.assertEqual(find_handler(handlers, TaggedSignalEvent, logger),
+            'signal')
+        self.assertEqual(handlers[TaggedSignalEvent], 'signal')
+        self.assertIsNone(find_handler(handlers, UnknownEvent, logger)(
+            UnknownEvent()))
+
+    def test_bars(self):
+        """
+        with bars of one second the strategy gets the first tick as a
+        bar when the second tick arrives and buys at its ask
+        """
+        strategy = ScriptedStrategy(self.events, {0: "buy"})
+        bars = BarAggregator(self.events, 1)
+        backtest(self.prices, self.events, strategy, self.portfolio,
+            self.execution, bars)
+        self.assertEqual(strategy.ticks, 1)
+        self.assertEqual(bars.bars["EUR_USD"][0].close_bid, 1.0)
+        self.assertEqual(self.portfolio.positions, {})
+        self.assertAlmostEqual(self.portfolio.balance,
+            10000 - 0.1 * 200 / 1.2)
+
+if __name__ == '__main__':
+    unittest.main()
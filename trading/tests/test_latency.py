@@ -0,0 +1,60 @@
+import unittest
+import time
+
+from quantfxengine.event.event import TickEvent, FillEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.trading.latency import *
+
+class Test_LatencyHistogram(unittest.TestCase):
+    """
+    Unit tests for the class LatencyHistogram
+    """
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.record(i * 1e-3)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 0.1)
+        self.assertAlmostEqual(histogram.percentile(50), 0.05,
+            delta=0.05 * 0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099,
+            delta=0.099 * 0.05)
+        self.assertEqual(histogram.percentile(100), 0.1)
+
+    def test_below_resolution(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+
+
+class Test_LatencyMonitor(unittest.TestCase):
+    """
+    Unit tests for the class LatencyMonitor
+    """
+    def test_timed(self):
+        monitor = LatencyMonitor()
+        monitor.timed('sleep', time.sleep)(0.01)
+        self.assertGreaterEqual(monitor.stats()['sleep']['max'], 0.009)
+
+    def test_wrap_handlers(self):
+        monitor = LatencyMonitor()
+        events = LocalEventQueue()
+        handled = []
+        handlers = monitor.wrap_handlers(
+            {TickEvent: handled.append, FillEvent: handled.append},
+            events)
+        tick = TickEvent("EUR_USD", "t", 1.0, 1.1)
+        fill = FillEvent("EUR_USD", 1, "LONG", 1.1, origin=tick.created)
+        events.put(fill)
+        handlers[TickEvent](tick)
+        handlers[FillEvent](events.get())
+        self.assertEqual(handled, [tick, fill])
+        self.assertGreaterEqual(fill.dispatched, tick.created)
+        stats = monitor.stats()
+        for stage in ['queue.TICK', 'queue.FILL', 'handle.TICK',
+                'handle.FILL', 'tick_to_fill']:
+            self.assertEqual(stats[stage]['count'], 1)
+        self.assertEqual(monitor.max_queue_depth, 1)
+
+if __name__ == '__main__':
+    unittest.main()
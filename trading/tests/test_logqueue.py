@@ -0,0 +1,61 @@
+import unittest
+import logging
+import threading
+
+from quantfxengine.trading.logqueue import *
+
+class ListHandler(logging.Handler):
+    """
+    Collects the formatted messages and the threads which wrote them
+    """
+    def __init__(self, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread())
+
+
+class Test_QueueLogging(unittest.TestCase):
+    """
+    Unit tests for QueueHandler, QueueListener and start_queue_logging
+    """
+    def setUp(self):
+        self.logger = logging.getLogger("quantfxengine.test_logqueue")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.handler = ListHandler(logging.INFO)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.handlers.__delitem__, slice(None))
+
+    def test_queue_logging(self):
+        listener = start_queue_logging()
+        self.assertEqual([handler.__class__ for handler in
+            self.logger.handlers], [QueueHandler])
+        self.logger.debug("not written: %s", 1)
+        self.logger.info("tick %s", 1)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception("failed")
+        listener.stop()
+        self.assertEqual(self.handler.messages[0], "INFO tick 1")
+        self.assertTrue(self.handler.messages[1].startswith("ERROR failed"))
+        self.assertIn("ZeroDivisionError", self.handler.messages[1])
+        self.assertNotIn(threading.current_thread(), self.handler.threads)
+
+    def tearDown(self):
+        # give all loggers their handlers back
+        loggers = [logging.getLogger()] + \
+            logging.Logger.manager.loggerDict.values()
+        for logger in loggers:
+            for handler in list(getattr(logger, 'handlers', [])):
+                if isinstance(handler, QueueHandler):
+                    logger.removeHandler(handler)
+                    logger.addHandler(handler.target)
+
+if __name__ == '__main__':
+    unittest.main()
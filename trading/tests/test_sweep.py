@@ -0,0 +1,68 @@
+import unittest
+import threading
+import tempfile
+import os
+
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.strategy.strategy import TestRandomStrategy
+from quantfxengine.streaming.streaming import StreamingPricesFromFile
+from quantfxengine.trading.backtest import backtest
+from quantfxengine.trading.sweep import *
+
+class Test_Sweep(unittest.TestCase):
+    """
+    Unit tests for the parameter sweep
+    """
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, '\n'.join([
+            'EUR_USD,2015-02-14T10:30:%02d.000000Z,%.5f,%.5f' % (
+                i, 1.24 + 0.001 * (i % 7), 1.2402 + 0.001 * (i % 7))
+            for i in range(60)
+        ]))
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_parameter_grid(self):
+        self.assertEqual(
+            parameter_grid({'leverage': [10, 20], 'equity': [1000]}),
+            [{'equity': 1000, 'leverage': 10},
+             {'equity': 1000, 'leverage': 20}])
+
+    def test_run_sweep(self):
+        """
+        every configuration gives the result of a single backtest
+        """
+        configs = parameter_grid({
+            'leverage': [10, 20], 'risk_per_trade': [0.01, 0.02]})
+        results = run_sweep(self.filename, configs, processes=2)
+        self.assertEqual(len(results), 4)
+        for config, result in zip(configs, results):
+            events = LocalEventQueue()
+            prices = StreamingPricesFromFile(self.filename, events,
+                threading.Event())
+            portfolio = Portfolio(prices, events, **config)
+            backtest(prices, events, TestRandomStrategy(events),
+                portfolio, MockExecution(events, prices))
+            self.assertEqual(result['leverage'], config['leverage'])
+            self.assertAlmostEqual(result['balance'], portfolio.balance)
+            self.assertGreater(result['trades'], 0)
+            self.assertGreaterEqual(result['max_drawdown'], 0)
+
+    def test_write_results(self):
+        fd, results_file = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, results_file)
+        write_results([{'leverage': 10, 'balance': 1.0, 'trades': 2,
+            'max_drawdown': 0.5, 'runtime': 0.1}], results_file)
+        with open(results_file) as f:
+            self.assertEqual(f.read().splitlines(), [
+                'leverage,balance,trades,max_drawdown,runtime',
+                '10,1.0,2,0.5,0.1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import threading
+import Queue
+import time
+
+from quantfxengine.event.event import TickEvent, FillEvent
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import MockPriceStream
+from quantfxengine.trading.trading import trade, request_stop
+
+class RecordingStrategy(object):
+    def __init__(self):
+        self.ticks = []
+
+    def calculate_signals(self, event):
+        self.ticks.append((time.time(), event))
+
+
+class TaggedFillEvent(FillEvent):
+    pass
+
+
+class Test_Trade(unittest.TestCase):
+    """
+    Unit tests for the function trade
+    """
+    def setUp(self):
+        self.events = Queue.Queue()
+        self.stoprequest = threading.Event()
+        self.ticker = MockPriceStream(self.events, self.stoprequest)
+        self.ticker.newprice(3, 4)
+        self.strategy = RecordingStrategy()
+        self.portfolio = Portfolio(self.ticker, self.events)
+        self.thread = threading.Thread(target=trade, args=(self.events,
+            self.strategy, self.portfolio,
+            MockExecution(self.events, self.ticker), self.stoprequest))
+        self.thread.start()
+        self.addCleanup(self.thread.join)
+        self.addCleanup(request_stop, self.events, self.stoprequest)
+
+    def test_wakes_up(self):
+        time.sleep(0.05)
+        start = time.time()
+        self.events.put(TickEvent("EUR_USD", "t", 3, 4))
+        while not self.strategy.ticks and time.time() - start < 1:
+            time.sleep(0.001)
+        self.assertLess(self.strategy.ticks[0][0] - start, 0.5)
+
+    def test_request_stop(self):
+        start = time.time()
+        request_stop(self.events, self.stoprequest)
+        self.thread.join(1)
+        self.assertFalse(self.thread.is_alive())
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_stoprequest_alone(self):
+        """
+        trade() blocks without polling, so it sees stoprequest only
+        with the next event
+        """
+        # wait until trade() blocks in the loop
+        self.events.put(TickEvent("EUR_USD", "t", 3, 4))
+        start = time.time()
+        while not self.strategy.ticks and time.time() - start < 1:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        self.stoprequest.set()
+        self.thread.join(0.2)
+        self.assertTrue(self.thread.is_alive())
+        self.events.put(TickEvent("EUR_USD", "t", 3, 4))
+        self.thread.join(1)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(len(self.strategy.ticks), 2)
+
+    def test_stop_after_queued_events(self):
+        for i in range(3):
+            self.events.put(TickEvent("EUR_USD", "t", 3, 4))
+        self.events.put(None)
+        self.thread.join(1)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(len(self.strategy.ticks), 3)
+
+    def test_subclassed_fill_at_stop(self):
+        """
+        a fill which is still queued at the stop is handled and its
+        position closed, also if it is a subclass of FillEvent
+        """
+        self.events.put(None)
+        self.events.put(TaggedFillEvent("EUR_USD", 100, "LONG", 4))
+        self.thread.join(1)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(self.portfolio.fills, 2)
+        self.assertEqual(self.portfolio.positions, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import threading
+import tempfile
+import random
+import os
+
+import numpy as np
+
+from quantfxengine.event.event import SignalEvent
+from quantfxengine.event.eventqueue import LocalEventQueue
+from quantfxengine.execution.execution import MockExecution
+from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.streaming.streaming import StreamingPricesFromFile
+from quantfxengine.streaming.tickdata import load_csv_arrays
+from quantfxengine.trading.backtest import backtest
+from quantfxengine.trading.vectorized import vectorized_backtest
+
+class ArrayStrategy(object):
+    """
+    Sends the signals of a signal array, one entry per tick
+    """
+    def __init__(self, events, signals):
+        self.events = events
+        self.signals = signals
+        self.ticks = 0
+
+    def calculate_signals(self, event):
+        if event.type == 'TICK':
+            signal = self.signals[self.ticks]
+            if signal:
+                side = "buy" if signal > 0 else "sell"
+                self.events.put(SignalEvent(
+                    event.instrument, "market", side))
+            self.ticks += 1
+
+
+class Test_VectorizedBacktest(unittest.TestCase):
+    """
+    Unit tests for the function vectorized_backtest
+    """
+    def write_csv(self, rows):
+        fd, filename = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, '\n'.join(rows))
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_matches_portfolio(self):
+        """
+        the final balance equals the one of the event-driven backtest
+        """
+        rnd = random.Random(3)
+        rows = []
+        mid = {"EUR_USD": 1.24, "EUR_CHF": 1.20}
+        for i in range(500):
+            instrument = rnd.choice(sorted(mid.keys()))
+            mid[instrument] += rnd.gauss(0, 0.001)
+            rows.append("%s,2015-02-14T10:%02d:%02d.000000Z,%.5f,%.5f" % (
+                instrument, i // 60 % 60, i % 60,
+                mid[instrument] - 0.0001, mid[instrument] + 0.0001))
+        filename = self.write_csv(rows)
+        signals = np.array([rnd.choice([-1, 0, 0, 1]) for r in rows])
+
+        events = LocalEventQueue()
+        prices = StreamingPricesFromFile(filename, events,
+            threading.Event())
+        portfolio = Portfolio(prices, events, equity=10000)
+        backtest(prices, events, ArrayStrategy(events, signals),
+            portfolio, MockExecution(events, prices))
+
+        result = vectorized_backtest(load_csv_arrays(filename), signals,
+            equity=10000)
+        self.assertEqual(len(result.fill_index), np.count_nonzero(signals))
+        self.assertAlmostEqual(result.final_balance, portfolio.balance)
+
+    def test_positions_and_pnl(self):
+        filename = self.write_csv([
+            'EUR_USD,2015-02-14T10:30:00.000000Z,1.0,1.1',
+            'EUR_USD,2015-02-14T10:30:01.000000Z,1.2,1.3',
+            'EUR_USD,2015-02-14T10:30:02.000000Z,1.3,1.4',
+        ])
+        result = vectorized_backtest(load_csv_arrays(filename),
+            [1, 1, -1], equity=10000)
+        # trade units are 10000 * 0.02 / 20 = 10
+        self.assertEqual(result.units[:, 0].tolist(), [10, 20, 10])
+        self.assertAlmostEqual(result.avg_price[1, 0], 1.2)
+        self.assertAlmostEqual(result.exposure[2, 0], 390)
+        self.assertAlmostEqual(result.unrealized_pnl[0, 0],
+            -0.1 * 200 / 1.0)
+        self.assertAlmostEqual(result.balance[2],
+            10000 + 0.1 * 10 / 1.3)
+        self.assertAlmostEqual(result.final_balance,
+            result.balance[2] + 0.1 * 390 / 1.3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,82 +1,214 @@
+import os
 import Queue
 import threading
+import signal
 import time
 import logging
 import logging.config
 
-from quantfxengine.execution.execution import ExecutionAtOANDA, MockExecution
+from quantfxengine.event.event import TickEvent, SignalEvent, OrderEvent, \
+    FillEvent, BarEvent
+from quantfxengine.event.eventqueue import LocalEventQueue, \
+    ConflatingEventQueue, PriorityEventQueue
+from quantfxengine.execution.execution import ExecutionAtOANDA, \
+    MockExecution, AsyncExecution
+from quantfxengine.portfolio.journal import Journal
 from quantfxengine.portfolio.portfolio import Portfolio
+from quantfxengine.portfolio.snapshot import Snapshotter, \
+    replay_journal_fills
 from quantfxengine.settings import *
 from quantfxengine.strategy.strategy import TestRandomStrategy
 from quantfxengine.streaming.streaming import *
+from quantfxengine.streaming.bars import BarAggregator, \
+    StreamingBarsFromFile
+from quantfxengine.trading.backtest import backtest, find_handler
+from quantfxengine.trading.latency import LatencyMonitor
+from quantfxengine.trading.logqueue import start_queue_logging
 
 
-def trade(events, strategy, portfolio, execution, stoprequest):
+def request_stop(events, stoprequest):
     """
-    Carries out an infinite while loop that polls the events queue and
-    directs each event to either the strategy component, the execution
-    handler or the portfolio.
+    Asks trade() to stop. Besides setting stoprequest we put None into
+    the queue, which wakes trade() up immediately. trade() also stops
+    when it gets None without stoprequest, after it has handled all
+    events which were in the queue before. This is the only supported
+    way to stop trade(): it blocks in events.get() without a timeout,
+    so setting stoprequest alone is only noticed with the next event.
     """
+    stoprequest.set()
+    events.put(None)
+
+
+def trade(
+    events, strategy, portfolio, execution, stoprequest, monitor=None,
+    bars=None, snapshots=None
+):
+    """
+    Carries out an infinite while loop that waits for events in the
+    queue and directs each event to either the strategy component, the
+    execution handler or the portfolio. Stop it with request_stop(),
+    setting stoprequest alone does not wake it up.
+    If monitor is a LatencyMonitor, it records the latencies of all
+    stages of the loop.
+    If bars is a BarAggregator, the ticks go to bars instead of the
+    strategy and the strategy gets the BarEvents which bars puts into
+    the queue.
+    If snapshots is a Snapshotter, it may write a snapshot after every
+    fill.
+    The log levels are checked once when trade() starts.
+    """
+    logger = logging.getLogger(__name__)
+    # a disabled logger.debug() still walks up the logger hierarchy,
+    # which costs more than handling a tick
+    debug = logger.isEnabledFor(logging.DEBUG)
+    info = logger.isEnabledFor(logging.INFO)
+    calculate_signals = strategy.calculate_signals
+    execute_order = execution.execute_order
+    if monitor is not None:
+        calculate_signals = monitor.timed('strategy', calculate_signals)
+        execute_order = monitor.timed('execution', execute_order)
+
+    def on_tick(event):
+        if debug:
+            logger.debug("recv new tick signal: %s", event)
+        calculate_signals(event)
+        portfolio.execute_tick_event(event)
+
+    def on_bar(event):
+        if debug:
+            logger.debug("recv new bar: %s", event)
+        calculate_signals(event)
+        if bars is None:
+            # bars streamed instead of ticks
+            portfolio.execute_tick_event(event)
+
+    if bars is not None:
+        def on_tick(event):
+            if debug:
+                logger.debug("recv new tick signal: %s", event)
+            bars.on_tick(event)
+            portfolio.execute_tick_event(event)
+
+    def on_signal(event):
+        if info:
+            logger.info("recv new order signal: %s", event)
+        portfolio.execute_signal_event(event)
+
+    def on_order(event):
+        if info:
+            logger.info("Executing order! %s", event)
+        execute_order(event)
+
+    def on_fill(event):
+        if info:
+            logger.info("recv new fill event: %s", event)
+        portfolio.execute_fill_event(event)
+        if snapshots is not None:
+            snapshots.on_fill()
+
+    # dispatch on the class of the event instead of comparing strings
+    handlers = {
+        TickEvent: on_tick,
+        SignalEvent: on_signal,
+        OrderEvent: on_order,
+        FillEvent: on_fill,
+        BarEvent: on_bar,
+    }
+    if monitor is not None:
+        handlers = monitor.wrap_handlers(handlers, events)
+    get_handler = handlers.get
     while not stoprequest.isSet():
-        try:
-            event = events.get(True,0.5)
-            #block and wait a half second if queue is empty
-        except Queue.Empty:
-            pass
-        else:
-            if event is not None:
-                if event.type == 'TICK':
-                    logger.debug("recv new tick signal: %s", event)
-                    strategy.calculate_signals(event)
-                    portfolio.execute_tick_event(event)
-                elif event.type == 'SIGNAL':
-                    logger.info("recv new order signal: %s", event)
-                    portfolio.execute_signal_event(event)
-                elif event.type == 'ORDER':
-                    logger.info("Executing order! %s", event)
-                    execution.execute_order(event)
-                elif event.type == 'FILL':
-                    logger.info("recv new fill event: %s", event)
-                    portfolio.execute_fill_event(event)
+        # Block without a timeout. In Python 2 a get with a timeout
+        # polls and sees a new event only after up to 50ms.
+        event = events.get()
+        if event is None:
+            break
+        handler = get_handler(event.__class__)
+        if handler is None:
+            handler = find_handler(handlers, event.__class__, logger)
+        handler(event)
+    # the handlers of the subclasses of FillEvent and OrderEvent are
+    # the ones of their base classes
+    def handler_of(event):
+        handler = get_handler(event.__class__)
+        if handler is None:
+            handler = find_handler(handlers, event.__class__, logger)
+        return handler
+    handle_fill = handlers[FillEvent]
+    handle_order = handlers[OrderEvent]
     #execute remaining events
+    execution.wait_until_done()
     while not events.empty():
         event = events.get()
-        if event is not None:
-            if event.type == 'FILL':
-                #throw everything away except fillevents
-                logger.info("recv new fill event: %s", event)
-                portfolio.execute_fill_event(event)
-            else:
-                pass
+        handler = handler_of(event)
+        if handler is handle_fill:
+            #throw everything away except fillevents
+            handler(event)
     #close all positions
     logger.info("Closing all positions")
     portfolio.execute_close_all_positions()
     #and execute the resulting order and fill events
     while not events.empty():
         event = events.get()
-        if event is not None:
-            if event.type == 'ORDER':
-                logger.info("Executing order! %s", event)
-                execution.execute_order(event)
-            elif event.type == 'Fill':
-                logger.info("recv new fill event: %s", event)
-                portfolio.execute_fill_event(event)
+        handler = handler_of(event)
+        if handler is handle_order or handler is handle_fill:
+            handler(event)
+    #the fills of an asynchronous execution arrive later
+    execution.wait_until_done()
+    while not events.empty():
+        event = events.get()
+        handler = handler_of(event)
+        if handler is handle_fill:
+            handler(event)
 
 if __name__ == "__main__":
     logging.config.fileConfig('logging.conf')
     logger = logging.getLogger(__name__) #get a new logger
+    listener = None
+    if ASYNC_LOGGING:
+        listener = start_queue_logging()
+
+    # the bars are aggregated in the trading loop, after the queue, so
+    # they have to get every tick
+    conflate = CONFLATE_TICKS and BAR_INTERVAL is None
+    if CONFLATE_TICKS and not conflate:
+        logger.warning("CONFLATE_TICKS is ignored with BAR_INTERVAL")
 
-    events = Queue.Queue() # Queue for communication between threads
+    if BACKTEST and SYNCHRONOUS_BACKTEST:
+        # Everything runs in this thread, so we do not need locking
+        events = LocalEventQueue()
+    elif PRIORITY_EVENTS and not BACKTEST:
+        # Handle fills and orders before waiting ticks
+        events = PriorityEventQueue(conflate=conflate)
+    elif conflate and not BACKTEST:
+        # Drop stale ticks if the trading loop falls behind the market
+        events = ConflatingEventQueue()
+    else:
+        events = Queue.Queue() # Queue for communication between threads
     stoprequest = threading.Event() # For stopping the threads
 
     # Trade UNITS units of INSTRUMENTS
     instruments = INSTRUMENTS
     units = UNITS
 
-    if BACKTEST:
+    if BACKTEST and BARFILE is not None:
+        # Replay pre-aggregated bars instead of ticks
+        prices = StreamingBarsFromFile(BARFILE, events, stoprequest)
+        execution = MockExecution(events, prices)
+    elif BACKTEST:
         # Create the price streaming class
-        prices = StreamingPricesFromFile(
-            BACKTESTFILE, events, stoprequest
+        if isinstance(BACKTESTFILE, list) or os.path.isdir(BACKTESTFILE):
+            # many csv-files merged by time
+            PriceFile = StreamingPricesFromFiles
+        elif BACKTESTFILE.endswith('.qfx'):
+            # A binary tick store, see streaming/tickstore.py
+            from quantfxengine.streaming.tickstore import \
+                StreamingPricesFromTickStore as PriceFile
+        else:
+            PriceFile = StreamingPricesFromFile
+        prices = PriceFile(
+            BACKTESTFILE, events, stoprequest,
+            speed=REPLAY_SPEED, max_pending=MAX_PENDING_EVENTS
         )
         # Create the mock execution handler
         execution = MockExecution(events, prices)
@@ -89,7 +221,14 @@ if __name__ == "__main__":
         )
         # Create the execution handler making sure to
         # provide authentication commands
-        execution = ExecutionAtOANDA(API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID, events)
+        execution = ExecutionAtOANDA(API_DOMAIN, ACCESS_TOKEN, ACCOUNT_ID,
+            events, pool_size=EXECUTION_WORKERS)
+        if ASYNC_EXECUTION:
+            # Do not block the trading loop while orders are sent
+            execution = AsyncExecution(execution, EXECUTION_WORKERS)
+
+    if PRICE_HISTORY is not None:
+        prices.keep_history(PRICE_HISTORY)
 
     # Create the strategy/signal generator, passing the
     # instrument, quantity of units and the events queue
@@ -98,25 +237,83 @@ if __name__ == "__main__":
     # Create the portfolio object that will be used to
     # compare the OANDA positions with the local, to
     # ensure backtesting integrity.
-    portfolio = Portfolio(prices, events, equity=units)
-
-    # Create two separate threads: One for the trading loop
-    # and another for the market price streaming class
-    trade_thread = threading.Thread(target=trade, args=(events,
-        strategy, portfolio, execution, stoprequest))
-    price_thread = threading.Thread(target=prices.stream_to_queue,
-        args=[])
-
-    # Start both threads
-    trade_thread.start()
-    price_thread.start()
-
-    # say to the threads if i have pressed ctrl+c
-    try:
-        while trade_thread.is_alive():
-            trade_thread.join(10)
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Sending stop request to threads")
-        stoprequest.set()
-        logger.info("Waiting for threads to terminate")
-        logging.shutdown()
+    journal = None
+    if JOURNAL_DIR is not None:
+        journal = Journal(JOURNAL_DIR)
+    portfolio = Portfolio(prices, events, equity=units,
+        pending_orders=execution, journal=journal)
+
+    # Aggregate the ticks into bars for the strategy
+    bars = None
+    if BAR_INTERVAL is not None and not (BACKTEST and BARFILE is not None):
+        bars = BarAggregator(events, BAR_INTERVAL)
+
+    # Resume from the last snapshot, live with the fills which the
+    # journal recorded after it
+    snapshots = None
+    start = 0
+    if SNAPSHOT_FILE is not None and (SYNCHRONOUS_BACKTEST or not BACKTEST):
+        source = None
+        if BACKTEST:
+            source = BARFILE if BARFILE is not None else BACKTESTFILE
+        snapshots = Snapshotter(SNAPSHOT_FILE, portfolio, prices, strategy,
+            every_ticks=SNAPSHOT_EVERY_TICKS, interval=SNAPSHOT_INTERVAL,
+            source=source)
+        start = snapshots.restore()
+        if not BACKTEST and JOURNAL_DIR is not None:
+            replay_journal_fills(portfolio, JOURNAL_DIR)
+
+    if BACKTEST and SYNCHRONOUS_BACKTEST:
+        backtest(prices, events, strategy, portfolio, execution, bars,
+            snapshots, start)
+        logger.info("Final balance: %0.2f", portfolio.balance)
+    else:
+        # Collect the latencies of the trading loop, dump them every
+        # LATENCY_STATS_INTERVAL seconds and on SIGUSR1
+        monitor = None
+        if LATENCY_STATS_INTERVAL is not None:
+            monitor = LatencyMonitor()
+            monitor.start_reporter(LATENCY_STATS_INTERVAL, stoprequest)
+            signal.signal(signal.SIGUSR1, lambda *args: monitor.dump())
+
+        # Create two separate threads: One for the trading loop
+        # and another for the market price streaming class
+        trade_thread = threading.Thread(target=trade, args=(events,
+            strategy, portfolio, execution, stoprequest, monitor, bars,
+            snapshots))
+        price_thread = threading.Thread(target=prices.stream_to_queue,
+            args=[])
+
+        # Start both threads
+        trade_thread.start()
+        price_thread.start()
+
+        # say to the threads if i have pressed ctrl+c
+        try:
+            if BACKTEST:
+                # stop trading when all ticks of the file are handled
+                while price_thread.is_alive():
+                    price_thread.join(1)
+                events.put(None)
+            while trade_thread.is_alive():
+                trade_thread.join(10)
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("Sending stop request to threads")
+            request_stop(events, stoprequest)
+            prices.disconnect()
+            if monitor is not None:
+                monitor.dump()
+            if isinstance(events, ConflatingEventQueue) and events.conflate:
+                logger.info("Dropped %d stale ticks", events.conflated)
+            logger.info("Waiting for threads to terminate")
+            # trade() closes all positions before it returns, whose
+            # fills have to reach the journal before it is closed
+            while trade_thread.is_alive():
+                trade_thread.join(1)
+    if journal is not None:
+        journal.close()
+    # stop the listener last, when trade() has logged its shutdown, so
+    # that no record is left in its queue
+    if listener is not None:
+        listener.stop()
+    logging.shutdown()
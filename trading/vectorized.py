@@ -0,0 +1,177 @@
+import numpy as np
+
+
+class VectorizedResult(object):
+    """
+    The result of a vectorized backtest. Arrays with one row per tick
+    hold the state after the tick and the fill it caused, arrays with
+    one column per instrument are ordered like instruments.
+    Attributes:
+        instruments: list of instrument names
+        fill_index: tick index of every fill
+        fill_price: price of every fill
+        fill_units: units of every fill, negative for SHORT fills
+        units: (ticks x instruments) array of position units,
+            negative for SHORT positions
+        avg_price: (ticks x instruments) array of average prices
+        exposure: (ticks x instruments) array of exposures
+        unrealized_pnl: (ticks x instruments) array of the profit or
+            loss of the open positions, marked to the bid for LONG and
+            to the ask for SHORT positions
+        balance: balance after every tick
+        equity_curve: balance plus unrealized profit after every tick
+        final_balance: balance after closing all positions at the
+            last prices
+    """
+    def __init__(
+        self, instruments, fill_index, fill_price, fill_units,
+        units, avg_price, exposure, unrealized_pnl, balance,
+        final_balance
+    ):
+        self.instruments = instruments
+        self.fill_index = fill_index
+        self.fill_price = fill_price
+        self.fill_units = fill_units
+        self.units = units
+        self.avg_price = avg_price
+        self.exposure = exposure
+        self.unrealized_pnl = unrealized_pnl
+        self.balance = balance
+        self.equity_curve = balance + unrealized_pnl.sum(axis=1)
+        self.final_balance = final_balance
+
+
+def apply_fill(state, units, price, leverage):
+    """
+    Applies a fill to the position state [units, exposure, avg_price]
+    of one instrument, where units are negative for SHORT. This
+    follows Portfolio.execute_fill_event and returns the realized
+    profit or loss.
+    """
+    pos_units, exposure, avg_price = state
+    if pos_units == 0:
+        state[:] = [units, abs(units) * leverage, price]
+        return 0.0
+    mult = 1.0 if pos_units > 0 else -1.0
+    if (units > 0) == (pos_units > 0):
+        # Add to the position
+        new_units = pos_units + units
+        state[:] = [
+            new_units, exposure + abs(units) * leverage,
+            (avg_price * abs(pos_units) + price * abs(units)) /
+            abs(new_units)
+        ]
+        return 0.0
+    pips = mult * (price - avg_price)
+    if abs(units) == abs(pos_units):
+        # Close the position
+        state[:] = [0, 0.0, 0.0]
+        return pips * exposure / price
+    elif abs(units) < abs(pos_units):
+        # Remove from the position
+        state[:] = [pos_units + units, exposure - abs(units), avg_price]
+        return pips * abs(units) / price
+    else:
+        # Close the position and open one on the other side
+        new_units = pos_units + units
+        state[:] = [new_units, abs(new_units) * leverage, price]
+        return pips * exposure / price
+
+
+def forward_fill_index(event_index, n):
+    """
+    Returns for every tick in range(n) the position of the last entry
+    of the sorted event_index which is at or before that tick, or -1
+    """
+    return np.searchsorted(event_index, np.arange(n), side='right') - 1
+
+
+def vectorized_backtest(
+    ticks, signals, equity=100000.0, leverage=20,
+    risk_per_trade=0.02, close_at_end=True
+):
+    """
+    Backtests a signal array on TickArrays in bulk.
+    signals has one entry per tick: 1 for a buy signal, -1 for a sell
+    signal and 0 for nothing. Like the event-driven Portfolio with a
+    MockExecution, every signal becomes a market order of
+    int(equity * risk_per_trade / leverage) units which is filled at
+    the ask (buy) or bid (sell) of its tick.
+    Only the position bookkeeping runs once per fill, everything which
+    runs per tick is done with numpy.
+    Returns a VectorizedResult.
+    """
+    n = len(ticks)
+    k = len(ticks.instruments)
+    signals = np.asarray(signals)
+    trade_units = int(equity * risk_per_trade / leverage)
+
+    fill_index = np.flatnonzero(signals)
+    fill_sides = signals[fill_index] > 0
+    fill_price = np.where(
+        fill_sides, ticks.asks[fill_index], ticks.bids[fill_index])
+    fill_units = np.where(fill_sides, trade_units, -trade_units)
+    fill_instr = ticks.instrument_ids[fill_index]
+
+    # Position bookkeeping, once per fill
+    states = np.zeros((k, 3))
+    fill_state = np.zeros((len(fill_index), 3))
+    pnl = np.zeros(n)
+    for j, (i, units, price) in enumerate(zip(
+        fill_instr.tolist(), fill_units.tolist(), fill_price.tolist()
+    )):
+        pnl[fill_index[j]] = apply_fill(states[i], units, price, leverage)
+        fill_state[j] = states[i]
+
+    # Balance: equity plus the cumulated realized profits, summed in
+    # the same order as in the Portfolio
+    pnl[0] += equity
+    balance = np.cumsum(pnl)
+
+    # Positions and unrealized profit per tick and instrument
+    units = np.zeros((n, k))
+    avg_price = np.zeros((n, k))
+    exposure = np.zeros((n, k))
+    unrealized_pnl = np.zeros((n, k))
+    for i in range(k):
+        instr_fills = fill_instr == i
+        last = forward_fill_index(fill_index[instr_fills], n)
+        has_state = last >= 0
+        state = fill_state[instr_fills][last[has_state]]
+        units[has_state, i] = state[:, 0]
+        exposure[has_state, i] = state[:, 1]
+        avg_price[has_state, i] = state[:, 2]
+
+        instr_ticks = np.flatnonzero(ticks.instrument_ids == i)
+        last_tick = instr_ticks[
+            np.maximum(forward_fill_index(instr_ticks, n), 0)]
+        bid = ticks.bids[last_tick]
+        ask = ticks.asks[last_tick]
+        long_pos = units[:, i] > 0
+        short_pos = units[:, i] < 0
+        unrealized_pnl[long_pos, i] = (
+            (bid[long_pos] - avg_price[long_pos, i]) *
+            exposure[long_pos, i] / bid[long_pos])
+        unrealized_pnl[short_pos, i] = (
+            (avg_price[short_pos, i] - ask[short_pos]) *
+            exposure[short_pos, i] / ask[short_pos])
+
+    final_balance = balance[-1] if n else equity
+    if close_at_end and n:
+        # Close every open position at the last price of its instrument
+        for i in range(k):
+            if states[i, 0] == 0:
+                continue
+            last_tick = np.flatnonzero(ticks.instrument_ids == i)[-1]
+            if states[i, 0] > 0:
+                price = ticks.bids[last_tick]
+            else:
+                price = ticks.asks[last_tick]
+            final_balance += apply_fill(
+                states[i], -states[i, 0], price, leverage)
+
+    return VectorizedResult(
+        ticks.instruments, fill_index, fill_price, fill_units,
+        units, avg_price, exposure, unrealized_pnl, balance,
+        final_balance
+    )